@@ -0,0 +1,96 @@
+"""
+Report: search quality and latency at reduced embedding dimensions.
+
+Embeds the catalog and a query set once at full dimension (through the
+on-disk embedding cache, so re-runs are free). Each shorter dimension is
+derived by truncating and renormalizing, which gives the same vectors as
+requesting `dimensions=` from the API. For every dimension it reports:
+- recall@k against the full-dimension top-k
+- shade-lookup hit rate: the queried product's handle in the top k
+- index size
+- query latency
+
+Run: OPENAI_API_KEY=sk-... python3 benchmarks/dimension_report.py
+Then ingest with the chosen EMBEDDING_DIMENSION.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from benchmarks.product_embedding_recall import embed_all, MASTER_CSV, PRESET_QUERIES
+from pipelines.embedding_cache import EmbeddingCache, EMBEDDING_CACHE_FILE
+from pipelines.embedding_text import build_embedding_texts
+from semantic_search.search import LocalIndex, EMBEDDING_MODEL, top_k_indices, truncate_embeddings
+
+FULL_DIMENSION = 1536
+DIMENSIONS = "256,512,1024,1536"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dimensions", default=DIMENSIONS, help="Comma-separated dimensions to compare")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--shade-queries", type=int, default=100,
+                        help="Number of '<product> <shade>' lookup queries to sample")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed passes over the query set")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = pd.read_csv(MASTER_CSV).drop_duplicates(subset='variant_id', keep='last').reset_index(drop=True)
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    cache = EmbeddingCache(EMBEDDING_CACHE_FILE, model=EMBEDDING_MODEL, dimension=FULL_DIMENSION)
+
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(df), size=min(args.shade_queries, len(df)), replace=False)
+    lookups = [f"{df['product_name'].iloc[i]} {df['variant_title'].iloc[i]}" for i in sample]
+    expected_handles = [df['handle'].iloc[i] for i in sample]
+    queries = PRESET_QUERIES + lookups
+
+    catalog = embed_all(client, cache, build_embedding_texts(df), FULL_DIMENSION)
+    query_vectors = embed_all(client, cache, queries, FULL_DIMENSION)
+    handles = df['handle'].to_numpy()
+    ids = ("variant_" + df['variant_id'].astype(str)).tolist()
+    metadata = [{} for _ in ids]
+
+    full = truncate_embeddings(catalog, FULL_DIMENSION)
+    full_queries = truncate_embeddings(query_vectors, FULL_DIMENSION)
+    reference = [set(top_k_indices(full @ q, args.k)) for q in full_queries]
+
+    print(f"📦 {len(df)} variants, {len(queries)} queries ({len(lookups)} shade lookups)")
+    print(f"\n{'dimension':>10}{f'recall@{args.k}':>11}{'lookup hit':>12}{'index MB':>10}{'ms/query':>10}")
+    for dimension in (int(d) for d in args.dimensions.split(",")):
+        vectors = truncate_embeddings(catalog, dimension)
+        dim_queries = truncate_embeddings(query_vectors, dimension)
+        index = LocalIndex(ids, vectors, metadata, {"dimension": dimension})
+
+        recalls = []
+        for q, expected in zip(dim_queries, reference):
+            found = set(top_k_indices(vectors @ q, args.k))
+            recalls.append(len(found & expected) / len(expected))
+        hits = [
+            handle in set(handles[top_k_indices(vectors @ q, args.k)])
+            for q, handle in zip(dim_queries[len(PRESET_QUERIES):], expected_handles)
+        ]
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for q in dim_queries:
+                index.query(q, top_k=args.k, include_metadata=False)
+        latency_ms = (time.perf_counter() - start) * 1000 / (args.repeat * len(dim_queries))
+
+        size_mb = vectors.nbytes / 1e6
+        print(f"{dimension:>10}{np.mean(recalls):>11.3f}{np.mean(hits):>12.3f}{size_mb:>10.2f}{latency_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+In-process fake OpenAI embeddings and Pinecone clients for benchmarks.
+
+They implement the slice of each SDK the ingestion pipeline uses, with
+configurable latency, transient error rate and rate-limit behaviour:
+- a random 429 rate;
+- a server-side requests/tokens per minute quota that answers 429 with
+  retry-after and x-ratelimit-* headers like the real APIs.
+Each fake tracks requests, errors and concurrency, so a harness can see
+how many requests the client kept in flight.
+"""
+
+import threading
+import time
+import types
+
+import numpy as np
+
+
+class FakeAPIError(Exception):
+    """Shaped like an SDK APIStatusError: status_code plus response.headers."""
+
+    def __init__(self, status_code, message, headers=None):
+        super().__init__(f"{status_code} {message}")
+        self.status_code = status_code
+        self.response = types.SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+class ServiceModel:
+    """
+    Latency, failure and quota model shared by the fake endpoints.
+
+    latency_ms: mean base latency per request (log-normal jitter)
+    per_unit_ms: extra latency per token (OpenAI) or per vector (Pinecone)
+    error_rate: probability of a transient 500
+    rate_limit_rate: probability of a random 429
+    requests_per_minute / units_per_minute: server-side quota (None = unlimited)
+    """
+
+    def __init__(self, name, latency_ms=50.0, per_unit_ms=0.0, jitter=0.3, error_rate=0.0,
+                 rate_limit_rate=0.0, requests_per_minute=None, units_per_minute=None,
+                 unit_name="tokens", seed=0):
+        self.name = name
+        self.latency_ms = latency_ms
+        self.per_unit_ms = per_unit_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests_per_minute = requests_per_minute
+        self.units_per_minute = units_per_minute
+        self.unit_name = unit_name
+
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.units = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._busy_seconds = 0.0  # Integral of in_flight over time
+        self._last_change = None
+        self._started = None
+        self._window = []  # (timestamp, units) of accepted requests in the last minute
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+
+    def _track(self, delta):
+        now = time.perf_counter()
+        if self._started is None:
+            self._started = self._last_change = now
+        self._busy_seconds += self.in_flight * (now - self._last_change)
+        self._last_change = now
+        self.in_flight += delta
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    @property
+    def mean_in_flight(self):
+        if self._started is None or self._last_change == self._started:
+            return 0.0
+        return self._busy_seconds / (self._last_change - self._started)
+
+    def _quota_headers(self, now):
+        headers = {}
+        used_requests = len(self._window)
+        used_units = sum(units for _, units in self._window)
+        oldest = self._window[0][0] if self._window else now
+        reset = f"{max(0.0, 60.0 - (now - oldest)):.3f}s"
+        if self.requests_per_minute:
+            headers["x-ratelimit-limit-requests"] = str(self.requests_per_minute)
+            headers["x-ratelimit-remaining-requests"] = str(max(0, self.requests_per_minute - used_requests))
+            headers["x-ratelimit-reset-requests"] = reset
+        if self.units_per_minute:
+            headers[f"x-ratelimit-limit-{self.unit_name}"] = str(self.units_per_minute)
+            headers[f"x-ratelimit-remaining-{self.unit_name}"] = str(max(0, self.units_per_minute - used_units))
+            headers[f"x-ratelimit-reset-{self.unit_name}"] = reset
+        return headers
+
+    def admit(self, units):
+        """Apply failure and quota rules; returns response headers or raises FakeAPIError."""
+        with self._lock:
+            now = time.monotonic()
+            self.requests += 1
+            self._window = [(t, u) for t, u in self._window if now - t < 60.0]
+            roll = self._rng.random()
+
+            over_requests = self.requests_per_minute and len(self._window) + 1 > self.requests_per_minute
+            over_units = self.units_per_minute and sum(u for _, u in self._window) + units > self.units_per_minute
+            if over_requests or over_units or roll < self.rate_limit_rate:
+                self.rate_limited += 1
+                headers = self._quota_headers(now)
+                oldest = self._window[0][0] if self._window else now
+                retry_after = max(0.05, 60.0 - (now - oldest)) if (over_requests or over_units) else 1.0
+                headers["retry-after-ms"] = str(int(retry_after * 1000))
+                raise FakeAPIError(429, f"{self.name}: rate limit exceeded", headers)
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.errors += 1
+                raise FakeAPIError(500, f"{self.name}: internal server error")
+
+            self._window.append((now, units))
+            self.units += units
+            return self._quota_headers(now)
+
+    def serve(self, units, fn):
+        """Run fn() as one request: quota check, simulated latency, then the work."""
+        with self._lock:
+            self._track(+1)
+        try:
+            headers = self.admit(units)
+            mean = (self.latency_ms + self.per_unit_ms * units) / 1000.0
+            sigma = self.jitter
+            time.sleep(mean * float(np.exp(self._rng.normal(-sigma * sigma / 2, sigma))) if mean > 0 else 0)
+            return headers, fn()
+        finally:
+            with self._lock:
+                self._track(-1)
+
+    def summary(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            self.unit_name: self.units,
+            "max_in_flight": self.max_in_flight,
+            "mean_in_flight": round(self.mean_in_flight, 2),
+        }
+
+
+# ============ OPENAI ============
+
+def _estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+class _FakeEmbeddings:
+    def __init__(self, model, dimension):
+        self.model = model
+        self.default_dimension = dimension
+        self.with_raw_response = types.SimpleNamespace(create=self._create_raw)
+
+    def _embed(self, inputs, dimensions):
+        dimension = dimensions or self.default_dimension
+        rng = np.random.default_rng(len(inputs))
+        vectors = rng.standard_normal((len(inputs), dimension)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        tokens = sum(_estimate_tokens(text) for text in inputs)
+        return types.SimpleNamespace(
+            data=[types.SimpleNamespace(embedding=v) for v in vectors.tolist()],
+            usage=types.SimpleNamespace(total_tokens=tokens, prompt_tokens=tokens),
+        )
+
+    def _call(self, input, dimensions=None, **kwargs):
+        inputs = [input] if isinstance(input, str) else list(input)
+        tokens = sum(_estimate_tokens(text) for text in inputs)
+        return self.model.serve(tokens, lambda: self._embed(inputs, dimensions))
+
+    def create(self, model=None, input=None, dimensions=None, **kwargs):
+        _, response = self._call(input, dimensions)
+        return response
+
+    def _create_raw(self, model=None, input=None, dimensions=None, **kwargs):
+        headers, response = self._call(input, dimensions)
+        return types.SimpleNamespace(headers=headers, parse=lambda: response)
+
+
+class FakeOpenAI:
+    """Stands in for openai.OpenAI(); only client.embeddings is implemented."""
+
+    def __init__(self, model=None, dimension=1536):
+        self.service = model or ServiceModel("openai", latency_ms=200.0, per_unit_ms=0.002)
+        self.embeddings = _FakeEmbeddings(self.service, dimension)
+
+
+# ============ PINECONE ============
+
+class FakePineconeIndex:
+    def __init__(self, service, dimension, keep_vectors=False):
+        self.service = service
+        self.dimension = dimension
+        self.keep_vectors = keep_vectors
+        self.ids = set()
+        self.vectors = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, **kwargs):
+        def store():
+            with self._lock:
+                for vector in vectors:
+                    self.ids.add(vector["id"])
+                    if self.keep_vectors:
+                        self.vectors[vector["id"]] = vector
+            return types.SimpleNamespace(upserted_count=len(vectors))
+        _, result = self.service.serve(len(vectors), store)
+        return result
+
+    def delete(self, ids=None, delete_all=False, **kwargs):
+        def remove():
+            with self._lock:
+                if delete_all:
+                    self.ids.clear()
+                    self.vectors.clear()
+                for vector_id in ids or []:
+                    self.ids.discard(vector_id)
+                    self.vectors.pop(vector_id, None)
+            return {}
+        _, result = self.service.serve(len(ids or []), remove)
+        return result
+
+    def describe_index_stats(self):
+        return types.SimpleNamespace(total_vector_count=len(self.ids), dimension=self.dimension)
+
+
+class FakePinecone:
+    """Stands in for pinecone.Pinecone(); indexes live in memory."""
+
+    def __init__(self, model=None, dimension=1536):
+        self.service = model or ServiceModel("pinecone", latency_ms=30.0, per_unit_ms=0.05, unit_name="vectors")
+        self.dimension = dimension
+        self.indexes = {}
+
+    def list_indexes(self):
+        return [types.SimpleNamespace(name=name) for name in self.indexes]
+
+    def create_index(self, name, dimension, **kwargs):
+        self.indexes[name] = FakePineconeIndex(self.service, dimension)
+
+    def describe_index(self, name):
+        return types.SimpleNamespace(name=name, dimension=self.indexes[name].dimension)
+
+    def Index(self, name, **kwargs):
+        if name not in self.indexes:
+            self.indexes[name] = FakePineconeIndex(self.service, self.dimension)
+        return self.indexes[name]
@@ -0,0 +1,234 @@
+"""
+Ingestion throughput harness against fake OpenAI and Pinecone services.
+
+Generates a synthetic catalog in the master CSV schema, then runs the real
+pipelines/ingest_to_pinecone.py code on it (full run, optionally followed
+by a --delta run) in a scratch directory. The module's openai_client and
+pc are swapped for in-process fakes with configurable latency, errors and
+429 behaviour, so no money or quota is spent.
+
+Reports:
+- rows/s
+- requests and requests in flight per service
+- batches in flight
+- time per pipeline stage
+- checkpoint overhead
+
+Run: python3 benchmarks/ingest_benchmark.py --rows 100000
+     python3 benchmarks/ingest_benchmark.py --rows 50000 --openai-error-rate 0.02 --openai-tpm 1000000
+     python3 benchmarks/ingest_benchmark.py --rows 20000 --delta-change 0.05 --json report.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Add parent directory to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmarks.fake_services import FakeOpenAI, FakePinecone, ServiceModel
+from benchmarks.synthetic import synthetic_catalog
+
+MASTER_CSV = os.path.join(ROOT, "data", "rare_beauty_master.csv")
+SERVICE_COUNTERS = {"requests", "errors", "rate_limited", "tokens", "vectors"}
+
+
+def load_ingest_module(workdir, args):
+    """
+    Import pipelines.ingest_to_pinecone for a run in workdir.
+    Its settings are read from the environment at import time, and its
+    data paths are relative, so both are set up before the import.
+    """
+    os.chdir(workdir)
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+    os.environ.setdefault("PINECONE_API_KEY", "fake-key")
+    os.environ["LOCAL_INDEX_DIR"] = os.path.join("data", "local_index")
+    os.environ["EMBEDDING_CACHE_FILE"] = os.path.join("data", "embedding_cache.sqlite")
+    os.environ["EMBEDDING_STRATEGY"] = args.strategy
+    os.environ["EMBEDDING_DIMENSION"] = str(args.dimension)
+    os.environ["EMBED_CONCURRENCY"] = str(args.embed_concurrency)
+    os.environ["UPSERT_CONCURRENCY"] = str(args.upsert_concurrency)
+    # Client-side pacing matches the fake quotas (or stays out of the way)
+    os.environ["OPENAI_REQUESTS_PER_MINUTE"] = str(args.openai_rpm or 1_000_000)
+    os.environ["OPENAI_TOKENS_PER_MINUTE"] = str(args.openai_tpm or 1_000_000_000)
+    os.environ["PINECONE_REQUESTS_PER_MINUTE"] = str(args.pinecone_rpm or 1_000_000)
+
+    from pipelines import ingest_to_pinecone as ingest
+    return ingest
+
+
+class Instrumentation:
+    """Wraps ingestion hooks to time checkpoints and the pipeline itself."""
+
+    def __init__(self, ingest):
+        self.ingest = ingest
+        self.checkpoint_writes = 0
+        self.checkpoint_seconds = 0.0
+        self.pipelines = []
+        self.pipeline_seconds = 0.0
+
+        save_checkpoint = ingest.save_checkpoint
+        build_pipeline = ingest.build_ingest_pipeline
+
+        def timed_save_checkpoint(*a, **kw):
+            start = time.perf_counter()
+            try:
+                return save_checkpoint(*a, **kw)
+            finally:
+                self.checkpoint_writes += 1
+                self.checkpoint_seconds += time.perf_counter() - start
+
+        def instrumented_pipeline(*a, **kw):
+            pipeline = build_pipeline(*a, **kw)
+            run = pipeline.run
+
+            def timed_run(*ra, **rkw):
+                start = time.perf_counter()
+                try:
+                    return run(*ra, **rkw)
+                finally:
+                    self.pipeline_seconds += time.perf_counter() - start
+            pipeline.run = timed_run
+            self.pipelines.append(pipeline)
+            return pipeline
+
+        ingest.save_checkpoint = timed_save_checkpoint
+        ingest.build_ingest_pipeline = instrumented_pipeline
+
+    def stage_seconds(self):
+        totals = {}
+        for pipeline in self.pipelines:
+            for name, seconds in pipeline.stage_seconds.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        return totals
+
+    def max_batches_in_flight(self):
+        return max((p.max_in_flight for p in self.pipelines), default=0)
+
+
+def _since(after, before):
+    """Per-phase service counters; concurrency figures are kept as they are."""
+    return {k: v - before.get(k, 0) if k in SERVICE_COUNTERS else v for k, v in after.items()}
+
+
+def run_phase(name, fn, ingest, openai_service, pinecone_service, rows, quiet):
+    instrumentation = Instrumentation(ingest)
+    before_openai = openai_service.summary()
+    before_pinecone = pinecone_service.summary()
+
+    start = time.perf_counter()
+    if quiet:
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            fn()
+    else:
+        fn()
+    wall = time.perf_counter() - start
+
+    pipeline_seconds = instrumentation.pipeline_seconds
+    return {
+        "phase": name,
+        "rows": rows,
+        "wall_seconds": round(wall, 2),
+        "pipeline_seconds": round(pipeline_seconds, 2),
+        "rows_per_second": round(rows / pipeline_seconds, 1) if pipeline_seconds else None,
+        "batches_max_in_flight": instrumentation.max_batches_in_flight(),
+        "stage_seconds": {k: round(v, 2) for k, v in instrumentation.stage_seconds().items()},
+        "checkpoint_writes": instrumentation.checkpoint_writes,
+        "checkpoint_seconds": round(instrumentation.checkpoint_seconds, 4),
+        "checkpoint_overhead": round(instrumentation.checkpoint_seconds / pipeline_seconds, 5) if pipeline_seconds else None,
+        "openai": _since(openai_service.summary(), before_openai),
+        "pinecone": _since(pinecone_service.summary(), before_pinecone),
+    }
+
+
+def print_report(report):
+    print(f"\n📊 {report['phase']}: {report['rows']} rows")
+    print(f"   Pipeline: {report['pipeline_seconds']}s -> {report['rows_per_second']} rows/s "
+          f"(wall incl. setup and compaction {report['wall_seconds']}s)")
+    stages = ", ".join(f"{k} {v}s" for k, v in report["stage_seconds"].items())
+    print(f"   Stage time (summed over workers): {stages}")
+    print(f"   Batches in flight (max): {report['batches_max_in_flight']}")
+    print(f"   Checkpoints: {report['checkpoint_writes']} writes, {report['checkpoint_seconds']}s "
+          f"({100 * (report['checkpoint_overhead'] or 0):.3f}% of pipeline time)")
+    for service in ("openai", "pinecone"):
+        s = report[service]
+        print(f"   {service}: {s['requests']} requests, {s['errors']} errors, {s['rate_limited']} rate limited, "
+              f"in flight max {s['max_in_flight']} / mean {s['mean_in_flight']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--strategy", choices=["variant", "product"], default="variant")
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--embed-concurrency", type=int, default=4)
+    parser.add_argument("--upsert-concurrency", type=int, default=4)
+    parser.add_argument("--delta-change", type=float, default=0.0,
+                        help="After the full run, change this fraction of rows and run --delta")
+
+    fakes = parser.add_argument_group("fake services")
+    fakes.add_argument("--openai-latency-ms", type=float, default=200.0)
+    fakes.add_argument("--openai-ms-per-token", type=float, default=0.002)
+    fakes.add_argument("--openai-error-rate", type=float, default=0.0)
+    fakes.add_argument("--openai-429-rate", type=float, default=0.0)
+    fakes.add_argument("--openai-rpm", type=int, help="Server-side requests/min quota")
+    fakes.add_argument("--openai-tpm", type=int, help="Server-side tokens/min quota")
+    fakes.add_argument("--pinecone-latency-ms", type=float, default=30.0)
+    fakes.add_argument("--pinecone-ms-per-vector", type=float, default=0.05)
+    fakes.add_argument("--pinecone-error-rate", type=float, default=0.0)
+    fakes.add_argument("--pinecone-429-rate", type=float, default=0.0)
+    fakes.add_argument("--pinecone-rpm", type=int, help="Server-side requests/min quota")
+
+    parser.add_argument("--workdir", help="Scratch directory (default: a temporary one)")
+    parser.add_argument("--verbose", action="store_true", help="Show the ingestion script's own output")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args()
+
+    template = MASTER_CSV if os.path.exists(MASTER_CSV) else None
+    df = synthetic_catalog(args.rows, template_csv=template)
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ingest_benchmark_")
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    df.to_csv(os.path.join(workdir, "data", "rare_beauty_master.csv"), index=False)
+    print(f"📦 {args.rows} synthetic rows ({'master CSV templates' if template else 'built-in vocabulary'}) in {workdir}")
+
+    ingest = load_ingest_module(workdir, args)
+    openai_service = ServiceModel(
+        "openai", latency_ms=args.openai_latency_ms, per_unit_ms=args.openai_ms_per_token,
+        error_rate=args.openai_error_rate, rate_limit_rate=args.openai_429_rate,
+        requests_per_minute=args.openai_rpm, units_per_minute=args.openai_tpm, unit_name="tokens")
+    pinecone_service = ServiceModel(
+        "pinecone", latency_ms=args.pinecone_latency_ms, per_unit_ms=args.pinecone_ms_per_vector,
+        error_rate=args.pinecone_error_rate, rate_limit_rate=args.pinecone_429_rate,
+        requests_per_minute=args.pinecone_rpm, unit_name="vectors", seed=1)
+    ingest.openai_client = FakeOpenAI(openai_service, dimension=args.dimension)
+    ingest.pc = FakePinecone(pinecone_service, dimension=args.dimension)
+
+    reports = [run_phase("full ingest", ingest.ingest_to_pinecone, ingest,
+                         openai_service, pinecone_service, args.rows, not args.verbose)]
+
+    if args.delta_change:
+        changed = df.sample(frac=args.delta_change, random_state=0).index
+        df.loc[changed, "description"] = df.loc[changed, "description"].astype(str) + " (updated)"
+        df.to_csv(os.path.join("data", "rare_beauty_master.csv"), index=False)
+        reports.append(run_phase(f"delta ingest ({len(changed)} changed)", ingest.ingest_delta, ingest,
+                                 openai_service, pinecone_service, len(changed), not args.verbose))
+
+    for report in reports:
+        print_report(report)
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n💾 Report written to {json_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Offline recall check: composed product+shade vectors vs full per-variant vectors.
+
+Embeds the catalog both ways (through the on-disk embedding cache, so
+re-runs are free), runs the same queries against both and reports how
+much of the full-embedding top-k the composed vectors recover, alongside
+how many texts each strategy has to embed.
+
+Run: OPENAI_API_KEY=sk-... python3 benchmarks/product_embedding_recall.py
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai import OpenAI
+
+from pipelines.embedding_cache import EmbeddingCache, EMBEDDING_CACHE_FILE
+from pipelines.embedding_text import (
+    build_embedding_texts, build_variant_texts, PRODUCT_TEXT_FIELDS
+)
+from pipelines.rate_limiter import get_rate_limiter
+from pipelines.token_budget import TokenEstimator, pack_batches
+from semantic_search.search import EMBEDDING_DIMENSION, EMBEDDING_MODEL, normalize_rows, top_k_indices
+
+MASTER_CSV = "data/rare_beauty_master.csv"
+
+openai_limiter = get_rate_limiter("openai")
+
+PRESET_QUERIES = [
+    "products for a summer dewy glow with Rare Beauty",
+    "lightweight natural makeup for office from Rare Beauty",
+    "evening glam look with Rare Beauty products",
+]
+
+
+def embed_all(client, cache, texts, dimension=EMBEDDING_DIMENSION):
+    """Embed texts at dimension, calling the API only for cache misses; cache must be keyed by that dimension."""
+    embeddings = cache.get_many(texts)
+    missing = list(dict.fromkeys(t for t, e in zip(texts, embeddings) if e is None))
+    if missing:
+        estimator = TokenEstimator()
+        for start, end in pack_batches([estimator.count(t) for t in missing], exact=estimator.exact):
+            chunk = missing[start:end]
+            inputs = [estimator.truncate(t) for t in chunk]  # Over-long texts would be rejected
+            response = openai_limiter.call(
+                lambda: client.embeddings.create(model=EMBEDDING_MODEL, input=inputs, dimensions=dimension),
+                tokens=sum(estimator.count(t) for t in inputs)
+            )
+            cache.put_many(chunk, [item.embedding for item in response.data])
+        embeddings = cache.get_many(texts)
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def compose(product_vectors, variant_vectors, has_variant, weight):
+    combined = np.where(
+        has_variant[:, None],
+        (1 - weight) * product_vectors + weight * variant_vectors,
+        product_vectors
+    )
+    return normalize_rows(combined)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--weights", default="0.2,0.35,0.5",
+                        help="Comma-separated VARIANT_TEXT_WEIGHT values to compare")
+    parser.add_argument("--shade-queries", type=int, default=50,
+                        help="Number of '<product> <shade>' lookup queries to sample")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    df = pd.read_csv(MASTER_CSV).drop_duplicates(subset='variant_id', keep='last').reset_index(drop=True)
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    cache = EmbeddingCache(EMBEDDING_CACHE_FILE, model=EMBEDDING_MODEL, dimension=EMBEDDING_DIMENSION)
+
+    full_texts = build_embedding_texts(df)
+    product_texts = build_embedding_texts(df, PRODUCT_TEXT_FIELDS)
+    variant_texts = build_variant_texts(df)
+    has_variant = np.array([t is not None for t in variant_texts])
+
+    full_inputs = len(set(full_texts))
+    shared_inputs = len(set(product_texts)) + len({t for t in variant_texts if t is not None})
+    print(f"📦 {len(df)} variants")
+    print(f"   Texts to embed, per-variant strategy: {full_inputs}")
+    print(f"   Texts to embed, product strategy:     {shared_inputs} "
+          f"({full_inputs / max(1, shared_inputs):.1f}x fewer)")
+
+    full_vectors = normalize_rows(embed_all(client, cache, full_texts))
+    product_vectors = embed_all(client, cache, product_texts)
+    variant_vectors = np.zeros_like(product_vectors)
+    if has_variant.any():
+        variant_vectors[has_variant] = embed_all(
+            client, cache, [t for t in variant_texts if t is not None])
+
+    rng = np.random.default_rng(args.seed)
+    sample = rng.choice(len(df), size=min(args.shade_queries, len(df)), replace=False)
+    queries = PRESET_QUERIES + [
+        f"{df['product_name'].iloc[i]} {df['variant_title'].iloc[i]}" for i in sample
+    ]
+    query_vectors = normalize_rows(embed_all(client, cache, queries))
+
+    print(f"\n🔎 recall@{args.k} of composed vectors vs full per-variant vectors "
+          f"({len(queries)} queries)")
+    for weight in (float(w) for w in args.weights.split(",")):
+        composed = compose(product_vectors, variant_vectors, has_variant, weight)
+        recalls = []
+        for q in query_vectors:
+            expected = set(top_k_indices(full_vectors @ q, args.k))
+            found = set(top_k_indices(composed @ q, args.k))
+            recalls.append(len(expected & found) / len(expected))
+        print(f"   weight {weight:.2f}: recall@{args.k} = {np.mean(recalls):.3f}")
+
+
+if __name__ == "__main__":
+    main()
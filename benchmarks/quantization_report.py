@@ -0,0 +1,101 @@
+"""
+Report: memory per vector and recall@k of quantized local indexes.
+
+Compares int8 and float16 storage (with and without the exact float32
+re-rank) against exact float32 search. Uses the local index written by
+ingestion when --index-dir is given, otherwise a synthetic clustered
+catalog (embeddings are far from uniformly random, so clusters matter).
+
+Run: python3 benchmarks/quantization_report.py --rows 50000
+     python3 benchmarks/quantization_report.py --index-dir data/local_index
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_search.search import (
+    LocalIndex, QuantizedIndex, QUANTIZATION_KINDS, normalize_rows, top_k_indices
+)
+
+
+def synthetic_index(n_rows, dimension, n_clusters=200, seed=0):
+    """In-memory LocalIndex of normalized vectors drawn around random centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dimension)).astype(np.float32)
+    assignments = rng.integers(0, n_clusters, size=n_rows)
+    vectors = np.empty((n_rows, dimension), dtype=np.float32)
+    for start in range(0, n_rows, 10000):
+        rows = assignments[start:start + 10000]
+        noise = rng.standard_normal((len(rows), dimension)).astype(np.float32)
+        vectors[start:start + 10000] = normalize_rows(centers[rows] + 1.5 * noise)
+    ids = [f"variant_{i}" for i in range(n_rows)]
+    return LocalIndex(ids, vectors, [{} for _ in ids], {"dimension": dimension})
+
+
+def sample_queries(base, n_queries, seed=1):
+    """Queries near existing vectors, like a user describing a real product."""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(base), size=min(n_queries, len(base)), replace=False)
+    noise = rng.standard_normal((len(rows), base.dimension)).astype(np.float32)
+    return normalize_rows(np.asarray(base.vectors[np.sort(rows)]) + 0.5 * noise / np.sqrt(base.dimension))
+
+
+def evaluate(index, queries, truth, k, **query_args):
+    recalls = []
+    start = time.perf_counter()
+    for query_vector, expected in zip(queries, truth):
+        found = {m["id"] for m in index.query(query_vector, top_k=k, include_metadata=False, **query_args)["matches"]}
+        recalls.append(len(found & expected) / len(expected))
+    latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return float(np.mean(recalls)), latency_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index-dir", help="Use this local index instead of synthetic vectors")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank", type=int, default=100, help="Candidates re-scored in float32")
+    args = parser.parse_args()
+
+    if args.index_dir:
+        base = LocalIndex.load(args.index_dir)
+        print(f"📦 Local index {args.index_dir}: {len(base)} vectors x {base.dimension}")
+    else:
+        base = synthetic_index(args.rows, args.dimension)
+        print(f"📦 Synthetic catalog: {len(base)} vectors x {base.dimension}")
+
+    queries = sample_queries(base, args.queries)
+    truth = []
+    start = time.perf_counter()
+    for query_vector in queries:
+        scores = np.asarray(base.vectors) @ query_vector
+        truth.append({base.ids[i] for i in top_k_indices(scores, args.k)})
+    float_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    float_bytes = 4 * base.dimension
+    print(f"\n{'storage':<22}{'bytes/vector':>14}{'total MB':>10}{f'recall@{args.k}':>11}{'ms/query':>10}")
+    print(f"{'float32 (exact)':<22}{float_bytes:>14}{float_bytes * len(base) / 1e6:>10.1f}{1.0:>11.3f}{float_ms:>10.2f}")
+
+    for kind in QUANTIZATION_KINDS:
+        quantized = QuantizedIndex.build(base, kind=kind)
+        size_mb = quantized.bytes_per_vector * len(base) / 1e6
+        for label, rerank in ((f"{kind}", args.k), (f"{kind} + rerank {args.rerank}", args.rerank)):
+            recall, latency = evaluate(quantized, queries, truth, args.k, rerank=rerank)
+            print(f"{label:<22}{quantized.bytes_per_vector:>14}{size_mb:>10.1f}{recall:>11.3f}{latency:>10.2f}")
+
+    print("\nRe-ranking reads only the candidate rows of the float32 memory map,")
+    print("so the resident set is the quantized codes plus those rows.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Page-load benchmark for the Playwright scrapers: full loads vs lightweight sessions.
+
+Loads the same product pages twice, each time in a fresh browser:
+1. full  - everything loaded, goto() waits for the load event (the old scrapers)
+2. light - scraper.browser_session: images, media, fonts and trackers blocked,
+           then a wait for the selector the scraper reads
+
+Reports per-page load time (p50/p95), requests, blocked requests and
+bytes received for each mode. The HTTP cache is bypassed so both modes
+hit the network.
+
+Run: python3 benchmarks/scraper_page_load.py --pages 20
+     python3 benchmarks/scraper_page_load.py --selector "a[aria-label*='reviews']"
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.browser_session import NAVIGATION_TIMEOUT_MS, TransferStats, browser_session, goto
+from scraper.rare_beauty_product_details import DETAIL_SELECTOR, INPUT_CSV
+
+
+def load_pages(urls, mode, selector):
+    stats = TransferStats()
+    seconds = []
+    with browser_session(block=mode == "light", stats=stats, cache=False) as context:
+        page = context.new_page()
+        for url in urls:
+            start = time.perf_counter()
+            try:
+                if mode == "full":
+                    page.goto(url, timeout=NAVIGATION_TIMEOUT_MS, wait_until="load")
+                else:
+                    goto(page, url, selector)
+            except Exception as e:
+                print(f"⚠️ {mode}: could not load {url}: {e}")
+                continue
+            seconds.append(time.perf_counter() - start)
+    return seconds, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--urls-csv", default=INPUT_CSV, help="CSV with a product_url column")
+    parser.add_argument("--pages", type=int, default=20, help="Product pages to load per mode")
+    parser.add_argument("--selector", default=DETAIL_SELECTOR, help="Selector the light mode waits for")
+    args = parser.parse_args()
+
+    urls = [u for u in pd.read_csv(args.urls_csv)["product_url"] if isinstance(u, str) and u.startswith("http")]
+    urls = list(dict.fromkeys(urls))[:args.pages]
+    print(f"📦 {len(urls)} product pages from {args.urls_csv}")
+
+    print(f"\n{'mode':<7}{'p50 s':>8}{'p95 s':>8}{'requests':>10}{'blocked':>9}{'MB':>8}{'KB/page':>9}")
+    for mode in ("full", "light"):
+        seconds, stats = load_pages(urls, mode, args.selector)
+        if not seconds:
+            print(f"{mode:<7} no pages loaded")
+            continue
+        p50, p95 = np.percentile(seconds, [50, 95])
+        print(f"{mode:<7}{p50:>8.2f}{p95:>8.2f}{stats.requests:>10}{stats.blocked:>9}"
+              f"{stats.bytes / 1e6:>8.1f}{stats.bytes / 1e3 / len(seconds):>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Offline search quality and latency benchmark.
+
+Runs a versioned set of labelled queries (benchmarks/queries/) through
+the real search path (build_filter -> query_products -> index.query).
+It also runs "<product> <shade>" lookups sampled from the catalog.
+Everything runs offline: documents and queries are embedded with a
+local embedding provider (hashing by default, or tfidf fitted on the
+catalog), and the index is built in memory, so the run needs no API keys
+and gives the same numbers on every machine.
+
+Reports recall@k and MRR of the expected product handles, plus
+p50/p95/p99 latency per stage (embed, index, dedupe, total). Save a
+baseline and check later runs against it to catch regressions before
+deploy:
+
+Run: python3 benchmarks/search_benchmark.py --save-baseline benchmarks/baseline.json
+     python3 benchmarks/search_benchmark.py --baseline benchmarks/baseline.json
+     python3 benchmarks/search_benchmark.py --synthetic 50000 --backend ivf
+     python3 benchmarks/search_benchmark.py --provider tfidf --dimension 256
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import synthetic_catalog
+from pipelines.embedding_text import build_embedding_texts, build_metadata
+from semantic_search.embedding_providers import get_embedding_provider
+from semantic_search.search import (
+    HybridIndex, IVFIndex, LexicalIndex, LocalIndex, QuantizedIndex,
+    ProductOverfetch, build_filter, query_products
+)
+
+MASTER_CSV = "data/rare_beauty_master.csv"
+QUERIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries", "search_queries_v1.json")
+BACKENDS = ["local", "ivf", "quantized", "hybrid"]
+LOCAL_PROVIDERS = ["hashing", "tfidf"]
+STAGES = ["embed", "index", "dedupe", "total"]
+
+# Regression thresholds for --baseline
+MAX_QUALITY_DROP = 0.02  # Absolute drop in recall@k / MRR
+MAX_LATENCY_GROWTH = 0.5  # Relative growth of p95 total latency
+
+
+class TimedIndex:
+    """Wraps an index to time its query() calls separately from the caller."""
+
+    def __init__(self, index):
+        self.index = index
+        self.seconds = 0.0
+
+    def query(self, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.index.query(**kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+
+
+def canonical_handle(handle, synthetic=False):
+    """Compare handles accent-insensitively; synthetic catalogs add a '-<n>' suffix."""
+    handle = unicodedata.normalize("NFKD", str(handle)).encode("ascii", "ignore").decode()
+    if synthetic:
+        handle = re.sub(r"-\d+$", "", handle)
+    return handle
+
+
+def load_queries(path, df, n_lookups, seed=0):
+    """Labelled queries from the versioned file plus sampled shade lookups."""
+    with open(path, 'r') as f:
+        spec = json.load(f)
+    queries = list(spec["queries"])
+
+    rng = np.random.default_rng(seed)
+    named = df.dropna(subset=['product_name', 'variant_title', 'handle'])
+    named = named[named['variant_title'] != "Default Title"]
+    for i in rng.choice(len(named), size=min(n_lookups, len(named)), replace=False):
+        row = named.iloc[i]
+        queries.append({
+            "id": f"shade-{row['variant_id']}",
+            "kind": "shade",
+            "query": f"{row['product_name']} {row['variant_title']}",
+            "expected_handles": [row['handle']],
+        })
+    return spec["version"], queries
+
+
+def build_index(backend, df, provider):
+    ids = ("variant_" + df['variant_id'].astype(str)).tolist()
+    metadata = build_metadata(df)
+    texts = build_embedding_texts(df)
+    if hasattr(provider, "fit"):
+        provider.fit(texts)
+    vectors = provider.embed(texts)
+    base = LocalIndex(ids, vectors, metadata, {"dimension": provider.dimension, "provider": provider.identity})
+    if backend == "ivf":
+        return IVFIndex.build(base)
+    if backend == "quantized":
+        return QuantizedIndex.build(base)
+    if backend == "hybrid":
+        return HybridIndex(base, LexicalIndex.build_from_frame(df, ids, metadata))
+    return base
+
+
+def percentiles(samples):
+    ms = np.asarray(samples) * 1000
+    return {f"p{p}": float(np.percentile(ms, p)) for p in (50, 95, 99)}
+
+
+def index_metadata(index):
+    """Metadata of every document, whichever index type wraps the base."""
+    for attr in ("vector_index", "base"):
+        if hasattr(index, attr):
+            return index_metadata(getattr(index, attr))
+    return index.metadata
+
+
+def run(index, provider, queries, k, synthetic, repeat):
+    overfetch = ProductOverfetch()
+    timed = TimedIndex(index)
+    timings = {stage: [] for stage in STAGES}
+    per_kind = {}
+    skipped = 0
+
+    catalog_handles = {canonical_handle(m["handle"], synthetic) for m in index_metadata(index) if m.get("handle")}
+    for spec in queries:
+        expected = {canonical_handle(h, synthetic) for h in spec["expected_handles"]}
+        if not expected & catalog_handles:
+            skipped += 1  # Labelled products missing from this catalog
+            continue
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            vector = provider.embed_query(spec["query"])
+            embedded = time.perf_counter()
+            timed.seconds = 0.0
+            metadata_filter = build_filter(**spec.get("filters", {}))
+            extra = {"query_text": spec["query"]} if isinstance(index, HybridIndex) else {}
+            matches = query_products(timed, vector, top_k=k, metadata_filter=metadata_filter,
+                                     overfetch=overfetch, **extra)
+            done = time.perf_counter()
+
+            timings["embed"].append(embedded - start)
+            timings["index"].append(timed.seconds)
+            timings["dedupe"].append(done - embedded - timed.seconds)
+            timings["total"].append(done - start)
+
+        handles = [canonical_handle((m.get("metadata") or {}).get("handle"), synthetic) for m in matches]
+        hits = [rank for rank, handle in enumerate(handles, start=1) if handle in expected]
+        kind = per_kind.setdefault(spec["kind"], {"recall": [], "rr": []})
+        kind["recall"].append(len(expected & set(handles)) / len(expected))
+        kind["rr"].append(1.0 / hits[0] if hits else 0.0)
+
+    recall = [r for kind in per_kind.values() for r in kind["recall"]]
+    rr = [r for kind in per_kind.values() for r in kind["rr"]]
+    return {
+        "queries": len(recall),
+        "skipped": skipped,
+        f"recall@{k}": float(np.mean(recall)) if recall else 0.0,
+        "mrr": float(np.mean(rr)) if rr else 0.0,
+        "by_kind": {
+            name: {f"recall@{k}": float(np.mean(v["recall"])), "mrr": float(np.mean(v["rr"])), "queries": len(v["rr"])}
+            for name, v in sorted(per_kind.items())
+        },
+        "latency_ms": {stage: percentiles(samples) for stage, samples in timings.items() if samples},
+    }
+
+
+def check_regressions(report, baseline, k):
+    problems = []
+    for metric in (f"recall@{k}", "mrr"):
+        if report[metric] < baseline[metric] - MAX_QUALITY_DROP:
+            problems.append(f"{metric} {baseline[metric]:.3f} -> {report[metric]:.3f}")
+    old_p95 = baseline["latency_ms"]["total"]["p95"]
+    new_p95 = report["latency_ms"]["total"]["p95"]
+    if new_p95 > old_p95 * (1 + MAX_LATENCY_GROWTH):
+        problems.append(f"p95 total latency {old_p95:.2f}ms -> {new_p95:.2f}ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--queries", default=QUERIES_FILE, help="Versioned labelled query file")
+    parser.add_argument("--master-csv", default=MASTER_CSV)
+    parser.add_argument("--synthetic", type=int, help="Use an N-row synthetic catalog instead of the master CSV")
+    parser.add_argument("--backend", choices=BACKENDS, default="local")
+    parser.add_argument("--provider", choices=LOCAL_PROVIDERS, default="hashing", help="Local embedding provider")
+    parser.add_argument("--dimension", type=int, default=512, help="Embedding dimension")
+    parser.add_argument("--lookups", type=int, default=50, help="Shade lookup queries sampled from the catalog")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--save-baseline", help="Write the report as a baseline JSON")
+    parser.add_argument("--baseline", help="Compare against a baseline JSON; exit 1 on regression")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        df = synthetic_catalog(args.synthetic, template_csv=None)
+        source = f"synthetic catalog ({args.synthetic} rows)"
+    else:
+        df = pd.read_csv(args.master_csv)
+        source = args.master_csv
+    df = df.drop_duplicates(subset='variant_id', keep='last').reset_index(drop=True)
+
+    provider = get_embedding_provider(args.provider, dimension=args.dimension)
+    version, queries = load_queries(args.queries, df, args.lookups)
+    print(f"📦 {source}: {len(df)} variants, backend={args.backend}, "
+          f"provider={args.provider}, query set v{version}")
+
+    start = time.perf_counter()
+    index = build_index(args.backend, df, provider)
+    print(f"   Index built in {time.perf_counter() - start:.1f}s")
+
+    report = run(index, provider, queries, args.k, bool(args.synthetic), args.repeat)
+    report.update({"query_set_version": version, "backend": args.backend, "provider": args.provider,
+                   "catalog": source})
+
+    print(f"\n🎯 Quality over {report['queries']} queries ({report['skipped']} skipped: products not in catalog)")
+    print(f"   recall@{args.k}: {report[f'recall@{args.k}']:.3f}   MRR: {report['mrr']:.3f}")
+    for name, metrics in report["by_kind"].items():
+        print(f"   {name:<10} recall@{args.k} {metrics[f'recall@{args.k}']:.3f}  "
+              f"MRR {metrics['mrr']:.3f}  ({metrics['queries']} queries)")
+
+    print(f"\n⏱️  Latency per stage (ms)")
+    print(f"   {'stage':<8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for stage, p in report["latency_ms"].items():
+        print(f"   {stage:<8}{p['p50']:>9.3f}{p['p95']:>9.3f}{p['p99']:>9.3f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        if baseline.get("query_set_version") != version:
+            print(f"\n⚠️  Baseline uses query set v{baseline.get('query_set_version')}, this run v{version}")
+        problems = check_regressions(report, baseline, args.k)
+        if problems:
+            print("\n❌ Regressions against baseline:")
+            for problem in problems:
+                print(f"   - {problem}")
+            sys.exit(1)
+        print("\n✅ No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Synthetic Rare Beauty catalogs for benchmarks.
+
+Rows follow the data/rare_beauty_master.csv schema. When the master CSV
+exists its rows are used as templates (so text lengths and null patterns
+match the real catalog); otherwise a small built-in vocabulary is used.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+MASTER_CSV = "data/rare_beauty_master.csv"
+
+CATEGORIES = ["face", "lips", "eyes", "body", "tools"]
+PRODUCTS = [
+    ("Soft Pinch Liquid Blush", "face", "Weightless, long-lasting liquid blush that blends and builds beautifully for a soft, healthy flush."),
+    ("Liquid Touch Weightless Foundation", "face", "Medium coverage, breathable foundation with a natural matte finish that lasts all day."),
+    ("Positive Light Liquid Luminizer", "face", "Lightweight liquid highlighter for a dewy, lit-from-within glow."),
+    ("Lip Soufflé Matte Lip Cream", "lips", "Airy, whipped matte lip cream with vivid color in one swipe."),
+    ("Kind Words Matte Lipstick", "lips", "Comfortable matte lipstick with a creamy, non-drying formula."),
+    ("Perfect Strokes Universal Volumizing Mascara", "eyes", "Lengthening and volumizing mascara that lifts and separates."),
+    ("Warm Wishes Effortless Bronzer Stick", "face", "Creamy bronzer stick that blends seamlessly for a sun-kissed warmth."),
+    ("Find Comfort Hydrating Body Lotion", "body", "Lightweight body lotion with a calming, comforting scent."),
+    ("Liquid Touch Foundation Brush", "tools", "Dense, soft bristles for a seamless, streak-free application."),
+]
+SHADES = ["Hope", "Joy", "Grace", "Bliss", "Virtue", "Lucky", "Encourage", "Believe",
+          "110W", "150N", "210C", "250W", "300N", "350C", "410W", "480N", "Default Title"]
+INGREDIENTS = ("Water, Dimethicone, Glycerin, Butylene Glycol, Talc, Fragrance, "
+               "Phenoxyethanol, Tocopherol, Sodium Hyaluronate, Iron Oxides")
+FINISHES = ["dewy", "matte", "natural", "radiant", "satin"]
+
+
+def _builtin_catalog(n_rows, rng):
+    product_idx = rng.integers(0, len(PRODUCTS), n_rows)
+    shade_idx = rng.integers(0, len(SHADES), n_rows)
+    rows = []
+    for i in range(n_rows):
+        name, category, description = PRODUCTS[product_idx[i]]
+        handle = name.lower().replace(" ", "-") + f"-{i // 20}"
+        rows.append({
+            "category": category,
+            "product_name": name,
+            "handle": handle,
+            "variant_id": 40000000000000 + i,
+            "variant_title": SHADES[shade_idx[i]],
+            "variant_price": float(rng.choice([18.0, 20.0, 23.0, 25.0, 29.0, 32.0])),
+            "variant_available": bool(rng.random() < 0.9),
+            "variant_sku": f"RB{i:08d}",
+            "variant_image": f"//www.rarebeauty.com/cdn/shop/files/{handle}.jpg",
+            "description": description if rng.random() < 0.95 else np.nan,
+            "ingredients": INGREDIENTS if rng.random() < 0.8 else np.nan,
+            "finish": rng.choice(FINISHES) if rng.random() < 0.6 else np.nan,
+            "product_url": f"https://www.rarebeauty.com/products/{handle}",
+        })
+    return pd.DataFrame(rows)
+
+
+def synthetic_catalog(n_rows, seed=0, template_csv=MASTER_CSV):
+    """
+    A master-CSV-shaped DataFrame with n_rows rows and unique variant ids.
+    Handles repeat every ~20 rows so products keep several variants.
+    """
+    rng = np.random.default_rng(seed)
+    if not template_csv or not os.path.exists(template_csv):
+        return _builtin_catalog(n_rows, rng)
+
+    template = pd.read_csv(template_csv)
+    df = template.iloc[rng.integers(0, len(template), n_rows)].reset_index(drop=True)
+    df["variant_id"] = 40000000000000 + np.arange(n_rows)
+    if "handle" in df.columns:
+        df["handle"] = df["handle"].astype(str) + "-" + (np.arange(n_rows) // 20).astype(str)
+    return df
@@ -1,6 +1,17 @@
+import os
+import sys
+
 import streamlit as st
-from pinecone import Pinecone
-from openai import OpenAI
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_search.search import (
+    HybridIndex, IVFIndex, LexicalIndex, LocalIndex, QuantizedIndex, LOCAL_INDEX_DIR, IVF_NPROBE, IVF_SUBDIR,
+    LEXICAL_SUBDIR, QUANTIZED_SUBDIR, QUANTIZED_RERANK, EMBEDDING_DIMENSION, base_index, build_filter,
+    query_products
+)
+from semantic_search.embedding_providers import EMBEDDING_PROVIDER, get_embedding_provider, provider_for_index
 
 # CONFIG
 st.set_page_config(
@@ -8,18 +19,68 @@ st.set_page_config(
     layout="wide"
 )
 
-# Pinecone
-PINECONE_API_KEY = st.secrets["PINECONE_API_KEY"]
-PINECONE_ENVIRONMENT = st.secrets["PINECONE_ENVIRONMENT"]
-INDEX_NAME = st.secrets["INDEX_NAME"]
+# "pinecone" (remote), "local" (exact in-process index written by ingest_to_pinecone.py)
+# "ivf" (approximate in-process index, see semantic_search/search.py build-ivf)
+# or "quantized" (int8/float16 codes + exact re-rank, see build-quantized)
+SEARCH_BACKEND = st.secrets.get("SEARCH_BACKEND", "pinecone")
+# Set LEXICAL_WEIGHT (0..1) to fuse BM25 keyword matches into local/ivf results
+LEXICAL_WEIGHT = st.secrets.get("LEXICAL_WEIGHT")
+
+# Only needed when queries are embedded by OpenAI (see EMBEDDING_PROVIDER)
+OPENAI_API_KEY = st.secrets.get("OPENAI_API_KEY")
+
+
+@st.cache_resource
+def load_index():
+    if SEARCH_BACKEND in ("local", "ivf", "quantized"):
+        local_index_dir = st.secrets.get("LOCAL_INDEX_DIR", LOCAL_INDEX_DIR)
+        vector_index = LocalIndex.load(local_index_dir)
+        if SEARCH_BACKEND == "ivf":
+            vector_index = IVFIndex.load(
+                os.path.join(local_index_dir, IVF_SUBDIR),
+                base=vector_index,
+                nprobe=int(st.secrets.get("IVF_NPROBE", IVF_NPROBE))
+            )
+        elif SEARCH_BACKEND == "quantized":
+            vector_index = QuantizedIndex.load(
+                os.path.join(local_index_dir, QUANTIZED_SUBDIR),
+                base=vector_index,
+                rerank=int(st.secrets.get("QUANTIZED_RERANK", QUANTIZED_RERANK))
+            )
+        lexical_dir = os.path.join(local_index_dir, LEXICAL_SUBDIR)
+        if LEXICAL_WEIGHT is not None and os.path.isdir(lexical_dir):
+            return HybridIndex(vector_index, LexicalIndex.load(lexical_dir), float(LEXICAL_WEIGHT))
+        return vector_index
+
+    from pinecone import Pinecone
+    pc = Pinecone(api_key=st.secrets["PINECONE_API_KEY"])
+    return pc.Index(st.secrets["INDEX_NAME"])
+
+
+@st.cache_resource
+def load_provider(_index):
+    """
+    Query embedder. Local indexes record the provider that built them (a
+    mismatch is refused); Pinecone uses the ingestion settings from secrets.
+    """
+    client = None
+    if OPENAI_API_KEY:
+        from openai import OpenAI
+        client = OpenAI(api_key=OPENAI_API_KEY)
+    if SEARCH_BACKEND == "pinecone":
+        return get_embedding_provider(
+            st.secrets.get("EMBEDDING_PROVIDER", EMBEDDING_PROVIDER),
+            dimension=int(st.secrets.get("EMBEDDING_DIMENSION", EMBEDDING_DIMENSION)),
+            path=st.secrets.get("EMBEDDING_PROVIDER_DIR"),
+            client=client
+        )
+    base = base_index(_index)
+    return provider_for_index(base.info, base.path, client=client)
 
-OPENAI_API_KEY = st.secrets["OPENAI_API_KEY"]
 
 # Initialize
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(INDEX_NAME)
-
-client = OpenAI(api_key=OPENAI_API_KEY)
+index = load_index()
+provider = load_provider(index)
 
 st.title("Rare Beauty Recommender")
 
@@ -47,6 +108,14 @@ price_range = st.sidebar.slider("Select price range ($)", 0, 100, (0, 50))
 
 min_rating = st.sidebar.slider("Minimum rating", 0.0, 5.0, 3.0)
 
+available_only = st.sidebar.checkbox("In stock only", value=False)
+
+# Ingredient names or families (fragrance, silicone, paraben), comma-separated
+exclude_ingredients = st.sidebar.text_input("Exclude ingredients", "", placeholder="fragrance, silicone")
+include_ingredients = st.sidebar.text_input("Must contain ingredients", "")
+
+RESULTS_PER_PAGE = 20
+
 # ============ PRELOADED MAKEUP LOOKS ==============
 
 st.sidebar.markdown("**💄 Try a pre-loaded makeup look:**")
@@ -113,27 +182,16 @@ st.markdown("""
 if search_button and query.strip():
     st.session_state.conversation.append(query)
 
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=query
-    )
-    query_vector = response.data[0].embedding
+    query_vector = provider.embed_query(query)
 
-    pinecone_filter = {}
-    if category_filter:
-        pinecone_filter["category"] = {"$in": category_filter}
-
-    results = index.query(
-        vector=query_vector,
-        top_k=30,
-        include_metadata=True,
-        filter=pinecone_filter
-    )
+    # Category, price, rating, stock and ingredients are filtered by the index itself
+    metadata_filter = build_filter(category_filter, price_range, min_rating, available_only,
+                                   include_ingredients, exclude_ingredients)
+    matches = query_products(index, query_vector, top_k=RESULTS_PER_PAGE, metadata_filter=metadata_filter,
+                             query_text=query if isinstance(index, HybridIndex) else None)
 
     st.write(f"### 🔎 Results for **{query}**")
 
-    matches = results.get("matches", [])
-
     if not matches:
         st.info("No products found.")
     else:
@@ -146,13 +204,8 @@ if search_button and query.strip():
             rating = metadata.get("rating", 0.0)
             review_count = metadata.get("review_count", 0)
             description = metadata.get("description", "No description available")
-            variant = metadata.get("variant_title_product", "Default")
-            image_url = metadata.get("image_url", "")
-
-            if price < price_range[0] or price > price_range[1]:
-                continue
-            if rating < min_rating:
-                continue
+            variant = metadata.get("variant_title", "Default")
+            image_url = metadata.get("variant_image", "")
 
             if image_url.startswith("//"):
                 image_url = "https:" + image_url
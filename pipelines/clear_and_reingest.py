@@ -1,5 +1,8 @@
 """
 Clear Pinecone index and re-ingest all products fresh
+
+Search is empty while this runs. For routine refreshes prefer:
+    python3 pipelines/ingest_to_pinecone.py --delta
 """
 import os
 import sys
@@ -31,6 +34,11 @@ index.delete(delete_all=True)
 
 print("✅ All vectors deleted!")
 
+# The manifest describes what is in the index, which is now nothing
+MANIFEST_FILE = "data/ingestion_manifest.json"
+if os.path.exists(MANIFEST_FILE):
+    os.remove(MANIFEST_FILE)
+
 # Verify
 import time
 time.sleep(3)  # Wait for deletion to propagate
@@ -39,6 +47,7 @@ print(f"\n📊 After deletion:")
 print(f"   Total vectors: {stats.total_vector_count}")
 
 print("\n✅ Index cleared! Now running ingestion...")
+print("   (unchanged products are served from the embedding cache, no API calls)")
 print("=" * 60)
 
 # Now run the ingestion
@@ -0,0 +1,92 @@
+"""
+Persistent embedding cache for the ingestion pipeline.
+
+Embeddings are stored in SQLite keyed by a hash of (model, dimension,
+embedding text), so re-ingesting an unchanged catalog makes no API calls.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+EMBEDDING_CACHE_FILE = os.getenv("EMBEDDING_CACHE_FILE", "data/embedding_cache.sqlite")
+
+
+def embedding_key(model, dimension, text):
+    """Content hash identifying one embedding."""
+    digest = hashlib.sha256()
+    digest.update(f"{model}\0{dimension}\0".encode("utf-8"))
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    SQLite-backed store of float32 embeddings.
+    Safe to share between threads (one connection guarded by a lock).
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_FILE, model=None, dimension=None):
+        self.path = path
+        self.model = model
+        self.dimension = dimension
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " dimension INTEGER NOT NULL,"
+            " vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def key(self, text):
+        return embedding_key(self.model, self.dimension, text)
+
+    def get_many(self, texts):
+        """Return a list aligned with texts: the cached vector or None."""
+        keys = [self.key(text) for text in texts]
+        found = {}
+        with self._lock:
+            # SQLite limits the number of bound parameters per statement
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            results = [found.get(key) for key in keys]
+            hits = sum(1 for r in results if r is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def put_many(self, texts, vectors):
+        rows = [
+            (self.key(text), self.model, len(vector), np.asarray(vector, dtype=np.float32).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dimension, vector) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
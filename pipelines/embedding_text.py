@@ -0,0 +1,256 @@
+"""
+Embedding text and metadata construction for the ingestion pipeline.
+
+create_embedding_text() / prepare_metadata() describe one row.
+build_embedding_texts() / build_metadata() produce exactly the same output
+for a whole DataFrame using column operations, which is what the pipeline
+uses: the frame is prepared once before batching.
+
+For product-level embedding reuse the same builder produces the shared
+product text (everything but the shade) and a short shade text per row.
+
+The free-text ingredient list is also normalized into ingredient_tags
+(one entry per ingredient plus family tags like "silicone") so the index
+can include/exclude ingredients.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# (column, label, character limit, skip the literal string 'nan')
+EMBEDDING_TEXT_FIELDS = [
+    ('product_name', "Product", None, False),
+    ('variant_title', "Shade/Variant", None, True),
+    ('category', "Category", None, False),
+    ('description', "Description", 1000, False),
+    ('ingredients', "Ingredients", 500, False),
+    ('finish', "Finish", None, True),
+]
+
+# Shared by every variant of a product: embedded once per handle
+PRODUCT_TEXT_FIELDS = [f for f in EMBEDDING_TEXT_FIELDS if f[0] != 'variant_title']
+# What differs between variants: embedded separately and composed in
+VARIANT_TEXT_FIELDS = [f for f in EMBEDDING_TEXT_FIELDS if f[0] == 'variant_title']
+DEFAULT_VARIANT_TITLE = "Default Title"  # Shopify's title for single-variant products
+
+METADATA_STRING_FIELDS = ['product_name', 'category', 'variant_title', 'variant_sku',
+                          'handle', 'variant_image', 'product_url', 'description',
+                          'ingredients', 'finish']
+METADATA_TEXT_LIMIT = 40000  # Pinecone metadata limit is 40KB
+# Scraped as text ("4.8", "N/A"); stored as numbers so the index can range-filter them
+METADATA_REVIEW_FIELDS = [('rating', float), ('review_count', int)]
+
+# Ingredient families, matched against normalized ingredient names
+INGREDIENT_GROUPS = {
+    'fragrance': re.compile(r"^(fragrance|parfum|aroma|flavor)\b"),
+    'silicone': re.compile(r"(siloxane|silicone|methicone|silane|siloxysilicate|silsesquioxane)"),
+    'paraben': re.compile(r"paraben"),
+}
+INGREDIENT_SEPARATORS = re.compile(r"\[?\+/-\]?|[,;/•\n]|\bmay contain\b", re.IGNORECASE)
+MAX_INGREDIENT_NAME = 60  # Longer fragments are prose, not ingredient names
+
+# ============ INGREDIENTS ============
+
+def normalize_ingredient_name(name):
+    """Canonical form of one ingredient name: 'Iron Oxides.' -> 'iron oxides'."""
+    name = re.sub(r"[*.\[\]:]", " ", str(name).lower())
+    return " ".join(name.split())
+
+
+def ingredient_tags(text):
+    """
+    Normalized ingredient names from a scraped ingredient list, followed by
+    the family tags they belong to. Returns [] for missing lists.
+    """
+    if text is None or (isinstance(text, float) and np.isnan(text)) or str(text).strip() in ('', 'N/A', 'nan'):
+        return []
+    text = re.sub(r"^\s*ingredients\s*:?", "", str(text), flags=re.IGNORECASE)
+    text = re.sub(r"\([^)]*\)", " ", text)  # CI numbers and notes contain commas
+
+    tags = []
+    for part in INGREDIENT_SEPARATORS.split(text):
+        name = normalize_ingredient_name(part)
+        if name and len(name) <= MAX_INGREDIENT_NAME and name not in tags:
+            tags.append(name)
+    groups = [group for group, pattern in INGREDIENT_GROUPS.items()
+              if any(pattern.search(name) for name in tags)]
+    return tags + [group for group in groups if group not in tags]
+
+# ============ ROW-WISE ============
+
+def create_embedding_text(row):
+    """
+    Creates rich text for embedding from product data.
+    Combines multiple fields to create semantic-rich context.
+    """
+    parts = []
+
+    # Product name and variant
+    if pd.notna(row.get('product_name')):
+        parts.append(f"Product: {row['product_name']}")
+    if pd.notna(row.get('variant_title')) and str(row['variant_title']) != 'nan':
+        parts.append(f"Shade/Variant: {row['variant_title']}")
+
+    # Category
+    if pd.notna(row.get('category')):
+        parts.append(f"Category: {row['category']}")
+
+    # Description (most important for semantic search)
+    if pd.notna(row.get('description')):
+        desc = str(row['description'])[:1000]  # Limit to 1000 chars
+        parts.append(f"Description: {desc}")
+
+    # Ingredients
+    if pd.notna(row.get('ingredients')):
+        ingredients = str(row['ingredients'])[:500]  # Limit ingredients
+        parts.append(f"Ingredients: {ingredients}")
+
+    # Finish/claims
+    if pd.notna(row.get('finish')) and str(row['finish']) != 'nan':
+        parts.append(f"Finish: {row['finish']}")
+
+    return " | ".join(parts)
+
+
+
+def prepare_metadata(row):
+    """
+    Prepare metadata for Pinecone upload.
+    Only include serializable types and non-null values.
+    """
+    metadata = {}
+
+    # String fields
+    for field in ['product_name', 'category', 'variant_title', 'variant_sku',
+                  'handle', 'variant_image', 'product_url', 'description',
+                  'ingredients', 'finish']:
+        value = row.get(field)
+        if pd.notna(value) and str(value) != 'nan':
+            # Limit text fields to 40KB (Pinecone limit)
+            metadata[field] = str(value)[:40000]
+
+    # Numeric fields
+    if pd.notna(row.get('variant_price')):
+        metadata['price'] = float(row['variant_price'])
+
+    # Boolean fields
+    if pd.notna(row.get('variant_available')):
+        metadata['available'] = bool(row['variant_available'])
+
+    # Review fields
+    for field, cast in METADATA_REVIEW_FIELDS:
+        value = pd.to_numeric(row.get(field), errors='coerce')
+        if pd.notna(value):
+            metadata[field] = cast(value)
+
+    # Ingredient tags
+    tags = ingredient_tags(row.get('ingredients'))
+    if tags:
+        metadata['ingredient_tags'] = tags
+
+    # ID fields
+    if pd.notna(row.get('variant_id')):
+        metadata['variant_id'] = str(row['variant_id'])
+
+    return metadata
+
+
+# ============ COLUMNAR ============
+
+def _present(df, column, skip_nan_string=False):
+    """
+    (mask, strings) for a column: mask marks rows where the row-wise code
+    would include the field, strings holds str(value) for those rows.
+    """
+    values = df[column]
+    mask = values.notna().to_numpy()
+    strings = values[mask].astype(str)
+    if skip_nan_string:
+        keep = (strings != 'nan').to_numpy()
+        full_mask = mask.copy()
+        full_mask[mask] = keep
+        return full_mask, strings[keep]
+    return mask, strings
+
+
+def build_embedding_texts(df, fields=EMBEDDING_TEXT_FIELDS):
+    """Embedding text for every row of df; identical to create_embedding_text()."""
+    texts = np.full(len(df), "", dtype=object)
+    for column, label, limit, skip_nan_string in fields:
+        if column not in df.columns:
+            continue
+        mask, strings = _present(df, column, skip_nan_string)
+        if limit is not None:
+            strings = strings.str.slice(0, limit)
+        parts = (label + ": " + strings).to_numpy(dtype=object)
+
+        previous = texts[mask]
+        texts[mask] = np.where(previous != "", previous + " | " + parts, parts)
+    return texts.tolist()
+
+
+def build_variant_texts(df):
+    """
+    Shade text per row ("Shade/Variant: Joy"), or None when the variant
+    adds nothing beyond the product (no title or Shopify's default title).
+    """
+    texts = build_embedding_texts(df, VARIANT_TEXT_FIELDS)
+    if 'variant_title' in df.columns:
+        default = (df['variant_title'].astype(str) == DEFAULT_VARIANT_TITLE).to_numpy()
+    else:
+        default = np.zeros(len(df), dtype=bool)
+    return [None if (text == "" or is_default) else text for text, is_default in zip(texts, default)]
+
+
+def build_metadata(df):
+    """Pinecone metadata for every row of df; identical to prepare_metadata()."""
+    n = len(df)
+    columns = []
+
+    def add(key, mask, values):
+        column = np.full(n, None, dtype=object)
+        column[mask] = values
+        columns.append((key, column))
+
+    for field in METADATA_STRING_FIELDS:
+        if field in df.columns:
+            mask, strings = _present(df, field, skip_nan_string=True)
+            add(field, mask, strings.str.slice(0, METADATA_TEXT_LIMIT).to_numpy(dtype=object))
+
+    if 'variant_price' in df.columns:
+        values = df['variant_price']
+        mask = values.notna().to_numpy()
+        add('price', mask, values[mask].astype(float).to_numpy(dtype=object))
+
+    if 'variant_available' in df.columns:
+        values = df['variant_available']
+        mask = values.notna().to_numpy()
+        add('available', mask, np.array([bool(v) for v in values[mask]], dtype=object))
+
+    for field, cast in METADATA_REVIEW_FIELDS:
+        if field in df.columns:
+            values = pd.to_numeric(df[field], errors='coerce')
+            mask = values.notna().to_numpy()
+            add(field, mask, np.array([cast(v) for v in values[mask]], dtype=object))
+
+    if 'ingredients' in df.columns:
+        # Parsed once per distinct list; variants of a product share one
+        parsed = {}
+        tags = [parsed.setdefault(text, ingredient_tags(text)) if isinstance(text, str) else ingredient_tags(text)
+                for text in df['ingredients']]
+        mask = np.array([bool(t) for t in tags], dtype=bool)
+        values = np.empty(int(mask.sum()), dtype=object)
+        values[:] = [t for t in tags if t]
+        add('ingredient_tags', mask, values)
+
+    if 'variant_id' in df.columns:
+        mask, strings = _present(df, 'variant_id')
+        add('variant_id', mask, strings.to_numpy(dtype=object))
+
+    keys = [key for key, _ in columns]
+    return [
+        {key: value for key, value in zip(keys, row) if value is not None}
+        for row in zip(*(column for _, column in columns))
+    ] if columns else [{} for _ in range(n)]
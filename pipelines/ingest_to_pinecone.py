@@ -3,19 +3,48 @@ Robust Pinecone Ingestion Pipeline for Rare Beauty Products
 
 This script:
 1. Loads the master product dataset
-2. Generates embeddings using OpenAI
+2. Generates embeddings using OpenAI (cached on disk by content hash)
 3. Uploads vectors to Pinecone with metadata
-4. Handles errors and supports resuming
+4. Mirrors the vectors into a local index for in-process search
+5. Handles errors and supports resuming
+6. Optionally embeds shared product text once per handle and composes
+   variant vectors from it (EMBEDDING_STRATEGY=product)
+7. Supports delta runs (--delta) that only upsert new/changed variants and
+   delete variants that disappeared, based on an ingestion manifest
+8. Optionally skips Pinecone and writes only the local index
+   (INGEST_LOCAL_ONLY=true), so a local provider ingests without network
 """
 
 import pandas as pd
+import numpy as np
+import argparse
+import hashlib
 import os
+import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 from openai import OpenAI
 from pinecone import Pinecone, ServerlessSpec
 import json
 
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_search.search import (
+    LexicalIndex, LocalIndexWriter, compact_local_index, LOCAL_INDEX_DIR, LEXICAL_SUBDIR
+)
+from semantic_search.embedding_providers import EMBEDDING_PROVIDER, PROVIDER_SUBDIR, get_embedding_provider
+from pipelines.embedding_cache import EmbeddingCache, EMBEDDING_CACHE_FILE
+from pipelines.embedding_text import (
+    build_embedding_texts, build_metadata, build_variant_texts, PRODUCT_TEXT_FIELDS
+)
+from pipelines.staged_pipeline import StagedPipeline, PipelineError, CheckpointTracker
+from pipelines.rate_limiter import get_rate_limiter
+from pipelines.token_budget import (
+    TokenEstimator, pack_batches, pack_text_batches, MAX_REQUEST_TOKENS, MAX_REQUEST_INPUTS
+)
+
 # ============ CONFIGURATION ============
 
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
@@ -23,110 +52,158 @@ PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 INDEX_NAME = os.getenv("INDEX_NAME", "rare-beauty-products")
 
 EMBEDDING_MODEL = "text-embedding-3-small"
-EMBEDDING_DIMENSION = 1536
-BATCH_SIZE = 100  # Process 100 products at a time
+# text-embedding-3-small returns shortened vectors on request; the Pinecone
+# index, local index and every query path must use the same value
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
 UPSERT_BATCH_SIZE = 100  # Upload 100 vectors at a time
 
+# Write only the local index: no Pinecone key, index or network needed
+LOCAL_ONLY = os.getenv("INGEST_LOCAL_ONLY", "false").lower() == "true"
+
+# "variant": embed each variant's full text
+# "product": embed the shared product text once per handle plus a short shade
+#            text, and compose variant vectors as a weighted sum of the two
+EMBEDDING_STRATEGY = os.getenv("EMBEDDING_STRATEGY", "variant")
+VARIANT_TEXT_WEIGHT = float(os.getenv("VARIANT_TEXT_WEIGHT", "0.35"))
+
+# Concurrency: batch N+1 is embedded while batch N is upserting
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))  # Embedding requests in flight
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "4"))  # Upsert requests in flight
+STAGE_QUEUE_SIZE = int(os.getenv("STAGE_QUEUE_SIZE", "4"))  # Batches buffered between stages
+
 # Data file
 MASTER_CSV = "data/rare_beauty_master.csv"
 CHECKPOINT_FILE = "data/ingestion_checkpoint.json"
+MANIFEST_FILE = "data/ingestion_manifest.json"  # variant_id -> what it was last ingested with
+DELETE_BATCH_SIZE = 1000  # Pinecone limit for delete by ids
 
 # ============ INITIALIZE CLIENTS ============
 
-if not OPENAI_API_KEY:
+if EMBEDDING_PROVIDER == "openai" and not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY environment variable not set")
-if not PINECONE_API_KEY:
-    raise ValueError("PINECONE_API_KEY environment variable not set")
+if not LOCAL_ONLY and not PINECONE_API_KEY:
+    raise ValueError("PINECONE_API_KEY environment variable not set (or set INGEST_LOCAL_ONLY=true)")
 
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-pc = Pinecone(api_key=PINECONE_API_KEY)
+openai_client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+pc = Pinecone(api_key=PINECONE_API_KEY) if not LOCAL_ONLY else None
 
-# ============ HELPER FUNCTIONS ============
+openai_limiter = get_rate_limiter("openai")
+pinecone_limiter = get_rate_limiter("pinecone")
+# Shared by every upsert worker, so at most UPSERT_CONCURRENCY upserts are in flight
+upsert_pool = ThreadPoolExecutor(max_workers=UPSERT_CONCURRENCY, thread_name_prefix="upsert")
 
-def create_embedding_text(row):
-    """
-    Creates rich text for embedding from product data.
-    Combines multiple fields to create semantic-rich context.
-    """
-    parts = []
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_FILE, model=EMBEDDING_MODEL, dimension=EMBEDDING_DIMENSION)
+token_estimator = TokenEstimator()
 
-    # Product name and variant
-    if pd.notna(row.get('product_name')):
-        parts.append(f"Product: {row['product_name']}")
-    if pd.notna(row.get('variant_title')) and str(row['variant_title']) != 'nan':
-        parts.append(f"Shade/Variant: {row['variant_title']}")
+# "openai" goes through the rate limiter and cache below; local providers
+# ("hashing", "tfidf") embed in-process. A fitted tfidf model is loaded from
+# the local index so --delta runs embed with the same model.
+PROVIDER_STATE_DIR = os.path.join(LOCAL_INDEX_DIR, PROVIDER_SUBDIR)
+embedding_provider = get_embedding_provider(
+    EMBEDDING_PROVIDER, dimension=EMBEDDING_DIMENSION, model=EMBEDDING_MODEL, path=PROVIDER_STATE_DIR
+)
 
-    # Category
-    if pd.notna(row.get('category')):
-        parts.append(f"Category: {row['category']}")
+# ============ HELPER FUNCTIONS ============
 
-    # Description (most important for semantic search)
-    if pd.notna(row.get('description')):
-        desc = str(row['description'])[:1000]  # Limit to 1000 chars
-        parts.append(f"Description: {desc}")
+def generate_embeddings_batch(texts, max_retries=5):
+    """
+    Generate embeddings, serving unchanged texts from the on-disk cache.
+    Only cache misses are sent to the API; local providers embed directly.
+    Returns (embeddings, tokens sent to the API).
+    """
+    if not embedding_provider.remote:
+        return embedding_provider.embed(texts).tolist(), 0
 
-    # Ingredients
-    if pd.notna(row.get('ingredients')):
-        ingredients = str(row['ingredients'])[:500]  # Limit ingredients
-        parts.append(f"Ingredients: {ingredients}")
+    embeddings = embedding_cache.get_many(texts)
+    missing_texts = list(dict.fromkeys(t for t, e in zip(texts, embeddings) if e is None))
+    tokens_sent = 0
 
-    # Finish/claims
-    if pd.notna(row.get('finish')) and str(row['finish']) != 'nan':
-        parts.append(f"Finish: {row['finish']}")
+    if missing_texts:
+        new_embeddings, tokens_sent = request_embeddings(missing_texts, max_retries=max_retries)
+        embedding_cache.put_many(missing_texts, new_embeddings)
+        by_text = dict(zip(missing_texts, new_embeddings))
+        embeddings = [e if e is not None else by_text[t] for t, e in zip(texts, embeddings)]
 
-    return " | ".join(parts)
+    return embeddings, tokens_sent
 
 
-def generate_embeddings_batch(texts, max_retries=3):
+def request_embeddings(texts, max_retries=5):
     """
-    Generate embeddings with retry logic for rate limiting.
+    Call the embeddings API under the shared OpenAI rate limiter, which
+    paces requests/tokens per minute and retries 429s and transient errors.
+    Texts beyond one request's token/input limits are split across
+    several requests, and a text over the per-input limit is truncated.
+    Returns (embeddings, tokens billed).
     """
-    for attempt in range(max_retries):
-        try:
-            response = openai_client.embeddings.create(
-                model=EMBEDDING_MODEL,
-                input=texts
-            )
-            return [item.embedding for item in response.data]
-        except Exception as e:
-            if attempt < max_retries - 1:
-                wait_time = 2 ** attempt  # Exponential backoff
-                print(f"⚠️  Error generating embeddings (attempt {attempt + 1}): {e}")
-                print(f"   Retrying in {wait_time} seconds...")
-                time.sleep(wait_time)
-            else:
-                raise
-
-
-def prepare_metadata(row):
+    texts = [token_estimator.truncate(text) for text in texts]
+    chunks = pack_batches([token_estimator.count(text) for text in texts], exact=token_estimator.exact)
+    if len(chunks) > 1:
+        embeddings, tokens = [], 0
+        for chunk_start, chunk_end in chunks:
+            chunk_embeddings, chunk_tokens = request_embeddings(texts[chunk_start:chunk_end], max_retries)
+            embeddings.extend(chunk_embeddings)
+            tokens += chunk_tokens
+        return embeddings, tokens
+
+    estimated_tokens = sum(token_estimator.count(text) for text in texts)
+    raw_response = openai_limiter.call(
+        lambda: openai_client.embeddings.with_raw_response.create(
+            model=EMBEDDING_MODEL,
+            input=texts,
+            dimensions=EMBEDDING_DIMENSION
+        ),
+        tokens=estimated_tokens,
+        max_retries=max_retries
+    )
+    response = raw_response.parse()
+
+    usage = getattr(response, "usage", None)
+    tokens = getattr(usage, "total_tokens", None) or estimated_tokens
+    token_estimator.calibrate(texts, tokens)
+    return [item.embedding for item in response.data], tokens
+
+
+def compose_embedding(product_embedding, variant_embedding, variant_weight=VARIANT_TEXT_WEIGHT):
+    """Variant vector from shared product and shade vectors: weighted sum, renormalized."""
+    product_embedding = np.asarray(product_embedding, dtype=np.float32)
+    if variant_embedding is None:
+        return product_embedding.tolist()
+    combined = (1 - variant_weight) * product_embedding + variant_weight * np.asarray(variant_embedding, dtype=np.float32)
+    return (combined / np.linalg.norm(combined)).tolist()
+
+
+def generate_composed_embeddings(product_texts, variant_texts):
     """
-    Prepare metadata for Pinecone upload.
-    Only include serializable types and non-null values.
+    Embed each distinct product and shade text once, then compose one
+    vector per row. Returns (embeddings, tokens sent).
     """
-    metadata = {}
-
-    # String fields
-    for field in ['product_name', 'category', 'variant_title', 'variant_sku',
-                  'handle', 'variant_image', 'product_url', 'description',
-                  'ingredients', 'finish']:
-        value = row.get(field)
-        if pd.notna(value) and str(value) != 'nan':
-            # Limit text fields to 40KB (Pinecone limit)
-            metadata[field] = str(value)[:40000]
+    unique_texts = list(dict.fromkeys(list(product_texts) + [t for t in variant_texts if t is not None]))
+    embeddings, tokens_sent = generate_embeddings_batch(unique_texts)
+    by_text = dict(zip(unique_texts, embeddings))
+    composed = [
+        compose_embedding(by_text[product_text], by_text[variant_text] if variant_text is not None else None)
+        for product_text, variant_text in zip(product_texts, variant_texts)
+    ]
+    return composed, tokens_sent
 
-    # Numeric fields
-    if pd.notna(row.get('variant_price')):
-        metadata['price'] = float(row['variant_price'])
 
-    # Boolean fields
-    if pd.notna(row.get('variant_available')):
-        metadata['available'] = bool(row['variant_available'])
-
-    # ID fields
-    if pd.notna(row.get('variant_id')):
-        metadata['variant_id'] = str(row['variant_id'])
-
-    return metadata
+def plan_batches(texts, start=0, variant_texts=None):
+    """
+    Pack consecutive rows into embedding requests by token count, up to the
+    model's per-request token and input limits. A text repeated within a
+    batch (shared product text) is counted once in that batch; with the
+    product strategy a row sends up to two texts.
+    Returns [(start, end), ...] row ranges.
+    """
+    row_texts = [(text, variant_texts[i] if variant_texts else None) for i, text in enumerate(texts)]
+    return pack_text_batches(
+        row_texts,
+        token_estimator.count,
+        start=start,
+        max_tokens=MAX_REQUEST_TOKENS,
+        max_inputs=MAX_REQUEST_INPUTS,
+        exact=token_estimator.exact
+    )
 
 
 def load_checkpoint():
@@ -143,10 +220,141 @@ def save_checkpoint(index):
         json.dump({"last_processed_index": index}, f)
 
 
+def content_hash(value):
+    """Stable hash of an embedding text or metadata dict."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+def prepare_rows(df):
+    """
+    Vector ids, embedding texts and metadata for every row, built once
+    for the whole frame with column operations (see embedding_text.py).
+    """
+    variant_ids = df['variant_id'].astype(str)
+    rows = {
+        "variant_ids": variant_ids.tolist(),
+        "ids": ("variant_" + variant_ids).tolist(),
+        "texts": build_embedding_texts(df),
+        "metadata": build_metadata(df),
+    }
+    if EMBEDDING_STRATEGY == "product":
+        rows["texts"] = build_embedding_texts(df, PRODUCT_TEXT_FIELDS)
+        rows["variant_texts"] = build_variant_texts(df)
+    return rows
+
+
+def slice_rows(rows, start, end):
+    """A (vector ids, texts, metadata, variant texts or None) batch for rows [start, end)."""
+    variant_texts = rows.get("variant_texts")
+    return (
+        rows["ids"][start:end],
+        rows["texts"][start:end],
+        rows["metadata"][start:end],
+        variant_texts[start:end] if variant_texts is not None else None,
+    )
+
+
+def build_manifest(rows):
+    """
+    Describe what each variant is ingested with:
+    {variant_id: {"id", "text_hash", "metadata_hash"}}
+    """
+    manifest = {}
+    variant_texts = rows.get("variant_texts") or [None] * len(rows["ids"])
+    for variant_id, vector_id, text, metadata, variant_text in zip(
+            rows["variant_ids"], rows["ids"], rows["texts"], rows["metadata"], variant_texts):
+        if "variant_texts" in rows:
+            # Composed vectors change with either text or the weight
+            text = f"{text}\0{variant_text}\0{VARIANT_TEXT_WEIGHT}"
+        manifest[variant_id] = {
+            "id": vector_id,
+            "text_hash": content_hash(text),
+            "metadata_hash": content_hash(metadata),
+        }
+    return manifest
+
+
+def load_manifest():
+    """Load the manifest written by the last successful run."""
+    if os.path.exists(MANIFEST_FILE):
+        with open(MANIFEST_FILE, 'r') as f:
+            return json.load(f)
+    return {}
+
+
+def save_lexical_index(df, rows):
+    """Rebuild the BM25 index alongside the local vector index."""
+    lexical = LexicalIndex.build_from_frame(df, rows["ids"], rows["metadata"])
+    lexical.save(os.path.join(LOCAL_INDEX_DIR, LEXICAL_SUBDIR))
+    print(f"🔤 Lexical index: {len(lexical)} documents, {len(lexical.vocab)} terms")
+
+
+def save_manifest(manifest):
+    """Write the manifest atomically so a crash never leaves it half written."""
+    tmp_file = MANIFEST_FILE + ".tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, MANIFEST_FILE)
+
+
+def embed_batch(batch):
+    """
+    Pipeline stage 1: embed a (vector ids, texts, metadata, variant texts) batch.
+    Returns (vectors in Pinecone upsert format, tokens sent).
+    """
+    vector_ids, embedding_texts, metadata, variant_texts = batch
+    if variant_texts is None:
+        embeddings, tokens_sent = generate_embeddings_batch(embedding_texts)
+    else:
+        embeddings, tokens_sent = generate_composed_embeddings(embedding_texts, variant_texts)
+
+    vectors = [
+        {"id": vector_id, "values": embedding, "metadata": meta}
+        for vector_id, embedding, meta in zip(vector_ids, embeddings, metadata)
+    ]
+    return vectors, tokens_sent
+
+
+def make_upsert_stage(index, local_writer):
+    """
+    Pipeline stage 2: upload a batch to Pinecone (unless index is None) and
+    the local mirror. A token-budget batch can hold thousands of rows, so
+    its UPSERT_BATCH_SIZE sub-batches are sent concurrently on upsert_pool.
+    """
+    def upsert_sub_batch(sub_batch):
+        if index is not None:
+            pinecone_limiter.call(lambda: index.upsert(vectors=sub_batch))
+        local_writer.upsert(sub_batch)
+
+    def upsert_batch(batch):
+        vectors, tokens_sent = batch
+        futures = [
+            upsert_pool.submit(upsert_sub_batch, vectors[i:i + UPSERT_BATCH_SIZE])
+            for i in range(0, len(vectors), UPSERT_BATCH_SIZE)
+        ]
+        for future in futures:
+            future.result()  # Re-raises a failed sub-batch
+        return len(vectors), tokens_sent
+    return upsert_batch
+
+
+def build_ingest_pipeline(index, local_writer):
+    return StagedPipeline([
+        ("embed", embed_batch, EMBED_CONCURRENCY),
+        ("upsert", make_upsert_stage(index, local_writer), UPSERT_CONCURRENCY),
+    ], queue_size=STAGE_QUEUE_SIZE)
+
+
 def setup_index():
     """
-    Create or verify Pinecone index exists.
+    Create or verify Pinecone index exists. Returns None in local-only mode.
     """
+    if LOCAL_ONLY:
+        print(f"💾 Local-only ingestion: skipping Pinecone, writing {LOCAL_INDEX_DIR}")
+        return None
+
     print(f"🔧 Setting up Pinecone index: {INDEX_NAME}")
 
     # Check if index exists
@@ -167,11 +375,28 @@ def setup_index():
         # Wait for index to be ready
         time.sleep(5)
     else:
+        index_dimension = pc.describe_index(INDEX_NAME).dimension
+        if index_dimension != EMBEDDING_DIMENSION:
+            raise ValueError(
+                f"Index {INDEX_NAME} has dimension {index_dimension} but EMBEDDING_DIMENSION is "
+                f"{EMBEDDING_DIMENSION}. Use another INDEX_NAME or delete the index and re-ingest."
+            )
         print(f"✅ Index {INDEX_NAME} already exists")
 
     return pc.Index(INDEX_NAME)
 
 
+def fit_embedding_provider(rows):
+    """Fit a catalog-trained provider (tfidf) on this run's texts and save it."""
+    if not hasattr(embedding_provider, "fit"):
+        return
+    texts = list(rows["texts"]) + [t for t in rows.get("variant_texts") or [] if t is not None]
+    embedding_provider.fit(texts)
+    embedding_provider.save(PROVIDER_STATE_DIR)
+    print(f"🧮 Fitted {embedding_provider.name} provider on {len(set(texts))} texts "
+          f"(version {embedding_provider.version})")
+
+
 def ingest_to_pinecone():
     """
     Main ingestion pipeline.
@@ -195,72 +420,91 @@ def ingest_to_pinecone():
     if start_index > 0:
         print(f"\n🔄 Resuming from index {start_index}")
 
-    # Process in batches
-    total_batches = (len(df) - start_index + BATCH_SIZE - 1) // BATCH_SIZE
-    print(f"\n🔢 Processing {len(df) - start_index} products in {total_batches} batches")
-    print(f"   Batch size: {BATCH_SIZE}")
-    print(f"   Embedding model: {EMBEDDING_MODEL}")
-
+    # Build every embedding text and metadata dict up front, column-wise
+    rows = prepare_rows(df)
+
+    # A fresh run refits catalog-trained providers; a resumed one keeps the saved model
+    if start_index == 0:
+        fit_embedding_provider(rows)
+
+    # Local mirror of the index (started fresh unless resuming)
+    local_writer = LocalIndexWriter(
+        LOCAL_INDEX_DIR,
+        dimension=EMBEDDING_DIMENSION,
+        model=EMBEDDING_MODEL,
+        reset=start_index == 0,
+        provider=embedding_provider.identity
+    )
+
+    # Pack rows into batches by token budget
+    batches = plan_batches(rows["texts"], start=start_index, variant_texts=rows.get("variant_texts"))
+    print(f"\n🔢 Processing {len(df) - start_index} products in {len(batches)} batches")
+    print(f"   Token budget per request: {MAX_REQUEST_TOKENS} tokens / {MAX_REQUEST_INPUTS} inputs"
+          f" ({'tiktoken' if token_estimator.exact else 'estimated'} counts)")
+    print(f"   Embedding provider: {embedding_provider.name} ({embedding_provider.model}), "
+          f"{EMBEDDING_DIMENSION} dimensions ({EMBEDDING_STRATEGY} strategy)")
+    print(f"   Concurrency: {EMBED_CONCURRENCY} embedding / {UPSERT_CONCURRENCY} upsert")
+
+    tracker = CheckpointTracker()
+    progress = tqdm(total=len(batches), desc="Processing batches")
     vectors_uploaded = 0
+    batch_tokens = []
+
+    def on_batch_done(batch_number, result):
+        nonlocal vectors_uploaded
+        uploaded, tokens_sent = result
+        vectors_uploaded += uploaded
+        if tokens_sent:
+            batch_tokens.append(tokens_sent)
+        progress.set_postfix(tokens=tokens_sent)
+        progress.update(1)
+        # Batches finish out of order: only checkpoint past fully done prefixes
+        if tracker.complete(batch_number):
+            if tracker.next_batch < len(batches):
+                save_checkpoint(batches[tracker.next_batch][0] - 1)
+            else:
+                save_checkpoint(len(df) - 1)
 
-    for batch_start in tqdm(range(start_index, len(df), BATCH_SIZE),
-                            desc="Processing batches"):
-        batch_end = min(batch_start + BATCH_SIZE, len(df))
-        batch_df = df.iloc[batch_start:batch_end]
-
-        # Create embedding texts
-        embedding_texts = [create_embedding_text(row) for _, row in batch_df.iterrows()]
-
-        # Generate embeddings
-        try:
-            embeddings = generate_embeddings_batch(embedding_texts)
-        except Exception as e:
-            print(f"\n❌ Failed to generate embeddings for batch {batch_start}-{batch_end}: {e}")
-            print("   Saving checkpoint and exiting...")
-            save_checkpoint(batch_start - 1)
-            return
-
-        # Prepare vectors for Pinecone
-        vectors_to_upsert = []
-        for idx, (_, row) in enumerate(batch_df.iterrows()):
-            vector_id = f"variant_{row['variant_id']}"
-            embedding = embeddings[idx]
-            metadata = prepare_metadata(row)
-
-            vectors_to_upsert.append({
-                "id": vector_id,
-                "values": embedding,
-                "metadata": metadata
-            })
-
-        # Upload to Pinecone in sub-batches
-        for i in range(0, len(vectors_to_upsert), UPSERT_BATCH_SIZE):
-            sub_batch = vectors_to_upsert[i:i + UPSERT_BATCH_SIZE]
-            try:
-                index.upsert(vectors=sub_batch)
-                vectors_uploaded += len(sub_batch)
-            except Exception as e:
-                print(f"\n❌ Failed to upsert vectors: {e}")
-                print("   Saving checkpoint and exiting...")
-                save_checkpoint(batch_start - 1)
-                return
-
-        # Save checkpoint after each batch
-        save_checkpoint(batch_end - 1)
-
-        # Small delay to avoid rate limits
-        time.sleep(0.5)
+    pipeline = build_ingest_pipeline(index, local_writer)
+    try:
+        pipeline.run(
+            ((n, slice_rows(rows, start, end)) for n, (start, end) in enumerate(batches)),
+            on_batch_done
+        )
+    except PipelineError as e:
+        progress.close()
+        failed_start, failed_end = batches[e.key]
+        print(f"\n❌ Failed on batch {failed_start}-{failed_end}: {e.error}")
+        print(f"   Checkpoint saved, re-run to resume from index {batches[tracker.next_batch][0]}")
+        return
+    progress.close()
 
     # Get index stats
     print(f"\n✅ Ingestion complete!")
     print(f"   Total vectors uploaded: {vectors_uploaded}")
-
-    # Wait for index to update
-    time.sleep(2)
-    stats = index.describe_index_stats()
-    print(f"\n📊 Pinecone Index Stats:")
-    print(f"   Total vectors: {stats.total_vector_count}")
-    print(f"   Index dimension: {stats.dimension}")
+    print(f"   Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} misses")
+    if batch_tokens:
+        print(f"   Tokens sent: {sum(batch_tokens)} in {len(batch_tokens)} requests"
+              f" (avg {sum(batch_tokens) // len(batch_tokens)}, max {max(batch_tokens)} per request)")
+    print(f"   Rate limited: {openai_limiter.rate_limited}x OpenAI, {pinecone_limiter.rate_limited}x Pinecone")
+    print(f"   Stage time: embed {pipeline.stage_seconds['embed']:.1f}s, upsert {pipeline.stage_seconds['upsert']:.1f}s")
+
+    if index is not None:
+        # Wait for index to update
+        time.sleep(2)
+        stats = index.describe_index_stats()
+        print(f"\n📊 Pinecone Index Stats:")
+        print(f"   Total vectors: {stats.total_vector_count}")
+        print(f"   Index dimension: {stats.dimension}")
+
+    # Compact the local mirror so it loads as a single memory map
+    local_count = compact_local_index(LOCAL_INDEX_DIR)
+    print(f"\n💾 Local index written to {LOCAL_INDEX_DIR} ({local_count} vectors)")
+    save_lexical_index(df, rows)
+
+    # Record what was ingested so later runs can use --delta
+    save_manifest(build_manifest(rows))
+    print(f"📝 Manifest written to {MANIFEST_FILE}")
 
     # Clean up checkpoint
     if os.path.exists(CHECKPOINT_FILE):
@@ -272,5 +516,115 @@ def ingest_to_pinecone():
     print("=" * 60)
 
 
+def ingest_delta():
+    """
+    Delta ingestion: diff the master CSV against the manifest, upsert only
+    new or changed variants and delete variants that are no longer listed.
+    The index stays fully searchable throughout.
+    """
+    print("=" * 60)
+    print("🔁 RARE BEAUTY PINECONE DELTA INGESTION")
+    print("=" * 60)
+
+    print(f"\n📂 Loading data from {MASTER_CSV}...")
+    df = pd.read_csv(MASTER_CSV)
+    # One row per variant: a duplicated variant_id would overwrite itself anyway
+    df = df.drop_duplicates(subset='variant_id', keep='last').reset_index(drop=True)
+    print(f"✅ Loaded {len(df)} products")
+
+    manifest = load_manifest()
+    if not manifest:
+        print(f"⚠️  No manifest at {MANIFEST_FILE}: every variant counts as new and")
+        print("   nothing can be deleted. Run a full ingestion once to start tracking.")
+
+    rows = prepare_rows(df)
+    current = build_manifest(rows)
+    changed_ids = [vid for vid, entry in current.items() if manifest.get(vid) != entry]
+    removed_ids = [vid for vid in manifest if vid not in current]
+
+    print(f"\n🔎 Diff against manifest:")
+    print(f"   New:       {sum(1 for vid in changed_ids if vid not in manifest)}")
+    print(f"   Changed:   {sum(1 for vid in changed_ids if vid in manifest)}")
+    print(f"   Removed:   {len(removed_ids)}")
+    print(f"   Unchanged: {len(current) - len(changed_ids)}")
+
+    if not changed_ids and not removed_ids:
+        print("\n✅ Nothing to do, index is up to date")
+        return
+
+    if getattr(embedding_provider, "fitted", True) is False:
+        print(f"\n❌ No fitted {embedding_provider.name} provider at {PROVIDER_STATE_DIR}.")
+        print("   Run a full ingestion first.")
+        return
+
+    index = setup_index()
+    local_writer = LocalIndexWriter(LOCAL_INDEX_DIR, dimension=EMBEDDING_DIMENSION, model=EMBEDDING_MODEL,
+                                    provider=embedding_provider.identity)
+
+    changed_set = set(changed_ids)
+    positions = [i for i, vid in enumerate(rows["variant_ids"]) if vid in changed_set]
+    changed = {key: [values[i] for i in positions] for key, values in rows.items()}
+    batches = plan_batches(changed["texts"], variant_texts=changed.get("variant_texts"))
+    vectors_uploaded = 0
+    progress = tqdm(total=len(batches), desc="Upserting changes")
+
+    def on_batch_done(batch_number, result):
+        nonlocal vectors_uploaded
+        uploaded, tokens_sent = result
+        vectors_uploaded += uploaded
+        progress.set_postfix(tokens=tokens_sent)
+        progress.update(1)
+        # The manifest doubles as the checkpoint, so order does not matter
+        start, end = batches[batch_number]
+        for variant_id in changed["variant_ids"][start:end]:
+            manifest[variant_id] = current[variant_id]
+        save_manifest(manifest)
+
+    pipeline = build_ingest_pipeline(index, local_writer)
+    try:
+        pipeline.run(
+            ((n, slice_rows(changed, start, end)) for n, (start, end) in enumerate(batches)),
+            on_batch_done
+        )
+    except PipelineError as e:
+        progress.close()
+        print(f"\n❌ Failed to ingest changes: {e.error}")
+        print("   Manifest holds everything applied so far, re-run to continue.")
+        return
+    progress.close()
+
+    for i in range(0, len(removed_ids), DELETE_BATCH_SIZE):
+        chunk = removed_ids[i:i + DELETE_BATCH_SIZE]
+        vector_ids = [manifest[vid]["id"] for vid in chunk]
+        try:
+            if index is not None:
+                pinecone_limiter.call(lambda: index.delete(ids=vector_ids))
+            local_writer.delete(vector_ids)
+        except Exception as e:
+            print(f"\n❌ Failed to delete vectors: {e}")
+            print("   Manifest holds everything applied so far, re-run to continue.")
+            return
+        for vid in chunk:
+            del manifest[vid]
+        save_manifest(manifest)
+
+    local_count = compact_local_index(LOCAL_INDEX_DIR)
+    save_lexical_index(df, rows)
+
+    print(f"\n✅ Delta ingestion complete!")
+    print(f"   Vectors upserted: {vectors_uploaded}")
+    print(f"   Vectors deleted: {len(removed_ids)}")
+    print(f"   Embedding cache: {embedding_cache.hits} hits, {embedding_cache.misses} misses")
+    print(f"   Local index: {local_count} vectors")
+
+
 if __name__ == "__main__":
-    ingest_to_pinecone()
+    parser = argparse.ArgumentParser(description="Ingest Rare Beauty products into Pinecone")
+    parser.add_argument("--delta", action="store_true",
+                        help="Only upsert new/changed variants and delete removed ones")
+    args = parser.parse_args()
+
+    if args.delta:
+        ingest_delta()
+    else:
+        ingest_to_pinecone()
@@ -0,0 +1,240 @@
+"""
+Adaptive rate limiting for OpenAI and Pinecone calls.
+
+Each limiter keeps a requests/min and a tokens/min token bucket. Pacing
+adapts with AIMD: every success nudges the allowed rate back up towards
+the ceiling, every 429 halves it and pauses for the server's retry-after.
+Rate-limit response headers (x-ratelimit-*) are used to learn the real
+quota and to wait for the reset window when it is exhausted.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+
+# Defaults match text-embedding-3-small tier 1 quotas; override per account
+OPENAI_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", "3000"))
+OPENAI_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_TOKENS_PER_MINUTE", "1000000"))
+PINECONE_REQUESTS_PER_MINUTE = int(os.getenv("PINECONE_REQUESTS_PER_MINUTE", "6000"))
+
+ADDITIVE_INCREASE = 0.05  # Fraction of the ceiling regained per success
+MULTIPLICATIVE_DECREASE = 0.5  # Rate multiplier on every 429
+MIN_RATE_FRACTION = 0.05  # Never pace slower than this fraction of the ceiling
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call is still rate limited after all retries."""
+
+
+def parse_reset(value):
+    """Parse OpenAI reset durations like '1s', '6m0s', '20ms' or '0.5' into seconds."""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|s|m|h)", value):
+        total += float(amount) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return total
+
+
+def _status_code(error):
+    """HTTP status of an OpenAI/Pinecone client exception, if any."""
+    for attr in ("status_code", "status"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _headers(source):
+    """Response headers from a raw response or an API exception (lower-cased keys)."""
+    headers = getattr(source, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(source, "response", None), "headers", None)
+    return {k.lower(): v for k, v in dict(headers or {}).items()}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at rate_per_minute.
+    A request larger than the bucket is allowed once the bucket is full and
+    leaves it in debt, so oversized batches are paced rather than rejected.
+    """
+
+    def __init__(self, rate_per_minute, burst_seconds=1.0):
+        self.ceiling = float(rate_per_minute)
+        self.rate = float(rate_per_minute)
+        self.burst_seconds = burst_seconds
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    @property
+    def capacity(self):
+        return max(1.0, self.rate / 60.0 * self.burst_seconds)
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate / 60.0)
+        self.updated = now
+
+    def reserve(self, amount):
+        """Take amount if available; otherwise return seconds to wait before retrying."""
+        with self.lock:
+            self._refill(time.monotonic())
+            needed = min(amount, self.capacity)
+            if self.level >= needed:
+                self.level -= amount
+                return 0.0
+            return (needed - self.level) * 60.0 / self.rate
+
+    def set_rate(self, rate_per_minute):
+        with self.lock:
+            self._refill(time.monotonic())
+            floor = self.ceiling * MIN_RATE_FRACTION
+            self.rate = max(floor, min(self.ceiling, rate_per_minute))
+
+    def drain(self, remaining):
+        """Align the local bucket with the server's view of what is left."""
+        with self.lock:
+            self.level = min(self.level, float(remaining))
+
+
+class AdaptiveRateLimiter:
+    """
+    Requests/min + tokens/min limiter with AIMD pacing.
+
+    Use call(fn, tokens=...) to wrap an API call: it waits for capacity,
+    retries 429s and transient (5xx / connection) errors, and learns from
+    headers.
+    """
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute=None):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.paused_until = 0.0
+        self.rate_limited = 0
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _buckets(self):
+        return [b for b in (self.requests, self.tokens) if b is not None]
+
+    def acquire(self, tokens=0):
+        """Block until one request (and `tokens` tokens) may be sent."""
+        start = time.monotonic()
+        while True:
+            pause = self.paused_until - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+                continue
+            wait = self.requests.reserve(1)
+            if wait == 0 and self.tokens is not None and tokens:
+                wait = self.tokens.reserve(tokens)
+                if wait:
+                    with self.requests.lock:
+                        self.requests.level += 1  # Give the request slot back
+            if wait == 0:
+                break
+            time.sleep(wait)
+        with self._lock:
+            self.waited_seconds += time.monotonic() - start
+
+    def on_success(self, headers=None):
+        """Additive increase, then correct with any x-ratelimit-* headers."""
+        for bucket in self._buckets():
+            bucket.set_rate(bucket.rate + bucket.ceiling * ADDITIVE_INCREASE)
+        self._learn(headers or {})
+
+    def on_rate_limited(self, headers=None):
+        """Multiplicative decrease and pause for the server's retry-after."""
+        with self._lock:
+            self.rate_limited += 1
+        for bucket in self._buckets():
+            bucket.set_rate(bucket.rate * MULTIPLICATIVE_DECREASE)
+
+        headers = headers or {}
+        retry_after = None
+        if "retry-after-ms" in headers:
+            retry_after = float(headers["retry-after-ms"]) / 1000.0
+        elif "retry-after" in headers:
+            retry_after = parse_reset(headers["retry-after"])
+        if retry_after is None:
+            retry_after = 1.0 + random.random()  # No hint: short jittered pause
+        self._pause(retry_after)
+        self._learn(headers)
+
+    def _pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _learn(self, headers):
+        for kind, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+            if bucket is None:
+                continue
+            limit = headers.get(f"x-ratelimit-limit-{kind}")
+            if limit is not None:
+                # The server's quota is the true ceiling
+                bucket.ceiling = float(limit)
+                bucket.set_rate(min(bucket.rate, bucket.ceiling))
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is not None:
+                bucket.drain(float(remaining))
+                if float(remaining) <= 0:
+                    reset = parse_reset(headers.get(f"x-ratelimit-reset-{kind}"))
+                    if reset:
+                        self._pause(reset)
+
+    def call(self, fn, tokens=0, max_retries=5):
+        """
+        Run fn() under the limiter. fn may return an OpenAI raw response
+        (anything with .headers); the caller parses it.
+        """
+        for attempt in range(max_retries):
+            self.acquire(tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                status = _status_code(e)
+                if status == 429:
+                    self.on_rate_limited(_headers(e))
+                    if attempt == max_retries - 1:
+                        raise RateLimitExceeded(
+                            f"{self.name}: still rate limited after {max_retries} attempts"
+                        ) from e
+                    continue
+                # Other client errors will not succeed on retry
+                if (status is not None and 400 <= status < 500) or attempt == max_retries - 1:
+                    raise
+                # Transient (5xx / connection): jittered exponential backoff
+                wait_time = min(30.0, 2 ** attempt) * (0.5 + random.random())
+                print(f"⚠️  {self.name} error (attempt {attempt + 1}): {e}")
+                print(f"   Retrying in {wait_time:.1f} seconds...")
+                time.sleep(wait_time)
+                continue
+            self.on_success(_headers(result))
+            return result
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name):
+    """Shared limiter per service ("openai" or "pinecone") for this process."""
+    with _limiters_lock:
+        if name not in _limiters:
+            if name == "openai":
+                _limiters[name] = AdaptiveRateLimiter(name, OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE)
+            elif name == "pinecone":
+                _limiters[name] = AdaptiveRateLimiter(name, PINECONE_REQUESTS_PER_MINUTE)
+            else:
+                raise ValueError(f"Unknown rate limiter: {name}")
+        return _limiters[name]
@@ -0,0 +1,135 @@
+"""
+Staged concurrent pipeline for batch ingestion.
+
+Each stage (e.g. embed, upsert) has its own pool of worker threads and a
+bounded input queue. A full queue blocks the stage before it, so slow
+downstream stages apply backpressure instead of letting work pile up in
+memory. Items finish out of order; CheckpointTracker turns completions
+back into a safe resume point.
+"""
+
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class StagedPipeline:
+    """
+    Run items through stages [(name, fn, workers), ...].
+
+    Each fn takes the previous stage's output and returns the next stage's
+    input. on_complete(key, result) is called once per item that makes it
+    through every stage, never concurrently. The first exception stops
+    intake and is re-raised from run() after in-flight items drain.
+    """
+
+    def __init__(self, stages, queue_size=4):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.stage_seconds = {name: 0.0 for name, _, _ in stages}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._complete_lock = threading.Lock()
+        self._error = None
+
+    def _record(self, name, seconds):
+        with self._lock:
+            self.stage_seconds[name] += seconds
+
+    def _worker(self, stage_index, inbox, outbox, on_complete):
+        name, fn, _ = self.stages[stage_index]
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                return
+            key, payload = item
+
+            if self._error is None:
+                start = time.perf_counter()
+                try:
+                    payload = fn(payload)
+                except Exception as e:
+                    with self._lock:
+                        if self._error is None:
+                            self._error = (key, e)
+                    payload = _STOP
+                self._record(name, time.perf_counter() - start)
+            else:
+                payload = _STOP  # Drain quickly once something has failed
+
+            if payload is _STOP or outbox is None:
+                if payload is not _STOP:
+                    with self._complete_lock:
+                        on_complete(key, payload)
+                with self._lock:
+                    self.in_flight -= 1
+            else:
+                outbox.put((key, payload))
+
+    def run(self, items, on_complete):
+        """Feed (key, payload) items through all stages; blocks until done."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+        for i, (_, _, workers) in enumerate(self.stages):
+            outbox = queues[i + 1] if i + 1 < len(self.stages) else None
+            stage_threads = [
+                threading.Thread(target=self._worker, args=(i, queues[i], outbox, on_complete), daemon=True)
+                for _ in range(workers)
+            ]
+            for t in stage_threads:
+                t.start()
+            threads.append(stage_threads)
+
+        for item in items:
+            if self._error is not None:
+                break
+            with self._lock:
+                self.in_flight += 1
+                self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            queues[0].put(item)  # Blocks while the first stage is saturated
+
+        # Shut stages down in order so every queued item is processed first
+        for i, stage_threads in enumerate(threads):
+            for _ in stage_threads:
+                queues[i].put(_STOP)
+            for t in stage_threads:
+                t.join()
+
+        if self._error is not None:
+            key, error = self._error
+            raise PipelineError(key, error) from error
+
+
+class PipelineError(Exception):
+    """Raised by StagedPipeline.run() with the key of the item that failed."""
+
+    def __init__(self, key, error):
+        super().__init__(f"item {key} failed: {error}")
+        self.key = key
+        self.error = error
+
+
+class CheckpointTracker:
+    """
+    Tracks out-of-order batch completions and reports the highest batch
+    number below which every batch is done (the safe resume point).
+    """
+
+    def __init__(self, first_batch=0):
+        self.next_batch = first_batch  # Lowest batch number not yet done
+        self._done = set()
+        self._lock = threading.Lock()
+
+    def complete(self, batch_number):
+        """Mark a batch done; returns True if the watermark advanced."""
+        with self._lock:
+            self._done.add(batch_number)
+            advanced = False
+            while self.next_batch in self._done:
+                self._done.remove(self.next_batch)
+                self.next_batch += 1
+                advanced = True
+            return advanced
@@ -0,0 +1,113 @@
+"""
+Token counting and token-budget batching for embedding requests.
+
+Rows are packed into requests by estimated token count instead of a fixed
+row count, so short rows share a request and long rows never push a
+request past the API's limits. A single text longer than the model's
+per-input limit is truncated before it is sent. tiktoken is used when
+installed; otherwise a characters-per-token ratio is calibrated from the
+usage the API reports.
+"""
+
+import os
+import threading
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# text-embedding-3-* request limits
+MAX_INPUT_TOKENS = 8191  # Per input text
+MAX_REQUEST_TOKENS = int(os.getenv("MAX_REQUEST_TOKENS", "300000"))  # Summed over all inputs
+MAX_REQUEST_INPUTS = int(os.getenv("MAX_REQUEST_INPUTS", "2048"))
+
+ESTIMATE_SAFETY_MARGIN = 0.9  # Headroom left when counts are estimated, not exact
+DEFAULT_CHARS_PER_TOKEN = 4.0  # Typical for English text with cl100k_base
+
+
+class TokenEstimator:
+    """Counts tokens exactly with tiktoken, or estimates them from characters."""
+
+    def __init__(self, encoding_name="cl100k_base"):
+        self.encoding = tiktoken.get_encoding(encoding_name) if tiktoken else None
+        self.chars_per_token = DEFAULT_CHARS_PER_TOKEN
+        self._lock = threading.Lock()
+
+    @property
+    def exact(self):
+        return self.encoding is not None
+
+    def count(self, text):
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return max(1, int(len(text) / self.chars_per_token) + 1)
+
+    def truncate(self, text, max_tokens=MAX_INPUT_TOKENS):
+        """text cut to at most max_tokens tokens (with headroom when counts are estimated)."""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            return text if len(tokens) <= max_tokens else self.encoding.decode(tokens[:max_tokens])
+        return text[:int(max_tokens * ESTIMATE_SAFETY_MARGIN * self.chars_per_token)]
+
+    def calibrate(self, texts, actual_tokens):
+        """Fold the API's reported usage into the chars-per-token ratio."""
+        if self.exact or not actual_tokens:
+            return
+        observed = sum(len(text) for text in texts) / actual_tokens
+        with self._lock:
+            # Moving average so one odd batch doesn't swing the estimate
+            self.chars_per_token = 0.8 * self.chars_per_token + 0.2 * observed
+
+
+def pack_batches(token_counts, start=0, max_tokens=MAX_REQUEST_TOKENS,
+                 max_inputs=MAX_REQUEST_INPUTS, exact=True):
+    """
+    Split rows [start, len(token_counts)) into consecutive (start, end)
+    ranges whose summed token count stays under max_tokens.
+    """
+    budget = max_tokens if exact else int(max_tokens * ESTIMATE_SAFETY_MARGIN)
+    batches = []
+    batch_start = start
+    batch_tokens = 0
+    for i in range(start, len(token_counts)):
+        tokens = token_counts[i]
+        full = i - batch_start >= max_inputs or batch_tokens + tokens > budget
+        if full and i > batch_start:
+            batches.append((batch_start, i))
+            batch_start = i
+            batch_tokens = 0
+        batch_tokens += tokens
+    if batch_start < len(token_counts):
+        batches.append((batch_start, len(token_counts)))
+    return batches
+
+
+def pack_text_batches(row_texts, count, start=0, max_tokens=MAX_REQUEST_TOKENS,
+                      max_inputs=MAX_REQUEST_INPUTS, exact=True):
+    """
+    Like pack_batches(), for rows that send several texts (None for none).
+    A text repeated within a batch is sent once, so it counts once toward
+    that batch's tokens and inputs; every batch counts its own texts.
+    """
+    budget = max_tokens if exact else int(max_tokens * ESTIMATE_SAFETY_MARGIN)
+    batches = []
+    batch_start = start
+    batch_texts = set()
+    batch_tokens = 0
+    for i in range(start, len(row_texts)):
+        new_texts = [t for t in dict.fromkeys(row_texts[i]) if t is not None and t not in batch_texts]
+        tokens = sum(count(t) for t in new_texts)
+        full = len(batch_texts) + len(new_texts) > max_inputs or batch_tokens + tokens > budget
+        if full and i > batch_start:
+            batches.append((batch_start, i))
+            batch_start = i
+            batch_texts = set()
+            batch_tokens = 0
+            new_texts = [t for t in dict.fromkeys(row_texts[i]) if t is not None]
+            tokens = sum(count(t) for t in new_texts)
+        batch_texts.update(new_texts)
+        batch_tokens += tokens
+    if batch_start < len(row_texts):
+        batches.append((batch_start, len(row_texts)))
+    return batches
@@ -0,0 +1,237 @@
+"""
+Shared Playwright browser sessions for the scrapers.
+
+The scrapers only read text and a few attributes, so a session:
+1. Runs headless (SCRAPER_HEADLESS=false to watch it)
+2. Aborts requests for images, media and fonts, and for analytics/ad
+   hosts (SCRAPER_BLOCK_RESOURCES=false to load everything)
+3. Is used with goto(), which waits for DOMContentLoaded and then for the
+   selector the scraper reads, instead of the full load event
+
+Stylesheets and scripts are kept: clicks and review widgets need them.
+A TransferStats passed to a session counts requests, blocked requests and
+bytes received.
+
+GET requests for documents, scripts, stylesheets and XHR go through the
+on-disk HTTP cache (http_cache.py): revalidated with conditional
+requests, and served only from disk in offline replay mode, where every
+other request is aborted.
+"""
+
+import os
+from contextlib import asynccontextmanager, contextmanager
+from urllib.parse import urlparse
+
+from playwright.async_api import async_playwright
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError, sync_playwright
+
+from scraper.http_cache import OfflineCacheMiss, default_http_cache
+
+HEADLESS = os.getenv("SCRAPER_HEADLESS", "true").lower() != "false"
+BLOCK_RESOURCES = os.getenv("SCRAPER_BLOCK_RESOURCES", "true").lower() != "false"
+
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+CACHED_RESOURCE_TYPES = {"document", "script", "stylesheet", "xhr", "fetch"}
+BLOCKED_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googleadservices.com",
+    "facebook.net", "facebook.com", "analytics.tiktok.com", "tr.snapchat.com", "ct.pinterest.com",
+    "bat.bing.com", "clarity.ms", "hotjar.com", "attn.tv", "klaviyo.com", "monorail-edge.shopifysvc.com",
+)
+
+NAVIGATION_TIMEOUT_MS = 60000
+SELECTOR_TIMEOUT_MS = 10000
+
+
+def should_cache(request):
+    return request.method == "GET" and request.resource_type in CACHED_RESOURCE_TYPES
+
+
+def should_block(request):
+    if request.resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlparse(request.url).hostname or ""
+    return any(host == blocked or host.endswith("." + blocked) for blocked in BLOCKED_HOSTS)
+
+
+class TransferStats:
+    """Network totals for a session: requests made, requests blocked, bytes received."""
+
+    def __init__(self):
+        self.requests = 0
+        self.blocked = 0
+        self.bytes = 0
+
+    def add_sizes(self, sizes):
+        self.requests += 1
+        self.bytes += sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+
+    def __str__(self):
+        return f"{self.requests} requests, {self.blocked} blocked, {self.bytes / 1e6:.1f} MB received"
+
+
+# ============ SYNC API ============
+
+def serve_cached(route, cache):
+    """Answer a request from the HTTP cache, revalidating (or replaying offline)."""
+    url = route.request.url
+    if cache.offline:
+        try:
+            cached = cache.replay(url)
+        except OfflineCacheMiss:
+            route.abort("internetdisconnected")
+            return
+        route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+        return
+
+    cached = cache.lookup(url)
+    headers = {**route.request.headers, **(cached.conditional_headers() if cached else {})}
+    try:
+        response = route.fetch(headers=headers)
+    except Exception:
+        route.abort()
+        return
+    if response.status == 304 and cached is not None:
+        cache.revalidated(cached)
+        route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+        return
+    body = response.body()
+    if response.status == 200:
+        cache.store(url, response.status, response.headers, body)
+    route.fulfill(response=response, body=body)
+
+
+def configure_context(context, block=BLOCK_RESOURCES, stats=None, cache=None):
+    """
+    Install resource blocking, the HTTP cache and transfer accounting on a
+    sync BrowserContext. cache: an HttpCache, None for the default, False for none.
+    """
+    cache = default_http_cache() if cache is None else cache or None
+
+    def route_request(route):
+        if block and should_block(route.request):
+            if stats is not None:
+                stats.blocked += 1
+            route.abort()
+        elif cache is not None and should_cache(route.request):
+            serve_cached(route, cache)
+        elif cache is not None and cache.offline:
+            route.abort("internetdisconnected")
+        else:
+            route.fallback()
+
+    if block or cache is not None:
+        context.route("**/*", route_request)
+
+    if stats is not None:
+        context.on("requestfinished", lambda request: stats.add_sizes(request.sizes()))
+    return context
+
+
+@contextmanager
+def browser_session(headless=HEADLESS, slow_mo=0, block=BLOCK_RESOURCES, stats=None, cache=None):
+    """Chromium with one configured context; yields the context (context.new_page() for pages)."""
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=headless, slow_mo=slow_mo)
+        try:
+            yield configure_context(browser.new_context(), block, stats, cache)
+        finally:
+            browser.close()
+
+
+def goto(page, url, selector=None, timeout=NAVIGATION_TIMEOUT_MS, selector_timeout=SELECTOR_TIMEOUT_MS):
+    """
+    Navigate and wait for selector to be attached rather than for the load
+    event. Returns False if the selector never appeared.
+    """
+    page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+    if selector is None:
+        return True
+    try:
+        page.wait_for_selector(selector, state="attached", timeout=selector_timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+
+# ============ ASYNC API ============
+
+async def async_serve_cached(route, cache):
+    """Async serve_cached()."""
+    url = route.request.url
+    if cache.offline:
+        try:
+            cached = cache.replay(url)
+        except OfflineCacheMiss:
+            await route.abort("internetdisconnected")
+            return
+        await route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+        return
+
+    cached = cache.lookup(url)
+    headers = {**route.request.headers, **(cached.conditional_headers() if cached else {})}
+    try:
+        response = await route.fetch(headers=headers)
+    except Exception:
+        await route.abort()
+        return
+    if response.status == 304 and cached is not None:
+        cache.revalidated(cached)
+        await route.fulfill(status=cached.status, headers=cached.headers, body=cached.body)
+        return
+    body = await response.body()
+    if response.status == 200:
+        cache.store(url, response.status, response.headers, body)
+    await route.fulfill(response=response, body=body)
+
+
+async def configure_async_context(context, block=BLOCK_RESOURCES, stats=None, cache=None):
+    """Async configure_context()."""
+    cache = default_http_cache() if cache is None else cache or None
+
+    async def route_request(route):
+        if block and should_block(route.request):
+            if stats is not None:
+                stats.blocked += 1
+            await route.abort()
+        elif cache is not None and should_cache(route.request):
+            await async_serve_cached(route, cache)
+        elif cache is not None and cache.offline:
+            await route.abort("internetdisconnected")
+        else:
+            await route.fallback()
+
+    if block or cache is not None:
+        await context.route("**/*", route_request)
+
+    if stats is not None:
+        async def request_finished(request):
+            stats.add_sizes(await request.sizes())
+        context.on("requestfinished", request_finished)
+    return context
+
+
+@asynccontextmanager
+async def async_browser_session(headless=HEADLESS, slow_mo=0, block=BLOCK_RESOURCES, stats=None, cache=None):
+    """Chromium for concurrent crawls; yields new_context(), a factory of configured contexts."""
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless, slow_mo=slow_mo)
+
+        async def new_context():
+            return await configure_async_context(await browser.new_context(), block, stats, cache)
+
+        try:
+            yield new_context
+        finally:
+            await browser.close()
+
+
+async def async_goto(page, url, selector=None, timeout=NAVIGATION_TIMEOUT_MS, selector_timeout=SELECTOR_TIMEOUT_MS):
+    """Async goto()."""
+    await page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+    if selector is None:
+        return True
+    try:
+        await page.wait_for_selector(selector, state="attached", timeout=selector_timeout)
+        return True
+    except PlaywrightTimeoutError:
+        return False
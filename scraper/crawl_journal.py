@@ -0,0 +1,95 @@
+"""
+Append-only crawl journal for resumable scrapers, under data/journals/.
+
+1. Every finished URL is appended as one JSON line, {"key", "value",
+   "at"}, and flushed to disk before the crawl moves on, so a crash loses
+   at most the page in flight
+2. Re-running the scraper reads the journal back and skips every key
+   already in it; a half-written last line from a crash is dropped
+3. The final output is materialized from the journal, so resumed and
+   uninterrupted runs produce the same output. Only keys and their file
+   offsets are held in memory; values are read back from disk
+4. close(complete=True) removes the journal once every URL is done; a
+   journal left behind (crash, or URLs that failed) is resumed by the next
+   run, which then only retries what is missing. --fresh discards it.
+
+Only successful pages are journaled, so failures are retried on resume.
+"""
+
+import json
+import os
+import time
+
+JOURNAL_DIR = os.getenv("SCRAPER_JOURNAL_DIR", "data/journals")
+
+
+class CrawlJournal:
+    """JSONL log of finished keys (usually URLs) and the records extracted from them."""
+
+    def __init__(self, name, fresh=False, directory=JOURNAL_DIR):
+        self.path = os.path.join(directory, f"{name}.jsonl")
+        self.offsets = {}  # key -> byte offset of its line, in the order keys finished
+        os.makedirs(directory, exist_ok=True)
+
+        if fresh and os.path.exists(self.path):
+            os.remove(self.path)
+        self._load()
+        self.resumed = len(self.offsets)
+        self.file = open(self.path, 'ab')
+        self._reader = open(self.path, 'rb')
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        end = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                self.offsets[json.loads(line)["key"]] = end
+                end += len(line)
+
+        # A crash mid-write leaves a torn last line; cut it so appends start clean
+        if end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(end)
+
+    def __contains__(self, key):
+        return key in self.offsets
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get(self, key, default=None):
+        offset = self.offsets.get(key)
+        if offset is None:
+            return default
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())["value"]
+
+    def values(self):
+        """Every journaled value, read back from disk in the order keys finished."""
+        for key in list(self.offsets):
+            yield self.get(key)
+
+    def record(self, key, value):
+        """Append a finished key and its JSON-serializable value, and sync it to disk."""
+        line = json.dumps({"key": key, "value": value, "at": time.time()}, ensure_ascii=False) + "\n"
+        offset = self.file.tell()
+        self.file.write(line.encode("utf-8"))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.offsets[key] = offset
+
+    def close(self, complete=False):
+        """Close; with complete=True the run is finished and the journal is removed."""
+        self.file.close()
+        self._reader.close()
+        if complete:
+            os.remove(self.path)
+            print(f"🧹 Crawl journal {self.path} removed")
+        else:
+            print(f"📒 Crawl journal kept at {self.path}: re-run to retry the missing URLs")
+
+    def __str__(self):
+        return f"{len(self.offsets)} URLs journaled ({self.resumed} resumed from {self.path})"
@@ -0,0 +1,114 @@
+"""
+Shared HTTP client for the scrapers' Shopify JSON fetches.
+
+1. One requests.Session whose connection pool matches the concurrency,
+   so connections are kept alive across requests
+2. Bounded concurrency: get_json_many() keeps up to
+   SCRAPER_HTTP_CONCURRENCY requests in flight on a thread pool
+3. Connect/read timeouts on every request
+4. Per-host rate limits and retries (jittered backoff on 5xx/connection
+   errors, retry-after on 429) via pipelines/rate_limiter.py
+5. The on-disk HTTP cache (http_cache.py): conditional requests for
+   cached URLs, 304s answered from disk, and no network at all in
+   offline replay mode
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pipelines.rate_limiter import AdaptiveRateLimiter
+from scraper.http_cache import default_http_cache
+
+SCRAPER_HTTP_CONCURRENCY = int(os.getenv("SCRAPER_HTTP_CONCURRENCY", "8"))
+SCRAPER_REQUESTS_PER_MINUTE = int(os.getenv("SCRAPER_REQUESTS_PER_MINUTE", "1200"))  # Per host
+SCRAPER_HTTP_TIMEOUT = (5, 20)  # Connect, read (seconds)
+SCRAPER_HTTP_RETRIES = 4
+
+PRODUCT_JSON_URL = "https://www.rarebeauty.com/products/{handle}.js"  # Shopify product + variants
+
+
+def product_json_url(handle):
+    return PRODUCT_JSON_URL.format(handle=handle)
+
+
+class FetchClient:
+    """Pooled, rate-limited, retrying GETs; safe to share between threads."""
+
+    def __init__(self, concurrency=SCRAPER_HTTP_CONCURRENCY, requests_per_minute=SCRAPER_REQUESTS_PER_MINUTE,
+                 timeout=SCRAPER_HTTP_TIMEOUT, max_retries=SCRAPER_HTTP_RETRIES, cache=None):
+        """cache: an HttpCache, None for the shared default, or False for none."""
+        self.concurrency = concurrency
+        self.requests_per_minute = requests_per_minute
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.cache = default_http_cache() if cache is None else cache or None
+        self.requests = 0
+        self.bytes = 0
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = AdaptiveRateLimiter(host, self.requests_per_minute)
+            return self._limiters[host]
+
+    def _get_once(self, url, **kwargs):
+        cached = self.cache.lookup(url) if self.cache is not None else None
+        headers = {**kwargs.pop("headers", {}), **(cached.conditional_headers() if cached else {})}
+
+        response = self.session.get(url, timeout=self.timeout, headers=headers, **kwargs)
+        with self._lock:
+            self.requests += 1
+            self.bytes += len(response.content)
+        if response.status_code == 304 and cached is not None:
+            return self.cache.revalidated(cached).as_requests_response()
+        response.raise_for_status()  # HTTPError carries the status for the limiter's retry rules
+        if self.cache is not None:
+            self.cache.store(url, response.status_code, response.headers, response.content)
+        return response
+
+    def get(self, url, **kwargs):
+        """
+        GET under the host's rate limit; raises requests.HTTPError on a final
+        4xx/5xx. In offline replay mode, answers from the cache or raises
+        OfflineCacheMiss.
+        """
+        if self.cache is not None and self.cache.offline:
+            return self.cache.replay(url).as_requests_response()
+        return self.limiter(url).call(lambda: self._get_once(url, **kwargs), max_retries=self.max_retries)
+
+    def get_json(self, url, **kwargs):
+        return self.get(url, **kwargs).json()
+
+    def get_json_many(self, urls):
+        """Yield (url, data, error) for every url as requests complete; exactly one of data/error is None."""
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            futures = {pool.submit(self.get_json, url): url for url in dict.fromkeys(urls)}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+
+    def close(self):
+        self.session.close()
+
+    def __str__(self):
+        return f"{self.requests} HTTP requests, {self.bytes / 1e6:.1f} MB"
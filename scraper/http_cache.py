@@ -0,0 +1,178 @@
+"""
+On-disk HTTP response cache for the scrapers, under data/http_cache/.
+
+1. Bodies are stored content-addressed (bodies/<sha256>), so a page that
+   did not change, or the same script on every product page, is stored once
+2. An SQLite index maps each URL to its status, headers, body hash and
+   validators (ETag / Last-Modified)
+3. Re-crawls send conditional requests (If-None-Match /
+   If-Modified-Since); a 304 is answered from disk
+4. Offline replay (SCRAPER_OFFLINE=true) answers only from the cache and
+   never touches the network, so the full parse/merge pipeline can be
+   re-run and parsing benchmarked on its own
+
+It is used by FetchClient (Shopify JSON) and by browser_session routes
+(Playwright page HTML, scripts and XHR).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+HTTP_CACHE_DIR = os.getenv("SCRAPER_HTTP_CACHE_DIR", "data/http_cache")
+HTTP_CACHE_ENABLED = os.getenv("SCRAPER_HTTP_CACHE", "true").lower() != "false"
+SCRAPER_OFFLINE = os.getenv("SCRAPER_OFFLINE", "false").lower() == "true"
+
+# Headers describing the wire encoding; cached bodies are stored decoded
+UNCACHED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+class OfflineCacheMiss(Exception):
+    """Raised in offline replay mode for a URL that is not in the cache."""
+
+
+class CachedResponse:
+    def __init__(self, url, status, headers, body):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def as_requests_response(self):
+        """A requests.Response carrying the cached body, for FetchClient callers."""
+        response = requests.Response()
+        response.url = self.url
+        response.status_code = self.status
+        response.headers = CaseInsensitiveDict(self.headers)
+        response._content = self.body
+        response.encoding = "utf-8"
+        return response
+
+    def conditional_headers(self):
+        """If-None-Match / If-Modified-Since that revalidate this copy."""
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+
+class HttpCache:
+    """
+    URL -> response store with validators. Safe to share between threads
+    (one connection guarded by a lock).
+    """
+
+    def __init__(self, path=HTTP_CACHE_DIR, offline=SCRAPER_OFFLINE):
+        self.path = path
+        self.offline = offline
+        self.hits = 0  # Served from disk (304 or offline replay)
+        self.misses = 0  # Not cached, or changed on the server
+        self.offline_misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(path, "bodies"), exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(path, "index.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " url TEXT PRIMARY KEY,"
+            " status INTEGER NOT NULL,"
+            " headers TEXT NOT NULL,"
+            " body_sha256 TEXT NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _body_path(self, digest):
+        return os.path.join(self.path, "bodies", digest[:2], digest)
+
+    def lookup(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body_sha256 FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._body_path(row[2]), 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None
+        return CachedResponse(url, row[0], json.loads(row[1]), body)
+
+    def store(self, url, status, headers, body):
+        headers = {k.lower(): v for k, v in dict(headers).items() if k.lower() not in UNCACHED_HEADERS}
+        digest = hashlib.sha256(body).hexdigest()
+        body_path = self._body_path(digest)
+        if not os.path.exists(body_path):
+            os.makedirs(os.path.dirname(body_path), exist_ok=True)
+            tmp_path = f"{body_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, body_path)
+
+        with self._lock:
+            self.misses += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, body_sha256, etag, last_modified, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, status, json.dumps(headers), digest, headers.get("etag"), headers.get("last-modified"),
+                 time.time())
+            )
+            self._conn.commit()
+
+    def revalidated(self, cached):
+        """Record a 304 for a cached response; returns it."""
+        with self._lock:
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET fetched_at = ? WHERE url = ?", (time.time(), cached.url))
+            self._conn.commit()
+        return cached
+
+    def replay(self, url):
+        """Offline mode: the cached response for url, or OfflineCacheMiss."""
+        cached = self.lookup(url)
+        with self._lock:
+            if cached is None:
+                self.offline_misses += 1
+            else:
+                self.hits += 1
+        if cached is None:
+            raise OfflineCacheMiss(f"Not in the HTTP cache (offline replay): {url}")
+        return cached
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __str__(self):
+        mode = "offline replay" if self.offline else "revalidating"
+        text = f"{self.hits} served from disk, {self.misses} fetched ({mode})"
+        if self.offline_misses:
+            text += f", {self.offline_misses} missing"
+        return text
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_http_cache():
+    """Process-wide cache shared by FetchClient and browser sessions (None if SCRAPER_HTTP_CACHE=false)."""
+    global _default_cache
+    if not HTTP_CACHE_ENABLED and not SCRAPER_OFFLINE:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = HttpCache()
+        return _default_cache
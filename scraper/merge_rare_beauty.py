@@ -1,3 +1,4 @@
+import os
 import pandas as pd
 from urllib.parse import urlparse
 
@@ -27,6 +28,18 @@ merged = variants_df.merge(
 print("✅ columns after merging details:")
 print(merged.columns.tolist())
 
+# merge variant ratings/review counts (from scrape_reviews.py) when available
+reviews_path = "data/rare_beauty_all_reviews_by_variant.csv"
+if os.path.exists(reviews_path):
+    reviews_df = pd.read_csv(reviews_path)
+    reviews_df = reviews_df.dropna(subset=["variant_id"]).drop_duplicates(subset="variant_id", keep="last")
+    merged = merged.merge(
+        reviews_df[["variant_id", "rating", "review_count"]],
+        on="variant_id",
+        how="left"
+    )
+    print("✅ merged ratings + review counts")
+
 # Note: variants_df already has category, so we don't need to merge it again
 # Just ensure we keep the existing category column
 print("✅ using category from variants_df")
@@ -47,6 +60,8 @@ expected_columns = [
     "ingredients",
     "finish",
     "product_url",
+    "rating",
+    "review_count",
 ]
 
 # only include columns that actually exist
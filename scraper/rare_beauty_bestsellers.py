@@ -1,20 +1,53 @@
 # rare_beauty_bestsellers.py
-
-from playwright.sync_api import sync_playwright
-import pandas as pd
+#
+# Each finished bestseller goes to the crawl journal (crawl_journal.py);
+# an interrupted run resumes with the products it has not finished.
+# --fresh starts over. When the crawl ends, rows are streamed from the
+# journal to the CSV and a Parquet dataset in rank order, in row groups
+# (stream_writer.py).
+
+import argparse
+import os
 import re
+import sys
 
-def scrape_bestsellers():
-    url = "https://www.rarebeauty.com/collections/bestsellers"
-    data = []
+import pyarrow as pa
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.browser_session import TransferStats, browser_session, goto
+from scraper.crawl_journal import CrawlJournal
+from scraper.stream_writer import StreamWriter
+
+# The rating/review widget renders after DOMContentLoaded
+REVIEW_SELECTOR = "a[aria-label*='reviews']"
+
+OUTPUT_CSV = "data/rare_beauty_bestsellers.csv"
+JOURNAL_NAME = "rare_beauty_bestsellers"
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=100)
-        page = browser.new_page()
-        page.goto(url, timeout=60000)
-        page.wait_for_load_state("domcontentloaded")
+BESTSELLER_SCHEMA = pa.schema([
+    ("bestseller_rank", pa.int64()),
+    ("product_name", pa.string()),
+    ("product_url", pa.string()),
+    ("image_url", pa.string()),
+    ("price", pa.string()),
+    ("rating", pa.float64()),
+    ("review_count", pa.int64()),
+])
 
-        page.wait_for_selector("div.collection-grid__item")
+def scrape_bestsellers(fresh=False):
+    url = "https://www.rarebeauty.com/collections/bestsellers"
+    stats = TransferStats()
+    journal = CrawlJournal(JOURNAL_NAME, fresh=fresh)
+    if journal.resumed:
+        print(f"📒 Resuming: {journal.resumed} bestsellers already in {journal.path}")
+    ranked = []  # journal keys in bestseller rank order
+    failed = 0
+
+    with browser_session(stats=stats) as context:
+        page = context.new_page()
+        goto(page, url, "div.collection-grid__item", selector_timeout=30000)
 
         products = page.query_selector_all("div.collection-grid__item")
         print(f"🛒 Found {len(products)} bestsellers")
@@ -30,6 +63,10 @@ def scrape_bestsellers():
                 + name_element.get_attribute("href")
                 if name_element and name_element.get_attribute("href") else ""
             )
+            key = link or f"rank {idx}"
+            ranked.append(key)
+            if key in journal:
+                continue
 
             # image
             image_element = product.query_selector("img")
@@ -45,10 +82,9 @@ def scrape_bestsellers():
 
             # move into product page to get rating and review
             if link:
+                product_page = context.new_page()
                 try:
-                    product_page = browser.new_page()
-                    product_page.goto(link, timeout=60000)
-                    product_page.wait_for_load_state("domcontentloaded")
+                    goto(product_page, link, REVIEW_SELECTOR)
 
                     # star rating (e.g., 4.8 star)
                     try:
@@ -70,12 +106,14 @@ def scrape_bestsellers():
                     except:
                         review_count = "N/A"
 
-                    product_page.close()
-
                 except Exception as e:
-                    print(f"⚠️ Could not get reviews/ratings for {name}: {e}")
+                    print(f"⚠️ Could not get reviews/ratings for {name}, retried on resume: {e}")
+                    failed += 1
+                    continue
+                finally:
+                    product_page.close()
 
-            data.append({
+            row = {
                 "bestseller_rank": idx,
                 "product_name": name,
                 "product_url": link,
@@ -83,13 +121,23 @@ def scrape_bestsellers():
                 "price": price,
                 "rating": rating,
                 "review_count": review_count
-            })
+            }
+            journal.record(key, row)
 
-        browser.close()
+    print(f"📶 Network: {stats}")
 
-    df = pd.DataFrame(data)
-    df.to_csv("data/rare_beauty_bestsellers.csv", index=False)
-    print("✅ Bestseller scrape complete with ratings + reviews saved to data/rare_beauty_bestsellers.csv")
+    # Same rank order whether or not the run was resumed
+    writer = StreamWriter(OUTPUT_CSV, BESTSELLER_SCHEMA)
+    writer.write_many(journal.get(key) for key in ranked if key in journal)
+    writer.close()
+    if failed:
+        print(f"⚠️ {failed} bestsellers failed and are missing from {OUTPUT_CSV}")
+    journal.close(complete=not failed)
+    print(f"✅ Bestseller scrape complete with ratings + reviews: {writer}")
 
 if __name__ == "__main__":
-    scrape_bestsellers()
+    parser = argparse.ArgumentParser(description="Scrape Rare Beauty bestsellers with ratings and reviews")
+    parser.add_argument("--fresh", action="store_true", help="Discard an interrupted run's journal and start over")
+    args = parser.parse_args()
+
+    scrape_bestsellers(args.fresh)
@@ -0,0 +1,361 @@
+"""
+Single-pass Rare Beauty crawler.
+
+Replaces running rare_beauty_scraper.py, rare_beauty_bestsellers.py,
+scrape_reviews.py, rare_beauty_product_details.py and
+rare_beauty_variant_scraper.py one after another, which load the same
+product pages several times. This script:
+1. Visits every collection page (and the bestsellers page) once:
+   category, rank, name, URL, image and price per product card
+2. Visits every product page once, by handle, with a pool of headless
+   pages: description, ingredients, shades, finish, rating and review
+   count in the same visit
+3. Fetches the Shopify /products/{handle}.js variant JSON once per handle
+
+It writes the same CSVs as the separate scrapers, so
+merge_rare_beauty.py runs unchanged on its output.
+
+Finished products are appended to the crawl journal (crawl_journal.py);
+an interrupted crawl re-reads the collection pages and resumes with the
+products it has not finished. Product records stay on disk in the
+journal, and the outputs are streamed from it in row groups, to CSV and
+Parquet (stream_writer.py).
+
+Run: python scraper/rare_beauty_crawler.py --workers 8
+     python scraper/rare_beauty_crawler.py --fresh  # ignore an interrupted crawl
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.browser_session import HEADLESS, TransferStats, async_browser_session, async_goto
+from scraper.crawl_journal import CrawlJournal
+from scraper.fetch_client import FetchClient, product_json_url
+from scraper.rare_beauty_bestsellers import BESTSELLER_SCHEMA
+from scraper.rare_beauty_product_details import (
+    DETAIL_FIELDS, DETAIL_SELECTOR, DETAILED_SCHEMA, MISSING, PAGE_TIMEOUT_MS, PER_HOST_CONCURRENCY, WORKERS,
+    HostLimiter, extract_details
+)
+from scraper.rare_beauty_scraper import COLLECTION_SCHEMA
+from scraper.rare_beauty_variant_scraper import VARIANT_SCHEMA, variant_records
+from scraper.scrape_reviews import REVIEW_SCHEMA
+from scraper.stream_writer import StreamWriter
+
+BASE_URL = "https://www.rarebeauty.com"
+COLLECTIONS = {
+    "face": f"{BASE_URL}/collections/face",
+    "lips": f"{BASE_URL}/collections/lip",
+    "eyes": f"{BASE_URL}/collections/eye",
+    "body": f"{BASE_URL}/collections/body",
+    "tools": f"{BASE_URL}/collections/tools",
+    "online_only": f"{BASE_URL}/collections/online-only",
+}
+BESTSELLERS_URL = f"{BASE_URL}/collections/bestsellers"
+MAX_COLLECTION_PAGES = 9
+
+CARD_SELECTOR = "div.collection-grid__item"
+REVIEW_SELECTOR = "a[aria-label*='reviews']"
+REVIEW_TIMEOUT_MS = 5000
+
+COLLECTIONS_CSV = "data/rare_beauty_collections.csv"
+DETAILED_CSV = "data/rare_beauty_detailed.csv"
+VARIANTS_CSV = "data/rare_beauty_variants.csv"
+REVIEWS_CSV = "data/rare_beauty_all_reviews_by_variant.csv"
+BESTSELLERS_CSV = "data/rare_beauty_bestsellers.csv"
+JOURNAL_NAME = "rare_beauty_crawler"
+
+
+def extract_handle(url):
+    try:
+        return url.split("/products/")[1].split("?")[0].split("/")[0]
+    except (AttributeError, IndexError):
+        return None
+
+
+# ============ COLLECTION PAGES ============
+
+async def parse_card(card):
+    name_element = await card.query_selector("h3.pi__title a")
+    name = (await name_element.inner_text()).strip() if name_element else ""
+    href = await name_element.get_attribute("href") if name_element else None
+    link = BASE_URL + href if href else ""
+
+    image = await card.query_selector("img")
+    image_url = (await image.get_attribute("src") or "") if image else ""
+
+    price_element = await card.query_selector("button.pi__quick-add")
+    raw_price = (await price_element.inner_text()).strip() if price_element else ""
+    price_match = re.search(r"\$\s*\d+(\.\d{2})?", raw_price)
+
+    return {
+        "name": name,
+        "product_url": link,
+        "image_url": image_url,
+        "price": price_match.group(0) if price_match else "",
+        "price_text": raw_price.replace("\n", " "),
+        "handle": extract_handle(link),
+    }
+
+
+async def crawl_collection(page, base_url, counts):
+    """Product cards of every page of a collection, in rank order."""
+    cards = []
+    for page_num in range(1, MAX_COLLECTION_PAGES + 1):
+        url = f"{base_url}?page={page_num}"
+        found = await async_goto(page, url, CARD_SELECTOR, selector_timeout=5000)
+        counts["collection_pages"] += 1
+        if not found:
+            break
+        page_cards = await page.query_selector_all(CARD_SELECTOR)
+        if not page_cards:
+            break
+        for card in page_cards:
+            cards.append({"rank": len(cards) + 1, **await parse_card(card)})
+        print(f"🛒 {base_url}: {len(cards)} products after page {page_num}")
+    return cards
+
+
+# ============ PRODUCT PAGES ============
+
+async def extract_rating(page):
+    """Product-level star rating and review count from the review widget."""
+    rating = "N/A"
+    review_count = "N/A"
+    try:
+        await page.wait_for_selector(REVIEW_SELECTOR, state="attached", timeout=REVIEW_TIMEOUT_MS)
+    except Exception:
+        return {"rating": rating, "review_count": review_count}
+
+    try:
+        rating_element = await page.query_selector("span.sr-only")
+        if rating_element:
+            match = re.search(r"(\d\.\d+) star", await rating_element.inner_text())
+            rating = match.group(1) if match else "N/A"
+    except Exception:
+        rating = "N/A"
+
+    try:
+        review_element = await page.query_selector(REVIEW_SELECTOR)
+        if review_element:
+            match = re.search(r"(\d+)", await review_element.inner_text())
+            review_count = match.group(1) if match else "N/A"
+    except Exception:
+        review_count = "N/A"
+
+    return {"rating": rating, "review_count": review_count}
+
+
+async def fetch_product_json(fetch_client, handle, counts):
+    """Variant JSON through the pooled, cached FetchClient, off the event loop."""
+    json_url = product_json_url(handle)
+    try:
+        counts["json_fetches"] += 1
+        return await asyncio.to_thread(fetch_client.get_json, json_url)
+    except Exception as e:
+        print(f"⚠️ Error on {json_url}: {e}")
+        return None
+
+
+async def crawl_product(page, fetch_client, handle, url, counts):
+    """(record, complete): complete is False if the page or the variant JSON failed."""
+    record = {**MISSING, "rating": "N/A", "review_count": "N/A"}
+    loaded = False
+    try:
+        await async_goto(page, url, DETAIL_SELECTOR, timeout=PAGE_TIMEOUT_MS)
+        counts["product_pages"] += 1
+        record.update(await extract_details(page))
+        record.update(await extract_rating(page))
+        loaded = True
+    except Exception as e:
+        print(f"⚠️ Could not load page {url}: {e}")
+    record["product_json"] = await fetch_product_json(fetch_client, handle, counts)
+    return record, loaded and record["product_json"] is not None
+
+
+async def product_worker(new_context, fetch_client, queue, limiter, journal, incomplete, counts):
+    context = await new_context()
+    page = await context.new_page()
+    try:
+        while True:
+            try:
+                handle, url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if page.is_closed():
+                page = await context.new_page()
+            async with limiter(url):
+                record, complete = await crawl_product(page, fetch_client, handle, url, counts)
+            if complete:
+                journal.record(handle, record)
+            else:
+                incomplete[handle] = record  # used for this run's output, retried on resume
+            counts["done"] += 1
+            print(f"({counts['done']}/{counts['handles']}) 🔎 {handle}")
+    finally:
+        await context.close()
+
+
+async def crawl(fetch_client, journal, workers=WORKERS, per_host=PER_HOST_CONCURRENCY, headed=not HEADLESS,
+                stats=None):
+    """
+    Returns ({category: cards}, bestseller cards, {handle: incomplete product record}, counts).
+    Finished product records are in the journal; handles already in it are not crawled again.
+    """
+    counts = {"collection_pages": 0, "product_pages": 0, "json_fetches": 0, "handles": 0, "done": 0}
+    async with async_browser_session(headless=not headed, stats=stats) as new_context:
+        context = await new_context()
+        page = await context.new_page()
+        collections = {}
+        for category, url in COLLECTIONS.items():
+            print(f"\n📦 Collection: {category}")
+            collections[category] = await crawl_collection(page, url, counts)
+        print("\n🏆 Bestsellers")
+        bestsellers = await crawl_collection(page, BESTSELLERS_URL, counts)
+        await context.close()
+
+        # Every product page once, however many collections list it
+        queue = asyncio.Queue()
+        seen = set()
+        for card in [c for cards in collections.values() for c in cards] + bestsellers:
+            handle = card["handle"]
+            if not handle or handle in seen:
+                continue
+            seen.add(handle)
+            if handle in journal:
+                counts["done"] += 1
+            else:
+                queue.put_nowait((handle, card["product_url"]))
+        counts["handles"] = len(seen)
+        if counts["done"]:
+            print(f"\n📒 Resuming: {counts['done']} of {len(seen)} products already in {journal.path}")
+        print(f"\n🚀 {queue.qsize()} unique products with {workers} workers")
+
+        incomplete = {}
+        limiter = HostLimiter(per_host)
+        await asyncio.gather(*[
+            product_worker(new_context, fetch_client, queue, limiter, journal, incomplete, counts)
+            for _ in range(max(1, min(workers, queue.qsize())))
+        ])
+    return collections, bestsellers, incomplete, counts
+
+
+# ============ OUTPUT ============
+
+def write_outputs(collections, bestsellers, journal, incomplete):
+    """
+    The CSVs the separate scrapers wrote (plus Parquet), streamed from the
+    journal one product at a time. Returns (collection rows, variant rows).
+    """
+    collection_writer = StreamWriter(COLLECTIONS_CSV, COLLECTION_SCHEMA)
+    detailed_writer = StreamWriter(DETAILED_CSV, DETAILED_SCHEMA)
+    variant_writer = StreamWriter(VARIANTS_CSV, VARIANT_SCHEMA)
+    review_writer = StreamWriter(REVIEWS_CSV, REVIEW_SCHEMA)
+    bestseller_writer = StreamWriter(BESTSELLERS_CSV, BESTSELLER_SCHEMA)
+
+    def product_record(handle):
+        return journal.get(handle) or incomplete.get(handle, {})
+
+    for category, cards in collections.items():
+        for card in cards:
+            product = product_record(card["handle"])
+            row = {
+                "category": category,
+                "name": card["name"],
+                "product_url": card["product_url"],
+                "image_url": card["image_url"],
+                "price": card["price"],
+                **{field: product.get(field, "N/A") for field in DETAIL_FIELDS},
+            }
+            collection_writer.write(row)  # Detail fields are not in its schema
+            detailed_writer.write(row)
+            if not product.get("product_json"):
+                continue
+            for variant in variant_records(product["product_json"], card["handle"], category, card["product_url"]):
+                variant_writer.write(variant)
+                review_writer.write({
+                    "category": category,
+                    "product_rank": card["rank"],
+                    "product_name": card["name"],
+                    "variant_title": variant["variant_title"],
+                    "variant_id": variant["variant_id"],
+                    "variant_url": f"{card['product_url']}?variant={variant['variant_id']}",
+                    "image_url": card["image_url"],
+                    "price": card["price_text"],
+                    "rating": product["rating"],
+                    "review_count": product["review_count"],
+                })
+
+    for card in bestsellers:
+        product = product_record(card["handle"])
+        bestseller_writer.write({
+            "bestseller_rank": card["rank"],
+            "product_name": card["name"],
+            "product_url": card["product_url"],
+            "image_url": card["image_url"],
+            "price": card["price_text"],
+            "rating": product.get("rating", "N/A"),
+            "review_count": product.get("review_count", "N/A"),
+        })
+
+    for writer in (collection_writer, detailed_writer, variant_writer, review_writer, bestseller_writer):
+        writer.close()
+        print(f"💾 {writer}")
+    return collection_writer.rows, variant_writer.rows
+
+
+def separate_scraper_loads(bestsellers, counts, collection_rows, variant_rows):
+    """Page loads and JSON fetches the five separate scrapers would make for the same catalog."""
+    page_loads = (
+        counts["collection_pages"]         # rare_beauty_scraper.py
+        + 1 + len(bestsellers)             # rare_beauty_bestsellers.py
+        + len(COLLECTIONS) + variant_rows  # scrape_reviews.py: one page per variant
+        + collection_rows                  # rare_beauty_product_details.py
+    )
+    json_fetches = 2 * collection_rows     # rare_beauty_variant_scraper.py + scrape_reviews.py
+    return page_loads, json_fetches
+
+
+def crawl_catalog(workers=WORKERS, per_host=PER_HOST_CONCURRENCY, headed=not HEADLESS, fresh=False):
+    stats = TransferStats()
+    fetch_client = FetchClient()
+    journal = CrawlJournal(JOURNAL_NAME, fresh=fresh)
+    start = time.perf_counter()
+    collections, bestsellers, incomplete, counts = asyncio.run(
+        crawl(fetch_client, journal, workers, per_host, headed, stats)
+    )
+    elapsed = time.perf_counter() - start
+    fetch_client.close()
+
+    collection_rows, variant_rows = write_outputs(collections, bestsellers, journal, incomplete)
+    journal.close(complete=not incomplete)
+    old_pages, old_json = separate_scraper_loads(bestsellers, counts, collection_rows, variant_rows)
+    page_loads = counts["collection_pages"] + counts["product_pages"]
+
+    print(f"\n⏱️  Crawl finished in {elapsed:.1f}s")
+    print(f"   Page loads: {page_loads} ({counts['collection_pages']} collection, {counts['product_pages']} product); "
+          f"separate scrapers: ~{old_pages}")
+    print(f"   Variant JSON fetches: {counts['json_fetches']} ({fetch_client}); separate scrapers: ~{old_json}")
+    print(f"   Variants: {variant_rows} across {counts['handles']} products")
+    print(f"📶 Network: {stats}")
+    if fetch_client.cache is not None:
+        print(f"🗄️  HTTP cache: {fetch_client.cache}")
+    print("\n✅ Crawl complete. Run scraper/merge_rare_beauty.py to build the master CSV.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl the Rare Beauty catalog in one pass")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Product pages crawled concurrently")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_CONCURRENCY,
+                        help="Max concurrent page loads per host")
+    parser.add_argument("--headed", action="store_true", default=not HEADLESS, help="Show the browser window")
+    parser.add_argument("--fresh", action="store_true", help="Discard an interrupted crawl's journal and start over")
+    args = parser.parse_args()
+
+    crawl_catalog(args.workers, args.per_host, args.headed, args.fresh)
@@ -1,121 +1,230 @@
-from playwright.sync_api import sync_playwright
+"""
+Scrape description, ingredients, shades and finish for every product in
+data/rare_beauty_collections.csv.
+
+Pages are crawled concurrently by a pool of headless browser pages (one
+context each) that take URLs from a shared queue, with at most
+--per-host pages loading from the same host at once. Images, fonts and
+trackers are blocked (see browser_session.py), and each page is read as
+soon as its description is in the DOM. Each product URL is crawled
+once, even if several collections list it.
+
+Every finished product is appended to the crawl journal
+(crawl_journal.py) as soon as it completes, and an interrupted run
+resumes where it stopped. When the crawl ends the output is materialized
+from the journal in the collection CSV's row order, streamed to the CSV
+and a Parquet dataset in row groups (stream_writer.py); products that
+failed are N/A.
+
+Run: python scraper/rare_beauty_product_details.py --workers 8
+     python scraper/rare_beauty_product_details.py --workers 1 --headed --slow-mo 150
+     python scraper/rare_beauty_product_details.py --fresh  # ignore an interrupted run
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from urllib.parse import urlparse
+
 import pandas as pd
+import pyarrow as pa
 
-def scrape_product_details():
-    df = pd.read_csv("data/rare_beauty_collections.csv")
-
-    descriptions = []
-    ingredients = []
-    shades = []
-    finishes = []
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=150)
-        page = browser.new_page()
-
-        for idx, row in df.iterrows():
-            url = row["product_url"]
-            print(f"\n({idx+1}/{len(df)}) 🔎 Scraping details for: {url}")
-            
-            if not isinstance(url, str) or not url.startswith("http"):
-                descriptions.append("N/A")
-                ingredients.append("N/A")
-                shades.append("N/A")
-                finishes.append("N/A")
-                continue
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scraper.browser_session import HEADLESS, TransferStats, async_browser_session, async_goto
+from scraper.crawl_journal import CrawlJournal
+from scraper.rare_beauty_scraper import COLLECTION_SCHEMA
+from scraper.stream_writer import StreamWriter
+
+INPUT_CSV = "data/rare_beauty_collections.csv"
+OUTPUT_CSV = "data/rare_beauty_detailed.csv"
+JOURNAL_NAME = "rare_beauty_product_details"
+
+WORKERS = int(os.getenv("SCRAPER_WORKERS", "4"))  # Browser pages crawling at once
+PER_HOST_CONCURRENCY = int(os.getenv("SCRAPER_PER_HOST", "4"))  # Pages loading from one host at once
+PAGE_TIMEOUT_MS = 30000
+DETAIL_SELECTOR = "p.pv-extra-details__section-description, section.pv-details p"
+
+DETAIL_FIELDS = ["description", "ingredients", "shades", "finish"]
+MISSING = {field: "N/A" for field in DETAIL_FIELDS}
+DETAILED_SCHEMA = pa.schema(list(COLLECTION_SCHEMA) + [pa.field(field, pa.string()) for field in DETAIL_FIELDS])
+
+
+# ============ EXTRACTION ============
+
+async def extract_details(page):
+    """Description, ingredients, shades and finish from a loaded product page."""
+    # description
+    try:
+        long_desc = await page.query_selector("p.pv-extra-details__section-description")
+        if long_desc:
+            description = (await long_desc.inner_text()).strip()
+        else:
+            short_desc = await page.query_selector("section.pv-details p")
+            description = (await short_desc.inner_text()).strip() if short_desc else "N/A"
+    except Exception:
+        description = "N/A"
+
+    # ingredients
+    try:
+        ingredient_button = await page.query_selector("button[aria-label='Ingredients']")
+        if ingredient_button:
+            await ingredient_button.click()
+            await page.wait_for_selector("div.modal_content", timeout=7000)
+            ingredient_box = await page.query_selector("div.modal_content")
+            ingredients_text = (await ingredient_box.inner_text()).strip() if ingredient_box else "N/A"
+            close_btn = await page.query_selector("button.modal__Close")
+            if close_btn:
+                await close_btn.click()
+        else:
+            ingredients_text = "N/A"
+    except Exception as e:
+        print(f"⚠️ Could not get ingredients: {e}")
+        ingredients_text = "N/A"
+
+    # shades (just collect shade names)
+    try:
+        shade_list = []
+        for s in await page.query_selector_all("ul.config__options--shade li.config__option"):
+            input_el = await s.query_selector("input")
+            if input_el:
+                val = await input_el.get_attribute("value")
+                if val:
+                    shade_list.append(val.strip())
+            label_el = await s.query_selector("label")
+            if label_el:
+                label_val = (await label_el.inner_text()).strip()
+                if label_val and label_val not in shade_list:
+                    shade_list.append(label_val)
+        shade_text = ", ".join(shade_list) if shade_list else "N/A"
+    except Exception:
+        shade_text = "N/A"
+
+    # finish / claims
+    try:
+        finish_elements = await page.query_selector_all("div.pv-extra-details_claims-features-wrapper p")
+        finish_list = [(await f.inner_text()).strip() for f in finish_elements]
+        finish_text = ", ".join(finish_list) if finish_list else "N/A"
+    except Exception:
+        finish_text = "N/A"
+
+    return {"description": description, "ingredients": ingredients_text, "shades": shade_text, "finish": finish_text}
+
+
+async def scrape_product(page, url):
+    """Details of one product page, or None if it did not load."""
+    try:
+        await async_goto(page, url, DETAIL_SELECTOR, timeout=PAGE_TIMEOUT_MS)
+    except Exception as e:
+        print(f"⚠️ Could not load page {url}: {e}")
+        return None
+    return await extract_details(page)
+
+
+# ============ CRAWLER ============
+
+class HostLimiter:
+    """One semaphore per host, so no host sees more than `limit` page loads at once."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._semaphores = {}
+
+    def __call__(self, url):
+        host = urlparse(url).netloc
+        if host not in self._semaphores:
+            self._semaphores[host] = asyncio.Semaphore(self.limit)
+        return self._semaphores[host]
+
+
+async def crawl_worker(new_context, queue, limiter, on_result, progress):
+    context = await new_context()
+    page = await context.new_page()
+    try:
+        while True:
             try:
-                page.goto(url, timeout=30000)
-                page.wait_for_load_state("domcontentloaded")
-            except Exception as e:
-                print(f"⚠️ Could not load page: {e}")
-                descriptions.append("N/A")
-                ingredients.append("N/A")
-                shades.append("N/A")
-                finishes.append("N/A")
-                continue
-
-            # description
-            try:
-                long_desc = page.query_selector("p.pv-extra-details__section-description")
-                if long_desc:
-                    description = long_desc.inner_text().strip()
-                else:
-                    short_desc = page.query_selector("section.pv-details p")
-                    description = short_desc.inner_text().strip() if short_desc else "N/A"
-            except:
-                description = "N/A"
-
-            # ingredients
-            try:
-                ingredient_button = page.query_selector("button[aria-label='Ingredients']")
-                if ingredient_button:
-                    ingredient_button.click()
-                    page.wait_for_selector("div.modal_content", timeout=7000)
-                    ingredient_box = page.query_selector("div.modal_content")
-                    ingredients_text = ingredient_box.inner_text().strip() if ingredient_box else "N/A"
-                    close_btn = page.query_selector("button.modal__Close")
-                    if close_btn:
-                        close_btn.click()
-                else:
-                    ingredients_text = "N/A"
-            except Exception as e:
-                print(f"⚠️ Could not get ingredients: {e}")
-                ingredients_text = "N/A"
-
-            # shades (just collect shade names)
-            try:
-                shade_elements = page.query_selector_all("ul.config__options--shade li.config__option")
-                shade_list = []
-                for s in shade_elements:
-                    input_el = s.query_selector("input")
-                    if input_el:
-                        val = input_el.get_attribute("value")
-                        if val:
-                            shade_list.append(val.strip())
-                    label_el = s.query_selector("label")
-                    if label_el:
-                        label_val = label_el.inner_text().strip()
-                        if label_val and label_val not in shade_list:
-                            shade_list.append(label_val)
-                shade_text = ", ".join(shade_list) if shade_list else "N/A"
-            except:
-                shade_text = "N/A"
-
-            # finish / claims
-            try:
-                finish_elements = page.query_selector_all("div.pv-extra-details_claims-features-wrapper p")
-                finish_list = [f.inner_text().strip() for f in finish_elements] if finish_elements else []
-                finish_text = ", ".join(finish_list) if finish_list else "N/A"
-            except:
-                finish_text = "N/A"
-
-            # store results
-            descriptions.append(description)
-            ingredients.append(ingredients_text)
-            shades.append(shade_text)
-            finishes.append(finish_text)
-
-            # safe checkpoint every 20 products
-            if idx % 20 == 0 and idx > 0:
-                checkpoint_df = df.iloc[:len(descriptions)].copy()
-                checkpoint_df["description"] = descriptions
-                checkpoint_df["ingredients"] = ingredients
-                checkpoint_df["shades"] = shades
-                checkpoint_df["finish"] = finishes
-                checkpoint_df.to_csv("data/rare_beauty_detailed_checkpoint.csv", index=False)
-                print(f"💾 Saved checkpoint at product {idx+1}")
-
-        browser.close()
-
-    # final merge
-    df["description"] = descriptions
-    df["ingredients"] = ingredients
-    df["shades"] = shades
-    df["finish"] = finishes
-
-    df.to_csv("data/rare_beauty_detailed.csv", index=False)
-    print("\n✅ Product detail scraping complete. Saved to data/rare_beauty_detailed.csv")
+                url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            if page.is_closed():  # A crashed page takes no more URLs
+                page = await context.new_page()
+
+            start = time.perf_counter()
+            async with limiter(url):
+                details = await scrape_product(page, url)
+            if details is not None:
+                on_result(url, details)
+
+            progress["done"] += 1
+            print(f"({progress['done']}/{progress['total']}) 🔎 {url} ({time.perf_counter() - start:.1f}s)")
+    finally:
+        await context.close()
+
+
+async def crawl(urls, on_result, workers=WORKERS, per_host=PER_HOST_CONCURRENCY, headed=not HEADLESS, slow_mo=0,
+                stats=None):
+    """Scrape urls with a pool of pages, calling on_result(url, details) as each product completes."""
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+
+    limiter = HostLimiter(per_host)
+    progress = {"done": 0, "total": len(urls)}
+
+    async with async_browser_session(headless=not headed, slow_mo=slow_mo, stats=stats) as new_context:
+        await asyncio.gather(*[
+            crawl_worker(new_context, queue, limiter, on_result, progress)
+            for _ in range(max(1, min(workers, len(urls))))
+        ])
+
+
+def scrape_product_details(workers=WORKERS, per_host=PER_HOST_CONCURRENCY, headed=not HEADLESS, slow_mo=0,
+                           fresh=False):
+    rows = pd.read_csv(INPUT_CSV).to_dict("records")
+    urls = list(dict.fromkeys(
+        row["product_url"] for row in rows
+        if isinstance(row["product_url"], str) and row["product_url"].startswith("http")
+    ))
+
+    journal = CrawlJournal(JOURNAL_NAME, fresh=fresh)
+    pending = [url for url in urls if url not in journal]
+    if journal.resumed:
+        print(f"📒 Resuming: {len(urls) - len(pending)} of {len(urls)} products already in {journal.path}")
+
+    print(f"🚀 Scraping {len(pending)} product pages with {workers} workers "
+          f"(max {per_host} per host, {'headed' if headed else 'headless'})")
+    stats = TransferStats()
+    start = time.perf_counter()
+    if pending:
+        asyncio.run(crawl(pending, journal.record, workers, per_host, headed, slow_mo, stats))
+    elapsed = time.perf_counter() - start
+    print(f"\n⏱️  {len(pending)} pages in {elapsed:.1f}s ({len(pending) / elapsed if elapsed else 0:.2f} pages/s)")
+    print(f"📶 Network: {stats}")
+
+    # Same row order as the collection CSV; failed pages (retried on resume) and rows without a URL are N/A
+    writer = StreamWriter(OUTPUT_CSV, DETAILED_SCHEMA)
+    for row in rows:
+        writer.write({**row, **journal.get(row["product_url"], MISSING)})
+    writer.close()
+
+    failed = [url for url in urls if url not in journal]
+    if failed:
+        print(f"⚠️ {len(failed)} product pages failed and are N/A")
+    journal.close(complete=not failed)
+    print(f"\n✅ Product detail scraping complete. {writer}")
+
 
 if __name__ == "__main__":
-    scrape_product_details()
+    parser = argparse.ArgumentParser(description="Scrape Rare Beauty product details")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Browser pages crawling concurrently")
+    parser.add_argument("--per-host", type=int, default=PER_HOST_CONCURRENCY,
+                        help="Max concurrent page loads per host")
+    parser.add_argument("--headed", action="store_true", default=not HEADLESS, help="Show the browser window")
+    parser.add_argument("--slow-mo", type=int, default=0, help="Delay (ms) between browser actions")
+    parser.add_argument("--fresh", action="store_true", help="Discard an interrupted run's journal and start over")
+    args = parser.parse_args()
+
+    scrape_product_details(args.workers, args.per_host, args.headed, args.slow_mo, args.fresh)
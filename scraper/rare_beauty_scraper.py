@@ -1,8 +1,37 @@
-from playwright.sync_api import sync_playwright
-import pandas as pd
+# Each finished collection page's products go to the crawl journal
+# (crawl_journal.py); an interrupted run resumes with the pages it has not
+# finished. The journal is only removed once every collection was paged
+# through to an empty page, not a timeout or error. --fresh starts over.
+# When the crawl ends, rows are streamed from the journal to the CSV and a
+# Parquet dataset in collection and page order, in row groups
+# (stream_writer.py).
+
+import argparse
+import os
 import re
+import sys
 
-def scrape_rare_beauty_collections():
+import pyarrow as pa
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.browser_session import NAVIGATION_TIMEOUT_MS, TransferStats, browser_session, goto
+from scraper.crawl_journal import CrawlJournal
+from scraper.stream_writer import StreamWriter
+
+OUTPUT_CSV = "data/rare_beauty_collections.csv"
+JOURNAL_NAME = "rare_beauty_scraper"
+
+COLLECTION_SCHEMA = pa.schema([
+    ("category", pa.string()),
+    ("name", pa.string()),
+    ("product_url", pa.string()),
+    ("image_url", pa.string()),
+    ("price", pa.string()),
+])
+
+def scrape_rare_beauty_collections(fresh=False):
     collections = {
         "face": "https://www.rarebeauty.com/collections/face",
         "lips": "https://www.rarebeauty.com/collections/lip",
@@ -12,11 +41,16 @@ def scrape_rare_beauty_collections():
         "online_only": "https://www.rarebeauty.com/collections/online-only",
     }
 
-    all_data = []
+    stats = TransferStats()
+    journal = CrawlJournal(JOURNAL_NAME, fresh=fresh)
+    if journal.resumed:
+        print(f"📒 Resuming: {journal.resumed} collection pages already in {journal.path}")
+    visited = []  # page urls in collection and page order
+
+    failed = []  # categories whose pagination ended on a timeout or error rather than an empty page
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=200)
-        page = browser.new_page()
+    with browser_session(stats=stats) as context:
+        page = context.new_page()
 
         for category, base_url in collections.items():
             print(f"\n🔎 Scraping category: {category}")
@@ -24,21 +58,32 @@ def scrape_rare_beauty_collections():
 
             for page_num in range(1, 10):
                 url = f"{base_url}?page={page_num}"
+                visited.append(url)
+                if url in journal:
+                    category_product_count += len(journal.get(url))
+                    continue
                 print(f"👉 Visiting: {url}")
-                page.goto(url, timeout=60000)
-
                 try:
-                    page.wait_for_selector("div.collection-grid__item", timeout=5000)
-                except Exception:
-                    print(f"🚫 No products on {url}, moving on...")
+                    if not goto(page, url, "div.collection-grid__item", selector_timeout=5000):
+                        # No grid yet: past the last page, or still rendering. Only a fully loaded page counts as empty
+                        page.wait_for_load_state("load", timeout=NAVIGATION_TIMEOUT_MS)
+                except Exception as e:
+                    print(f"❌ Error loading {url}: {e}")
+                    failed.append(category)
                     break
 
                 product_cards = page.query_selector_all("div.collection-grid__item")
                 print(f"🛒 Found {len(product_cards)} products on page {page_num}")
 
                 if not product_cards:
-                    break  # no products
+                    if page_num == 1:  # Every collection has products on its first page
+                        print(f"⚠️ No products on {url}, will retry on resume")
+                        failed.append(category)
+                    else:
+                        print(f"🚫 No products on {url}, moving on...")
+                    break
 
+                page_data = []
                 for product in product_cards:
                     name_element = product.query_selector("h3.pi__title a")
                     name = name_element.inner_text().strip() if name_element else ""
@@ -63,7 +108,7 @@ def scrape_rare_beauty_collections():
                     else:
                         price = ""
 
-                    all_data.append({
+                    page_data.append({
                         "category": category,
                         "name": name,
                         "product_url": link,
@@ -74,11 +119,22 @@ def scrape_rare_beauty_collections():
                     category_product_count += 1
                     print(f"➡️ [{category}] Collected {category_product_count} products")
 
-        browser.close()
+                journal.record(url, page_data)
 
-    df = pd.DataFrame(all_data)
-    df.to_csv("data/rare_beauty_collections.csv", index=False)
-    print("\n✅ All done! Data saved to data/rare_beauty_collections.csv")
+    print(f"📶 Network: {stats}")
+
+    # Same order whether or not the run was resumed
+    writer = StreamWriter(OUTPUT_CSV, COLLECTION_SCHEMA)
+    writer.write_many(row for url in visited if url in journal for row in journal.get(url))
+    writer.close()
+    if failed:
+        print(f"⚠️ Pagination did not finish for: {', '.join(failed)}")
+    journal.close(complete=not failed)
+    print(f"\n✅ All done! {writer}")
 
 if __name__ == "__main__":
-    scrape_rare_beauty_collections()
+    parser = argparse.ArgumentParser(description="Scrape every Rare Beauty collection")
+    parser.add_argument("--fresh", action="store_true", help="Discard an interrupted run's journal and start over")
+    args = parser.parse_args()
+
+    scrape_rare_beauty_collections(args.fresh)
@@ -1,12 +1,54 @@
-import pandas as pd
-import requests
+import os
+import sys
+import time
 from urllib.parse import urlparse
 
+import pandas as pd
+import pyarrow as pa
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.fetch_client import FetchClient, product_json_url
+from scraper.stream_writer import StreamWriter
+
+OUTPUT_CSV = "data/rare_beauty_variants.csv"
+
+VARIANT_SCHEMA = pa.schema([
+    ("category", pa.string()),
+    ("product_name", pa.string()),
+    ("handle", pa.string()),
+    ("variant_id", pa.int64()),
+    ("variant_title", pa.string()),
+    ("variant_price", pa.float64()),
+    ("variant_available", pa.bool_()),
+    ("variant_sku", pa.string()),
+    ("variant_image", pa.string()),
+    ("product_url", pa.string()),
+])
+
+def variant_records(data, handle, category, product_url):
+    """One row per variant of a Shopify /products/{handle}.js payload."""
+    records = []
+    for variant in data.get("variants", []):
+        records.append({
+            "category": category,
+            "product_name": data.get("title", "N/A"),
+            "handle": handle,
+            "variant_id": variant.get("id"),
+            "variant_title": variant.get("public_title") or variant.get("title"),
+            "variant_price": variant.get("price")/100 if variant.get("price") else "N/A",
+            "variant_available": variant.get("available"),
+            "variant_sku": variant.get("sku"),
+            "variant_image": variant.get("featured_image", {}).get("src") if variant.get("featured_image") else data.get("featured_image"),
+            "product_url": product_url,
+        })
+    return records
+
 def scrape_shopify_variants():
     df = pd.read_csv("data/rare_beauty_collections.csv")
 
-    variant_data = []
-
+    listings = {}  # json url -> [(category, product_url, handle)]
     for idx, row in df.iterrows():
         product_url = row["product_url"]
         category = row["category"]
@@ -22,39 +64,31 @@ def scrape_shopify_variants():
             print(f"⚠️ could not parse handle from {product_url}: {e}")
             continue
 
-        json_url = f"https://www.rarebeauty.com/products/{handle}.js"
-        print(f"\n({idx+1}/{len(df)}) 🟢 Fetching variants from: {json_url}")
+        listings.setdefault(product_json_url(handle), []).append((category, product_url, handle))
 
-        try:
-            response = requests.get(json_url)
-            if response.status_code != 200:
-                print(f"❌ Could not fetch JSON for {handle}")
-                continue
-
-            data = response.json()
-
-            for variant in data.get("variants", []):
-                variant_data.append({
-                    "category": category,
-                    "product_name": data.get("title", "N/A"),
-                    "handle": handle,
-                    "variant_id": variant.get("id"),
-                    "variant_title": variant.get("public_title") or variant.get("title"),
-                    "variant_price": variant.get("price")/100 if variant.get("price") else "N/A",
-                    "variant_available": variant.get("available"),
-                    "variant_sku": variant.get("sku"),
-                    "variant_image": variant.get("featured_image", {}).get("src") if variant.get("featured_image") else data.get("featured_image"),
-                    "product_url": product_url,
-                })
+    # one concurrent fetch per handle, even if it is listed in several categories;
+    # rows are streamed out as each product's JSON arrives
+    client = FetchClient()
+    writer = StreamWriter(OUTPUT_CSV, VARIANT_SCHEMA)
+    print(f"🟢 Fetching variants for {len(listings)} products ({client.concurrency} at a time)")
 
-        except Exception as e:
-            print(f"⚠️ Error on {json_url}: {e}")
+    fetched = 0
+    start = time.perf_counter()
+    for done, (json_url, data, error) in enumerate(client.get_json_many(listings), start=1):
+        if error is not None:
+            print(f"❌ Could not fetch JSON from {json_url}: {error}")
             continue
+        fetched += 1
+        for category, product_url, handle in listings[json_url]:
+            writer.write_many(variant_records(data, handle, category, product_url))
+        print(f"({done}/{len(listings)}) ✅ {json_url}")
+    client.close()
+    writer.close()
+    print(f"⏱️  {fetched}/{len(listings)} products in {time.perf_counter() - start:.1f}s ({client})")
+    if client.cache is not None:
+        print(f"🗄️  HTTP cache: {client.cache}")
 
-    # save results
-    out_df = pd.DataFrame(variant_data)
-    out_df.to_csv("data/rare_beauty_variants.csv", index=False)
-    print("\n✅ Saved all variants to data/rare_beauty_variants.csv")
+    print(f"\n✅ Saved all variants: {writer}")
 
 if __name__ == "__main__":
     scrape_shopify_variants()
@@ -0,0 +1,81 @@
+"""
+Per-product rating cache for the review scraper.
+
+The rating/review-count widget is product-level, so ratings are fetched
+once per handle and fanned out to its variants. Records are stored in
+SQLite keyed by handle along with the time they were fetched, and
+re-runs skip handles fetched within RATING_CACHE_TTL_HOURS.
+
+A handle is marked variant_specific only after one of its variant pages
+showed different numbers from the product page. Only then are its
+variant pages loaded, and their ratings are stored with the handle.
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+RATING_CACHE_FILE = os.getenv("RATING_CACHE_FILE", "data/rating_cache.sqlite")
+RATING_CACHE_TTL_HOURS = float(os.getenv("RATING_CACHE_TTL_HOURS", "24"))
+
+
+class RatingCache:
+    """SQLite-backed {handle: ratings} store with a time-to-live."""
+
+    def __init__(self, path=RATING_CACHE_FILE, ttl_hours=RATING_CACHE_TTL_HOURS):
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS ratings ("
+            " handle TEXT PRIMARY KEY,"
+            " rating TEXT,"
+            " review_count TEXT,"
+            " variant_specific INTEGER NOT NULL,"
+            " variants TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, handle):
+        """The cached record for handle, or None if missing or older than the TTL."""
+        row = self._conn.execute(
+            "SELECT rating, review_count, variant_specific, variants, fetched_at FROM ratings WHERE handle = ?",
+            (handle,)
+        ).fetchone()
+        if row is None or time.time() - row[4] > self.ttl_seconds:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {
+            "rating": row[0],
+            "review_count": row[1],
+            "variant_specific": bool(row[2]),
+            "variants": json.loads(row[3]),
+        }
+
+    def put(self, handle, rating, review_count, variant_specific=False, variants=None):
+        """variants: {variant_id: {"rating", "review_count"}}, only for variant-specific handles."""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO ratings (handle, rating, review_count, variant_specific, variants, fetched_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (handle, rating, review_count, int(variant_specific),
+             json.dumps({str(k): v for k, v in (variants or {}).items()}), time.time())
+        )
+        self._conn.commit()
+
+    def ratings_for(self, record, variant_id):
+        """(rating, review_count) of one variant: its own if variant-specific, else the product's."""
+        own = record["variants"].get(str(variant_id)) if record["variant_specific"] else None
+        source = own or record
+        return source["rating"], source["review_count"]
+
+    def close(self):
+        self._conn.close()
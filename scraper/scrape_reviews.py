@@ -1,11 +1,110 @@
 # scrape_all_collections_reviews.py
-
-from playwright.sync_api import sync_playwright
-import pandas as pd
+#
+# Each finished product's variant rows go to the crawl journal
+# (crawl_journal.py); an interrupted run resumes with the products it has
+# not finished. --fresh starts over. When the crawl ends, rows are
+# streamed from the journal to the CSV and a Parquet dataset in collection
+# and rank order, in row groups (stream_writer.py).
+
+import argparse
+import os
 import re
-import requests
-
-def scrape_all_collections_reviews():
+import sys
+
+import pyarrow as pa
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper.browser_session import TransferStats, browser_session, goto
+from scraper.crawl_journal import CrawlJournal
+from scraper.fetch_client import FetchClient, product_json_url
+from scraper.rating_cache import RatingCache
+from scraper.stream_writer import StreamWriter
+
+# The rating/review widget renders after DOMContentLoaded
+REVIEW_SELECTOR = "a[aria-label*='reviews']"
+
+OUTPUT_CSV = "data/rare_beauty_all_reviews_by_variant.csv"
+JOURNAL_NAME = "scrape_reviews"
+
+REVIEW_SCHEMA = pa.schema([
+    ("category", pa.string()),
+    ("product_rank", pa.int64()),
+    ("product_name", pa.string()),
+    ("variant_title", pa.string()),
+    ("variant_id", pa.int64()),
+    ("variant_url", pa.string()),
+    ("image_url", pa.string()),
+    ("price", pa.string()),
+    ("rating", pa.float64()),
+    ("review_count", pa.int64()),
+])
+
+def extract_rating(page):
+    """(rating, review_count) from the review widget of a loaded page."""
+    rating = "N/A"
+    review_count = "N/A"
+
+    # star rating
+    try:
+        rating_element = page.query_selector("span.sr-only")
+        if rating_element:
+            text = rating_element.inner_text()
+            match = re.search(r"(\d\.\d+) star", text)
+            rating = match.group(1) if match else "N/A"
+    except:
+        rating = "N/A"
+
+    # review count
+    try:
+        review_element = page.query_selector(REVIEW_SELECTOR)
+        if review_element:
+            review_text = review_element.inner_text()
+            review_count_match = re.search(r"(\d+)", review_text)
+            review_count = review_count_match.group(1) if review_count_match else "N/A"
+    except:
+        review_count = "N/A"
+
+    return rating, review_count
+
+def load_rating(page, url):
+    goto(page, url, REVIEW_SELECTOR)
+    return extract_rating(page)
+
+def fetch_product_ratings(page, link, variants):
+    """
+    Ratings for one product: the product page once, plus one probe of a
+    non-default variant. Every variant page is loaded only if the probe
+    shows variant-specific numbers. Raises if the product page fails, so
+    nothing is cached for it.
+    """
+    rating, review_count = load_rating(page, link)
+    record = {"rating": rating, "review_count": review_count, "variant_specific": False, "variants": {}}
+    if len(variants) < 2:
+        return record
+
+    probe_url = f"{link}?variant={variants[1].get('id')}"
+    try:
+        if load_rating(page, probe_url) == (rating, review_count):
+            return record
+    except Exception as e:
+        print(f"⚠️ Could not probe {probe_url}, using product-level reviews: {e}")
+        return record
+
+    print(f"🔀 {link} has variant-specific reviews, loading every variant")
+    record["variant_specific"] = True
+    for variant in variants:
+        variant_id = variant.get("id")
+        try:
+            variant_rating, variant_count = load_rating(page, f"{link}?variant={variant_id}")
+        except Exception as e:
+            print(f"⚠️ Could not get reviews for variant {variant_id}: {e}")
+            variant_rating, variant_count = "N/A", "N/A"
+        record["variants"][str(variant_id)] = {"rating": variant_rating, "review_count": variant_count}
+    return record
+
+def scrape_all_collections_reviews(fresh=False):
     collections = {
         "face": "https://www.rarebeauty.com/collections/face",
         "lips": "https://www.rarebeauty.com/collections/lip",
@@ -15,25 +114,29 @@ def scrape_all_collections_reviews():
         "online_only": "https://www.rarebeauty.com/collections/online-only",
     }
 
-    all_data = []
+    stats = TransferStats()
+    rating_cache = RatingCache()
+    fetch_client = FetchClient()
+    journal = CrawlJournal(JOURNAL_NAME, fresh=fresh)
+    if journal.resumed:
+        print(f"📒 Resuming: {journal.resumed} products already in {journal.path}")
+    ranked = []  # journal keys in collection and rank order
+    failed = 0
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=False, slow_mo=100)
-        page = browser.new_page()
+    with browser_session(stats=stats) as context:
+        page = context.new_page()
+        rating_page = context.new_page()  # product pages; page keeps the collection grid
 
         for category, url in collections.items():
             print(f"📦 Scraping category: {category} → {url}")
-            page.goto(url, timeout=60000)
-            page.wait_for_load_state("domcontentloaded")
-            try:
-                page.wait_for_selector("div.collection-grid__item", timeout=10000)
-            except:
+            if not goto(page, url, "div.collection-grid__item"):
                 print(f"🚫 No products found for {category}, skipping...")
                 continue
 
             products = page.query_selector_all("div.collection-grid__item")
             print(f"🛒 Found {len(products)} products in {category}")
 
+            cards = []
             for idx, product in enumerate(products, start=1):
                 name_element = product.query_selector("h3.pi__title a")
                 name = name_element.inner_text().strip() if name_element else ""
@@ -46,56 +149,48 @@ def scrape_all_collections_reviews():
                 image_url = image_element.get_attribute("src") if image_element else ""
                 price_element = product.query_selector("button.pi__quick-add")
                 price = price_element.inner_text().strip().replace("\n", " ") if price_element else ""
+                handle = link.split("/products/")[1].split("?")[0] if "/products/" in link else None
+                # journal key: a product listed in several collections gets rows in each
+                key = f"{category} {link}"
+                ranked.append(key)
+                if key not in journal:
+                    cards.append((idx, name, link, image_url, price, handle, key))
+
+            # now get variants for every unfinished product of the collection using the .js endpoint, concurrently
+            json_urls = [product_json_url(card[5]) for card in cards if card[5]]
+            product_jsons = {}
+            for json_url, data, error in fetch_client.get_json_many(json_urls):
+                if error is not None:
+                    print(f"⚠️ Could not get variants JSON from {json_url}: {error}")
+                else:
+                    product_jsons[json_url] = data
+
+            for idx, name, link, image_url, price, handle, key in cards:
+                if handle and product_json_url(handle) not in product_jsons:
+                    failed += 1  # not journaled, so retried on resume
+                    continue
+                product_json = product_jsons.get(product_json_url(handle)) or {}
+                variants = product_json.get("variants", [])
+
+                # ratings are product-level: fetched once per handle (or taken from the cache)
+                ratings = rating_cache.get(handle) if variants else None
+                if variants and ratings is None:
+                    try:
+                        ratings = fetch_product_ratings(rating_page, link, variants)
+                        rating_cache.put(handle, **ratings)
+                    except Exception as e:
+                        print(f"⚠️ Could not get reviews for {name}, retried on resume: {e}")
+                        failed += 1
+                        continue
 
-                # now get variants for each product using .js endpoint
-                try:
-                    handle = link.split("/products/")[1].split("?")[0]
-                    json_url = f"https://www.rarebeauty.com/products/{handle}.js"
-                    product_json = requests.get(json_url).json()
-                    variants = product_json.get("variants", [])
-                except Exception as e:
-                    print(f"⚠️ Could not get variants JSON for {name}: {e}")
-                    variants = []
-
-                # loop over each variant to get its URL and reviews
+                rows = []
                 for variant in variants:
                     variant_id = variant.get("id")
                     variant_title = variant.get("public_title") or variant.get("title")
                     variant_url = f"{link}?variant={variant_id}"
+                    rating, review_count = rating_cache.ratings_for(ratings, variant_id)
 
-                    rating = "N/A"
-                    review_count = "N/A"
-
-                    try:
-                        variant_page = browser.new_page()
-                        variant_page.goto(variant_url, timeout=60000)
-                        variant_page.wait_for_load_state("domcontentloaded")
-
-                        # star rating
-                        try:
-                            rating_element = variant_page.query_selector("span.sr-only")
-                            if rating_element:
-                                text = rating_element.inner_text()
-                                match = re.search(r"(\d\.\d+) star", text)
-                                rating = match.group(1) if match else "N/A"
-                        except:
-                            rating = "N/A"
-
-                        # review count
-                        try:
-                            review_element = variant_page.query_selector("a[aria-label*='reviews']")
-                            if review_element:
-                                review_text = review_element.inner_text()
-                                review_count_match = re.search(r"(\d+)", review_text)
-                                review_count = review_count_match.group(1) if review_count_match else "N/A"
-                        except:
-                            review_count = "N/A"
-
-                        variant_page.close()
-                    except Exception as e:
-                        print(f"⚠️ Could not get reviews for {name} ({variant_title}): {e}")
-
-                    all_data.append({
+                    rows.append({
                         "category": category,
                         "product_rank": idx,
                         "product_name": name,
@@ -107,12 +202,27 @@ def scrape_all_collections_reviews():
                         "rating": rating,
                         "review_count": review_count
                     })
-
-        browser.close()
-
-    df = pd.DataFrame(all_data)
-    df.to_csv("data/rare_beauty_all_reviews_by_variant.csv", index=False)
-    print("✅ All collections + all variants scraped successfully → data/rare_beauty_all_reviews_by_variant.csv")
+                journal.record(key, rows)
+
+    fetch_client.close()
+    print(f"📶 Network: {stats}; variants JSON: {fetch_client}")
+    if fetch_client.cache is not None:
+        print(f"🗄️  HTTP cache: {fetch_client.cache}")
+    print(f"⭐ Rating cache: {rating_cache.hits} handles reused, {rating_cache.misses} fetched")
+    rating_cache.close()
+
+    # Same order whether or not the run was resumed
+    writer = StreamWriter(OUTPUT_CSV, REVIEW_SCHEMA)
+    writer.write_many(row for key in ranked if key in journal for row in journal.get(key))
+    writer.close()
+    if failed:
+        print(f"⚠️ {failed} products failed and are missing from {OUTPUT_CSV}")
+    journal.close(complete=not failed)
+    print(f"✅ All collections + all variants scraped successfully: {writer}")
 
 if __name__ == "__main__":
-    scrape_all_collections_reviews()
+    parser = argparse.ArgumentParser(description="Scrape ratings and review counts for every variant")
+    parser.add_argument("--fresh", action="store_true", help="Discard an interrupted run's journal and start over")
+    args = parser.parse_args()
+
+    scrape_all_collections_reviews(args.fresh)
@@ -0,0 +1,110 @@
+"""
+Streaming output for the scrapers: records go to disk in row groups as
+the crawl runs, instead of one DataFrame built at the end.
+
+1. Each scraper declares a fixed pyarrow schema for its output
+2. Records are buffered up to SCRAPER_ROW_GROUP_SIZE rows, then flushed:
+   appended to the CSV and written as the next part file of a Parquet
+   dataset (data/<name>.parquet/part-00000.parquet, ...)
+3. Every flushed part is a complete Parquet file, so pd.read_parquet() on
+   the directory (or the CSV) works on partial output while the crawl is
+   still running, and memory stays at one row group
+
+The CSV keeps the values exactly as scraped ("N/A" and all; missing values
+as empty fields, as to_csv writes them); the Parquet columns are coerced
+to the schema, with values that do not fit as nulls.
+"""
+
+import csv
+import os
+import shutil
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ROW_GROUP_SIZE = int(os.getenv("SCRAPER_ROW_GROUP_SIZE", "500"))
+
+
+def coerce(value, type_):
+    """A scraped value as the schema type, or None if it does not fit."""
+    if value is None or value != value:  # None or NaN
+        return None
+    try:
+        if pa.types.is_string(type_):
+            return str(value)
+        if pa.types.is_boolean(type_):
+            return value if isinstance(value, bool) else None
+        if pa.types.is_integer(type_):
+            return int(value)
+        if pa.types.is_floating(type_):
+            return float(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
+
+class StreamWriter:
+    """Writes records to a CSV and the matching .parquet dataset, one row group at a time."""
+
+    def __init__(self, csv_path, schema, row_group_size=ROW_GROUP_SIZE):
+        """csv_path: e.g. data/rare_beauty_collections.csv (Parquet: data/rare_beauty_collections.parquet/)."""
+        self.csv_path = csv_path
+        self.parquet_path = os.path.splitext(csv_path)[0] + ".parquet"
+        self.schema = schema
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self.parts = 0
+        self._buffer = []
+
+        directory = os.path.dirname(self.csv_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.isdir(self.parquet_path):
+            shutil.rmtree(self.parquet_path)
+        os.makedirs(self.parquet_path)
+
+        self._csv_file = open(self.csv_path, 'w', newline='', encoding='utf-8')
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=schema.names, extrasaction='ignore', lineterminator='\n')
+        self._csv.writeheader()
+        self._csv_file.flush()
+
+    def write(self, record):
+        self._buffer.append(record)
+        if len(self._buffer) >= self.row_group_size:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """Write the buffered rows as one row group: CSV rows plus one Parquet part file."""
+        if not self._buffer:
+            return
+        # Missing values (None, or NaN from pd.read_csv rows) as empty fields, as DataFrame.to_csv writes them
+        self._csv.writerows(
+            {key: "" if value is None or value != value else value for key, value in record.items()}
+            for record in self._buffer
+        )
+        self._csv_file.flush()
+
+        columns = {
+            field.name: [coerce(record.get(field.name), field.type) for record in self._buffer]
+            for field in self.schema
+        }
+        # Written under a hidden name first: dataset readers skip dotfiles, so they never see a half-written part
+        name = f"part-{self.parts:05d}.parquet"
+        tmp_path = os.path.join(self.parquet_path, f".{name}.tmp")
+        pq.write_table(pa.Table.from_pydict(columns, schema=self.schema), tmp_path)
+        os.replace(tmp_path, os.path.join(self.parquet_path, name))
+
+        self.rows += len(self._buffer)
+        self.parts += 1
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+        self._csv_file.close()
+
+    def __str__(self):
+        return f"{self.rows} rows in {self.parts} row groups → {self.csv_path}, {self.parquet_path}"
@@ -0,0 +1,238 @@
+"""
+Embedding providers shared by ingestion and search.
+
+A provider turns texts into vectors for both the catalog (ingest) and
+queries (search / app). Three are available (EMBEDDING_PROVIDER):
+1. "openai"  - text-embedding-3 over the API (default)
+2. "hashing" - feature hashing of words and character trigrams; no
+               fitting, no network, sub-millisecond per query
+3. "tfidf"   - TF-IDF + truncated SVD fitted on the catalog (scikit-learn),
+               saved next to the local index
+
+Every index records the identity (name, model, dimension, version) of the
+provider that built it, and queries with a different provider are
+refused: vectors from two providers are not comparable.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+
+import numpy as np
+
+try:
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
+except ImportError:
+    TfidfVectorizer = TruncatedSVD = None
+
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "openai")
+PROVIDERS = ["openai", "hashing", "tfidf"]
+PROVIDER_SUBDIR = "provider"  # Fitted provider state, inside the local index directory
+TFIDF_MAX_FEATURES = 200000
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class EmbeddingProviderMismatch(ValueError):
+    """Raised when a query provider differs from the one that built the index."""
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class EmbeddingProvider:
+    """
+    Base class. Subclasses set name/model/version and implement embed().
+    remote providers are called through ingestion's rate limiter and cache.
+    """
+
+    name = None
+    remote = False
+
+    def __init__(self, dimension, model=None, version="1"):
+        self.dimension = dimension
+        self.model = model or self.name
+        self.version = version
+
+    @property
+    def identity(self):
+        return {"name": self.name, "model": self.model, "dimension": self.dimension, "version": self.version}
+
+    def embed(self, texts):
+        """float32 array (len(texts), dimension), L2-normalized."""
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        return self.embed([text])[0]
+
+
+class OpenAIProvider(EmbeddingProvider):
+    name = "openai"
+    remote = True
+
+    def __init__(self, dimension=1536, model="text-embedding-3-small", client=None):
+        super().__init__(dimension, model=model, version=model)
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        return self._client
+
+    def embed(self, texts):
+        # Shares the process-wide OpenAI budget with ingestion and the benchmark
+        from pipelines.rate_limiter import get_rate_limiter
+        from pipelines.token_budget import TokenEstimator
+        texts = list(texts)
+        estimator = TokenEstimator()
+        response = get_rate_limiter("openai").call(
+            lambda: self.client.embeddings.create(model=self.model, input=texts, dimensions=self.dimension),
+            tokens=sum(estimator.count(t) for t in texts)
+        )
+        return _normalize([item.embedding for item in response.data])
+
+
+class HashingProvider(EmbeddingProvider):
+    """
+    Signed feature hashing of word unigrams, bigrams and character
+    trigrams. Deterministic, so any process produces the same vectors.
+    It captures word overlap, not meaning.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimension=512):
+        super().__init__(dimension, model="hashing-w12-c3", version="1")
+
+    @staticmethod
+    def features(text):
+        words = WORD_PATTERN.findall(str(text).lower())
+        features = list(words)
+        features += [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f"#{word}#"
+            features += [padded[i:i + 3] for i in range(len(padded) - 2)]
+        return features
+
+    def _bucket(self, feature):
+        value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+        return value % self.dimension, 1.0 if (value >> 63) & 1 else -1.0
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self.features(text):
+                column, sign = self._bucket(feature)
+                vectors[row, column] += sign
+        return _normalize(vectors)
+
+
+class TfidfSvdProvider(EmbeddingProvider):
+    """
+    TF-IDF over word 1-2 grams reduced with truncated SVD (LSA).
+    Must be fitted on the catalog; its version is a fingerprint of the fitted
+    model, so a refit model never queries an index built by the old one.
+    Fewer SVD components than dimension (small catalogs) are zero-padded.
+    """
+
+    name = "tfidf"
+
+    def __init__(self, dimension=256, vectorizer=None, svd=None, version=None):
+        super().__init__(dimension, model="tfidf-svd", version=version)
+        self.vectorizer = vectorizer
+        self.svd = svd
+
+    @property
+    def fitted(self):
+        return self.svd is not None
+
+    def fit(self, texts):
+        if TfidfVectorizer is None:
+            raise ImportError("The tfidf embedding provider needs scikit-learn: pip install scikit-learn")
+        texts = list(dict.fromkeys(texts))
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True, max_features=TFIDF_MAX_FEATURES)
+        matrix = self.vectorizer.fit_transform(texts)
+        components = max(1, min(self.dimension, matrix.shape[0] - 1, matrix.shape[1] - 1))
+        self.svd = TruncatedSVD(n_components=components, random_state=0).fit(matrix)
+        self.version = hashlib.sha256(pickle.dumps((self.vectorizer.vocabulary_, self.svd.components_))).hexdigest()[:16]
+        return self
+
+    def embed(self, texts):
+        if not self.fitted:
+            raise ValueError("TfidfSvdProvider must be fitted (or loaded) before embedding")
+        reduced = self.svd.transform(self.vectorizer.transform(list(texts)))
+        vectors = np.zeros((len(reduced), self.dimension), dtype=np.float32)
+        vectors[:, :reduced.shape[1]] = reduced
+        return _normalize(vectors)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "tfidf_svd.pkl"), 'wb') as f:
+            pickle.dump((self.vectorizer, self.svd), f)
+        with open(os.path.join(path, "provider.json"), 'w') as f:
+            json.dump(self.identity, f)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        model_path = os.path.join(path, "tfidf_svd.pkl")
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"No fitted tfidf provider at {path}. Run a full ingest with EMBEDDING_PROVIDER=tfidf")
+        with open(os.path.join(path, "provider.json"), 'r') as f:
+            identity = json.load(f)
+        with open(model_path, 'rb') as f:
+            vectorizer, svd = pickle.load(f)
+        return cls(identity["dimension"], vectorizer=vectorizer, svd=svd, version=identity["version"])
+
+
+def get_embedding_provider(name=EMBEDDING_PROVIDER, dimension=1536, model="text-embedding-3-small",
+                           path=None, client=None):
+    """
+    Provider by name. For "tfidf", path is the fitted state directory;
+    it is loaded when present, otherwise an unfitted provider is returned.
+    """
+    if name == "openai":
+        return OpenAIProvider(dimension, model=model, client=client)
+    if name == "hashing":
+        return HashingProvider(dimension)
+    if name == "tfidf":
+        if path and os.path.exists(os.path.join(path, "tfidf_svd.pkl")):
+            return TfidfSvdProvider.load(path)
+        return TfidfSvdProvider(dimension)
+    raise ValueError(f"Unknown embedding provider: {name} (expected one of {PROVIDERS})")
+
+
+def index_provider_identity(info):
+    """Provider identity recorded in a local index's info (older indexes: OpenAI)."""
+    if "provider" in info:
+        return info["provider"]
+    return {"name": "openai", "model": info.get("model"), "dimension": info["dimension"], "version": info.get("model")}
+
+
+def provider_for_index(info, index_path=None, client=None):
+    """Rebuild the provider that built an index, so queries match it."""
+    identity = index_provider_identity(info)
+    state_path = os.path.join(index_path, PROVIDER_SUBDIR) if index_path else None
+    provider = get_embedding_provider(identity["name"], dimension=identity["dimension"],
+                                      model=identity["model"], path=state_path, client=client)
+    check_provider(info, provider)
+    return provider
+
+
+def check_provider(info, provider):
+    """Raise EmbeddingProviderMismatch unless provider built the index described by info."""
+    expected = index_provider_identity(info)
+    if provider.identity != expected:
+        raise EmbeddingProviderMismatch(
+            f"Index was built with {expected['name']} ({expected['model']}, {expected['dimension']}d, "
+            f"version {expected['version']}) but queries use {provider.name} ({provider.model}, "
+            f"{provider.dimension}d, version {provider.version}). Re-ingest or switch EMBEDDING_PROVIDER."
+        )
@@ -0,0 +1,1257 @@
+"""
+Local Semantic Search for Rare Beauty Products
+
+This module:
+1. Stores the vectors written by pipelines/ingest_to_pinecone.py on local disk
+2. Memory-maps them as a float32 matrix at load time
+3. Answers top-k queries with exact cosine similarity (one matrix-vector
+   product + argpartition), so no vector database round trip is needed
+4. Builds an IVF (inverted file) approximate index for catalogs too big
+   for brute force, with nprobe as the recall/latency knob
+5. Exposes a Pinecone-compatible query() so the Streamlit app can swap it in
+6. Builds full metadata filters (category, price, rating, availability) so
+   the index does the filtering, and over-fetches adaptively so a page
+   holds top_k distinct products
+7. Keeps a BM25 inverted index over product text and fuses it with vector
+   results (reciprocal rank fusion) for exact-name and ingredient queries
+8. Filters on normalized ingredient tags with per-ingredient bitsets
+   (include_ingredients / exclude_ingredients)
+9. Stores int8 / float16 quantized copies of the vectors that are scanned
+   first and re-ranked exactly, for a smaller memory footprint
+10. Records which embedding provider built the index and embeds queries
+    with that same provider (see embedding_providers.py)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+
+import numpy as np
+
+# Add parent directory to path so pipelines/ helpers import when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semantic_search.embedding_providers import (
+    EMBEDDING_PROVIDER, check_provider, get_embedding_provider, provider_for_index
+)
+
+# ============ CONFIGURATION ============
+
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "data/local_index")
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+# text-embedding-3 models can return shortened vectors (256, 512, 1024, ...)
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
+
+# Files inside a local index directory
+INFO_FILE = "index.json"
+VECTORS_FILE = "vectors.f32"  # Raw row-major float32, one L2-normalized row per vector
+RECORDS_FILE = "records.jsonl"  # One line per upsert/delete, last write wins
+
+# IVF index (stored in a subdirectory of the local index)
+IVF_SUBDIR = "ivf"
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))  # Lists scanned per query
+KMEANS_ITERATIONS = 20
+KMEANS_SAMPLES_PER_LIST = 256  # Training sample size per centroid
+
+# Quantized (compressed) vectors, stored in a subdirectory of the local index
+QUANTIZED_SUBDIR = "quantized"
+QUANTIZATION_KINDS = {"int8": 1, "float16": 2}  # kind -> bytes per dimension
+QUANTIZED_RERANK = int(os.getenv("QUANTIZED_RERANK", "100"))  # Candidates re-scored in float32
+QUANTIZATION_SAMPLE = 100000  # Rows used to fit int8 ranges
+QUANTIZATION_CLIP = 0.0005  # Quantile clipped at each end of every dimension
+QUANTIZED_SCAN_CHUNK = 1024  # Rows decoded at a time; small enough to stay in cache
+
+# Product pages
+MAX_TOP_K = 1000  # Pinecone's top_k limit when metadata is included
+INITIAL_VARIANTS_PER_PRODUCT = 3.0  # Starting over-fetch ratio, adapted per query
+
+# Lexical (BM25) index, stored in a subdirectory of the local index
+LEXICAL_SUBDIR = "lexical"
+LEXICAL_FIELDS = ['product_name', 'variant_title', 'description', 'ingredients', 'finish']
+LEXICAL_FIELD_BOOSTS = {'product_name': 2, 'variant_title': 2}  # Term-frequency multipliers
+LEXICAL_WEIGHT = float(os.getenv("LEXICAL_WEIGHT", "0.3"))  # BM25 share in hybrid fusion
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60  # Reciprocal rank fusion damping constant
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# ============ HELPER FUNCTIONS ============
+
+def normalize_rows(vectors):
+    """L2-normalize each row so a dot product equals cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def truncate_embeddings(vectors, dimension):
+    """
+    Shorten text-embedding-3 vectors to their first `dimension` values and
+    renormalize. This is what the API's `dimensions` parameter does.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    return normalize_rows(vectors[..., :dimension])
+
+
+def _numeric(value):
+    """Convert a metadata value to float for range comparisons (NaN if not numeric)."""
+    if isinstance(value, bool) or value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class TagBitsets:
+    """
+    Per-tag row sets for a list-valued metadata field (e.g. ingredient_tags).
+
+    Like a roaring bitmap, common tags are stored as packed bitsets
+    (one bit per row) and rare tags as sorted row arrays, whichever is
+    smaller. Filters combine them with bitwise AND/OR/NOT on packed bytes,
+    so each tag costs about rows/8 byte operations.
+    """
+
+    def __init__(self, lists):
+        self.n_rows = len(lists)
+        self.n_bytes = (self.n_rows + 7) // 8
+        postings = {}
+        for row, tags in enumerate(lists):
+            for tag in tags or ():
+                postings.setdefault(tag, []).append(row)
+
+        self.vocab = sorted(postings)
+        self.dense = {}
+        self.sparse = {}
+        for tag, rows in postings.items():
+            rows = np.asarray(rows, dtype=np.int32)
+            if len(rows) * 4 > self.n_bytes:
+                bits = np.zeros(self.n_rows, dtype=bool)
+                bits[rows] = True
+                self.dense[tag] = np.packbits(bits)
+            else:
+                self.sparse[tag] = rows
+
+    def bits(self, tag):
+        """Packed bitset of rows carrying tag."""
+        if tag in self.dense:
+            return self.dense[tag]
+        bits = np.zeros(self.n_bytes, dtype=np.uint8)
+        rows = self.sparse.get(tag)
+        if rows is not None:
+            np.bitwise_or.at(bits, rows >> 3, (128 >> (rows & 7)).astype(np.uint8))
+        return bits
+
+    def any_of(self, tags):
+        """Packed bitset of rows carrying at least one of tags."""
+        bits = np.zeros(self.n_bytes, dtype=np.uint8)
+        for tag in tags:
+            bits |= self.bits(tag)
+        return bits
+
+    def to_mask(self, bits):
+        return np.unpackbits(bits, count=self.n_rows).view(bool)
+
+
+class _MetadataColumns:
+    """
+    Column-wise view over a list of metadata dicts.
+    Lets Pinecone-style filters run as vectorized NumPy comparisons.
+    """
+
+    def __init__(self, metadata):
+        self.metadata = metadata
+        self._objects = {}
+        self._numbers = {}
+        self._tags = {}
+
+    def objects(self, field):
+        if field not in self._objects:
+            column = np.empty(len(self.metadata), dtype=object)
+            column[:] = [m.get(field) for m in self.metadata]
+            self._objects[field] = column
+        return self._objects[field]
+
+    def numbers(self, field):
+        if field not in self._numbers:
+            self._numbers[field] = np.array(
+                [_numeric(m.get(field)) for m in self.metadata], dtype=np.float64
+            )
+        return self._numbers[field]
+
+    def tags(self, field):
+        """TagBitsets for a list-valued field, or None if the field holds scalars."""
+        if field not in self._tags:
+            lists = [m.get(field) for m in self.metadata]
+            is_list = any(isinstance(v, (list, tuple)) for v in lists)
+            self._tags[field] = TagBitsets(lists) if is_list else None
+        return self._tags[field]
+
+
+def _tag_condition_mask(tag_sets, condition):
+    """List-field semantics (as in Pinecone): $in = has any, $nin = has none."""
+    bits = np.full(tag_sets.n_bytes, 0xFF, dtype=np.uint8)
+    for op, operand in condition.items():
+        if op == "$in":
+            bits &= tag_sets.any_of(operand)
+        elif op == "$nin":
+            bits &= ~tag_sets.any_of(operand)
+        elif op == "$eq":
+            bits &= tag_sets.bits(operand)
+        elif op == "$ne":
+            bits &= ~tag_sets.bits(operand)
+        else:
+            raise ValueError(f"Unsupported filter operator for list field: {op}")
+    return tag_sets.to_mask(bits)
+
+
+def _condition_mask(columns, field, condition):
+    """Evaluate one field condition ({"$in": [...]}, {"$gte": 10}, or a bare value)."""
+    if not isinstance(condition, dict):
+        condition = {"$eq": condition}
+
+    tag_sets = columns.tags(field)
+    if tag_sets is not None:
+        return _tag_condition_mask(tag_sets, condition)
+
+    mask = np.ones(len(columns.metadata), dtype=bool)
+    for op, operand in condition.items():
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            values = columns.numbers(field)
+            with np.errstate(invalid="ignore"):
+                if op == "$gt":
+                    mask &= values > operand
+                elif op == "$gte":
+                    mask &= values >= operand
+                elif op == "$lt":
+                    mask &= values < operand
+                else:
+                    mask &= values <= operand
+        elif op == "$eq":
+            mask &= columns.objects(field) == operand
+        elif op == "$ne":
+            mask &= columns.objects(field) != operand
+        elif op == "$in":
+            mask &= np.isin(columns.objects(field), list(operand))
+        elif op == "$nin":
+            mask &= ~np.isin(columns.objects(field), list(operand))
+        else:
+            raise ValueError(f"Unsupported filter operator: {op}")
+    return mask
+
+
+def filter_mask(columns, metadata_filter):
+    """
+    Build a boolean row mask from a Pinecone-style metadata filter.
+    Supports $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte, $and and $or; list-valued
+    fields (ingredient_tags) match per element.
+    """
+    mask = np.ones(len(columns.metadata), dtype=bool)
+    for key, condition in (metadata_filter or {}).items():
+        if key == "$and":
+            for sub_filter in condition:
+                mask &= filter_mask(columns, sub_filter)
+        elif key == "$or":
+            any_mask = np.zeros(len(columns.metadata), dtype=bool)
+            for sub_filter in condition:
+                any_mask |= filter_mask(columns, sub_filter)
+            mask &= any_mask
+        else:
+            mask &= _condition_mask(columns, key, condition)
+    return mask
+
+
+def top_k_indices(scores, top_k):
+    """Indices of the top_k highest scores, best first (argpartition + small sort)."""
+    top_k = min(top_k, len(scores))
+    if top_k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+# ============ INDEX WRITER ============
+
+class LocalIndexWriter:
+    """
+    Append-only writer for a local index directory.
+
+    Vectors are appended to VECTORS_FILE and each upsert/delete is logged to
+    RECORDS_FILE, so writing is safe to resume and batches may arrive in any
+    order (from several threads). Call compact_local_index() afterwards to
+    drop superseded rows.
+    """
+
+    def __init__(self, path=LOCAL_INDEX_DIR, dimension=EMBEDDING_DIMENSION,
+                 model=EMBEDDING_MODEL, reset=False, provider=None):
+        self.path = path
+        self.dimension = dimension
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+        if reset:
+            for name in (VECTORS_FILE, RECORDS_FILE):
+                file_path = os.path.join(path, name)
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+
+        info_path = os.path.join(path, INFO_FILE)
+        if os.path.exists(info_path) and not reset:
+            with open(info_path, 'r') as f:
+                info = json.load(f)
+            if info["dimension"] != dimension:
+                raise ValueError(
+                    f"Local index at {path} has dimension {info['dimension']}, "
+                    f"got {dimension}"
+                )
+            if provider is not None and info.get("provider", provider) != provider:
+                raise ValueError(
+                    f"Local index at {path} was built with embedding provider {info['provider']}, "
+                    f"got {provider}. Run a full ingest to rebuild it."
+                )
+        else:
+            info = {"dimension": dimension, "model": model, "metric": "cosine"}
+            if provider is not None:
+                info["provider"] = provider  # Identity of the provider that embeds this index
+            with open(info_path, 'w') as f:
+                json.dump(info, f)
+
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        row_bytes = 4 * dimension
+        size = os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+        # Ignore a partially written trailing row from an interrupted run
+        self.row_count = size // row_bytes
+        if size % row_bytes:
+            with open(vectors_path, 'r+b') as f:
+                f.truncate(self.row_count * row_bytes)
+
+    def upsert(self, vectors):
+        """Append vectors in Pinecone upsert format: [{"id", "values", "metadata"}]."""
+        if not vectors:
+            return
+        matrix = normalize_rows([v["values"] for v in vectors])
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected dimension {self.dimension}, got {matrix.shape[1]}")
+
+        with self._lock:
+            # Vectors first, then records: a record never points past the vector file
+            with open(os.path.join(self.path, VECTORS_FILE), 'ab') as f:
+                f.write(matrix.tobytes())
+            with open(os.path.join(self.path, RECORDS_FILE), 'a') as f:
+                for offset, vector in enumerate(vectors):
+                    f.write(json.dumps({
+                        "id": vector["id"],
+                        "row": self.row_count + offset,
+                        "metadata": vector.get("metadata", {}),
+                    }) + "\n")
+            self.row_count += len(vectors)
+
+    def delete(self, ids):
+        """Log deletions; the rows disappear from queries on the next load."""
+        with self._lock, open(os.path.join(self.path, RECORDS_FILE), 'a') as f:
+            for vector_id in ids:
+                f.write(json.dumps({"id": vector_id, "row": None}) + "\n")
+
+
+def _read_live_records(path, row_count):
+    """Resolve the records log to the latest live (id, row, metadata) per id."""
+    latest = {}
+    records_path = os.path.join(path, RECORDS_FILE)
+    if os.path.exists(records_path):
+        with open(records_path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn last line from an interrupted write
+                if record["row"] is not None and record["row"] >= row_count:
+                    continue
+                latest.pop(record["id"], None)  # Re-insert so order follows last write
+                latest[record["id"]] = record
+    return [r for r in latest.values() if r["row"] is not None]
+
+
+def compact_local_index(path=LOCAL_INDEX_DIR):
+    """
+    Rewrite a local index so it holds exactly one contiguous row per live id.
+    After compaction the vectors load as a zero-copy memory map.
+    """
+    with open(os.path.join(path, INFO_FILE), 'r') as f:
+        info = json.load(f)
+    dimension = info["dimension"]
+
+    vectors_path = os.path.join(path, VECTORS_FILE)
+    size = os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+    row_count = size // (4 * dimension)
+    live = _read_live_records(path, row_count)
+
+    if row_count:
+        vectors = np.memmap(vectors_path, dtype=np.float32, mode='r',
+                            shape=(row_count, dimension))
+        rows = np.array([r["row"] for r in live], dtype=np.int64)
+        compacted = np.ascontiguousarray(vectors[rows]) if len(rows) else np.empty((0, dimension), np.float32)
+        del vectors
+    else:
+        compacted = np.empty((0, dimension), dtype=np.float32)
+
+    tmp_vectors = vectors_path + ".tmp"
+    with open(tmp_vectors, 'wb') as f:
+        f.write(compacted.tobytes())
+
+    records_path = os.path.join(path, RECORDS_FILE)
+    tmp_records = records_path + ".tmp"
+    with open(tmp_records, 'w') as f:
+        for new_row, record in enumerate(live):
+            f.write(json.dumps({
+                "id": record["id"],
+                "row": new_row,
+                "metadata": record.get("metadata", {}),
+            }) + "\n")
+
+    os.replace(tmp_vectors, vectors_path)
+    os.replace(tmp_records, records_path)
+
+    info["count"] = len(live)
+    with open(os.path.join(path, INFO_FILE), 'w') as f:
+        json.dump(info, f)
+
+    return len(live)
+
+# ============ LOCAL INDEX ============
+
+class LocalIndex:
+    """
+    Exact cosine search over a memory-mapped float32 matrix.
+
+    query() mirrors pinecone.Index.query() and returns
+    {"matches": [{"id", "score", "metadata"}, ...]}.
+    """
+
+    def __init__(self, ids, vectors, metadata, info, path=None):
+        self.ids = ids
+        self.vectors = vectors
+        self.metadata = metadata
+        self.info = info
+        self.path = path
+        self.dimension = info["dimension"]
+        self.columns = _MetadataColumns(metadata)
+        self.provider = None  # Query embedding provider, resolved on first search
+
+    @classmethod
+    def load(cls, path=LOCAL_INDEX_DIR):
+        info_path = os.path.join(path, INFO_FILE)
+        if not os.path.exists(info_path):
+            raise FileNotFoundError(
+                f"No local index at {path}. Run: python3 pipelines/ingest_to_pinecone.py"
+            )
+        with open(info_path, 'r') as f:
+            info = json.load(f)
+        dimension = info["dimension"]
+
+        vectors_path = os.path.join(path, VECTORS_FILE)
+        size = os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+        row_count = size // (4 * dimension)
+        live = _read_live_records(path, row_count)
+
+        if row_count:
+            vectors = np.memmap(vectors_path, dtype=np.float32, mode='r',
+                                shape=(row_count, dimension))
+        else:
+            vectors = np.empty((0, dimension), dtype=np.float32)
+
+        rows = np.array([r["row"] for r in live], dtype=np.int64)
+        if not np.array_equal(rows, np.arange(row_count)):
+            # Not compacted yet: gather live rows into memory
+            vectors = np.ascontiguousarray(vectors[rows]) if len(rows) else np.empty((0, dimension), np.float32)
+
+        ids = [r["id"] for r in live]
+        metadata = [r.get("metadata", {}) for r in live]
+        return cls(ids, vectors, metadata, info, path=path)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def describe_index_stats(self):
+        return {"total_vector_count": len(self), "dimension": self.dimension}
+
+    def query(self, vector, top_k=10, include_metadata=True, filter=None):
+        query_vector = normalize_rows(vector)[0]
+        if query_vector.shape[0] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query_vector.shape[0]} does not match index dimension {self.dimension}"
+            )
+
+        scores = self.vectors @ query_vector
+        if filter:
+            mask = filter_mask(self.columns, filter)
+            scores = np.where(mask, scores, -np.inf)
+            top_k = min(top_k, int(mask.sum()))
+
+        matches = []
+        for i in top_k_indices(scores, top_k):
+            match = {"id": self.ids[i], "score": float(scores[i])}
+            if include_metadata:
+                match["metadata"] = self.metadata[i]
+            matches.append(match)
+        return {"matches": matches}
+
+# ============ IVF (APPROXIMATE) INDEX ============
+
+def _ids_checksum(ids):
+    """Fingerprint of the id order an IVF index was built against."""
+    digest = hashlib.sha256()
+    for vector_id in ids:
+        digest.update(vector_id.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _assign_to_centroids(vectors, centroids, chunk_size=65536):
+    """Nearest centroid (max cosine) per row, computed in chunks to bound memory."""
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignments
+
+
+def spherical_kmeans(vectors, n_lists, n_iter=KMEANS_ITERATIONS, seed=0):
+    """
+    k-means on the unit sphere (cosine similarity) trained on a sample.
+    Empty clusters are re-seeded from the worst-fitting training points.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = min(len(vectors), n_lists * KMEANS_SAMPLES_PER_LIST)
+    sample_rows = np.sort(rng.choice(len(vectors), size=n_samples, replace=False))
+    sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+
+    centroids = sample[rng.choice(n_samples, size=n_lists, replace=False)].copy()
+    for _ in range(n_iter):
+        similarities = sample @ centroids.T
+        assignments = np.argmax(similarities, axis=1)
+        best = similarities[np.arange(n_samples), assignments]
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, sample)
+        counts = np.bincount(assignments, minlength=n_lists)
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            worst = np.argsort(best)[:len(empty)]
+            sums[empty] = sample[worst]
+
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate index over a LocalIndex.
+
+    Vectors are clustered with spherical k-means; each query scans only the
+    nprobe lists whose centroids are closest, so latency grows roughly with
+    N / n_lists * nprobe instead of N. Vectors are stored grouped by list so
+    each probe is one contiguous slice of the memory map.
+    """
+
+    def __init__(self, base, centroids, list_offsets, list_rows, list_vectors, nprobe=IVF_NPROBE):
+        self.base = base
+        self.centroids = centroids
+        self.list_offsets = list_offsets  # list i occupies [offsets[i], offsets[i + 1])
+        self.list_rows = list_rows  # position in list order -> row in base
+        self.list_vectors = list_vectors
+        self.nprobe = nprobe
+        self.dimension = base.dimension
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def __len__(self):
+        return len(self.base)
+
+    @classmethod
+    def build(cls, base, n_lists=None, n_iter=KMEANS_ITERATIONS, nprobe=IVF_NPROBE, seed=0):
+        if len(base) == 0:
+            raise ValueError("Cannot build an IVF index over an empty local index. Run the ingestion pipeline first.")
+        if n_lists is None:
+            n_lists = max(1, int(4 * np.sqrt(len(base))))  # Common IVF rule of thumb
+        n_lists = min(n_lists, len(base))
+
+        centroids = spherical_kmeans(base.vectors, n_lists, n_iter=n_iter, seed=seed)
+        assignments = _assign_to_centroids(base.vectors, centroids)
+
+        list_rows = np.argsort(assignments, kind="stable")
+        counts = np.bincount(assignments, minlength=n_lists)
+        list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        list_vectors = np.ascontiguousarray(base.vectors[list_rows], dtype=np.float32)
+        return cls(base, centroids, list_offsets, list_rows, list_vectors, nprobe=nprobe)
+
+    def save(self, path=None):
+        path = path or os.path.join(LOCAL_INDEX_DIR, IVF_SUBDIR)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "centroids.npy"), self.centroids)
+        np.save(os.path.join(path, "list_offsets.npy"), self.list_offsets)
+        np.save(os.path.join(path, "list_rows.npy"), self.list_rows)
+        np.save(os.path.join(path, "list_vectors.npy"), self.list_vectors)
+        with open(os.path.join(path, "ivf.json"), 'w') as f:
+            json.dump({
+                "n_lists": self.n_lists,
+                "count": len(self.base),
+                "dimension": self.dimension,
+                "ids_checksum": _ids_checksum(self.base.ids),
+            }, f)
+        return path
+
+    @classmethod
+    def load(cls, path=None, base=None, nprobe=IVF_NPROBE):
+        if base is None:
+            base = LocalIndex.load(LOCAL_INDEX_DIR)
+        path = path or os.path.join(LOCAL_INDEX_DIR, IVF_SUBDIR)
+        with open(os.path.join(path, "ivf.json"), 'r') as f:
+            info = json.load(f)
+        if info["count"] != len(base) or info["ids_checksum"] != _ids_checksum(base.ids):
+            raise ValueError(
+                f"IVF index at {path} is stale for the current local index. "
+                "Rebuild it with: python3 semantic_search/search.py build-ivf"
+            )
+        return cls(
+            base,
+            np.load(os.path.join(path, "centroids.npy")),
+            np.load(os.path.join(path, "list_offsets.npy")),
+            np.load(os.path.join(path, "list_rows.npy")),
+            np.load(os.path.join(path, "list_vectors.npy"), mmap_mode='r'),
+            nprobe=nprobe,
+        )
+
+    def describe_index_stats(self):
+        return {"total_vector_count": len(self), "dimension": self.dimension, "n_lists": self.n_lists}
+
+    def _probe(self, query_vector, lists):
+        """Candidate base rows and scores for the given lists."""
+        slices = [slice(self.list_offsets[i], self.list_offsets[i + 1]) for i in lists]
+        positions = np.concatenate([np.arange(s.start, s.stop) for s in slices])
+        scores = np.concatenate([self.list_vectors[s] @ query_vector for s in slices])
+        return self.list_rows[positions], scores
+
+    def query(self, vector, top_k=10, include_metadata=True, filter=None, nprobe=None):
+        query_vector = normalize_rows(vector)[0]
+        if query_vector.shape[0] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query_vector.shape[0]} does not match index dimension {self.dimension}"
+            )
+
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+        list_order = np.argsort(-(self.centroids @ query_vector))
+        mask = filter_mask(self.base.columns, filter) if filter else None
+        if mask is not None:
+            top_k = min(top_k, int(mask.sum()))
+
+        # Probe more lists when a selective filter leaves fewer than top_k candidates
+        while True:
+            rows, scores = self._probe(query_vector, list_order[:nprobe])
+            if mask is not None:
+                keep = mask[rows]
+                rows, scores = rows[keep], scores[keep]
+            if len(rows) >= top_k or nprobe >= self.n_lists:
+                break
+            nprobe = min(nprobe * 2, self.n_lists)
+
+        matches = []
+        for i in top_k_indices(scores, top_k):
+            row = rows[i]
+            match = {"id": self.base.ids[row], "score": float(scores[i])}
+            if include_metadata:
+                match["metadata"] = self.base.metadata[row]
+            matches.append(match)
+        return {"matches": matches}
+
+# ============ QUANTIZED INDEX ============
+
+class QuantizedIndex:
+    """
+    Compressed copy of a LocalIndex's vectors with exact re-ranking.
+
+    kind="int8" stores one byte per dimension, using a per-dimension scale and
+    offset fitted to the data (x ~= bias + scale * code). kind="float16"
+    stores two bytes. Queries scan the codes (4x / 2x less memory traffic
+    than float32). They keep the best rerank candidates and re-score them
+    against the base index's float32 vectors. Only those rows of the memory
+    map are read.
+    """
+
+    def __init__(self, base, kind, codes, scale=None, bias=None, rerank=QUANTIZED_RERANK):
+        if kind not in QUANTIZATION_KINDS:
+            raise ValueError(f"Unknown quantization kind: {kind} (expected one of {QUANTIZATION_KINDS})")
+        self.base = base
+        self.kind = kind
+        self.codes = codes
+        self.scale = scale
+        self.bias = bias
+        self.rerank = rerank
+        self.dimension = base.dimension
+
+    def __len__(self):
+        return len(self.base)
+
+    @property
+    def bytes_per_vector(self):
+        return self.dimension * QUANTIZATION_KINDS[self.kind]
+
+    @classmethod
+    def build(cls, base, kind="int8", rerank=QUANTIZED_RERANK, chunk_size=65536, seed=0):
+        if len(base) == 0:
+            raise ValueError("Cannot quantize an empty local index. Run the ingestion pipeline first.")
+        vectors = base.vectors
+        if kind == "float16":
+            codes = np.empty(vectors.shape, dtype=np.float16)
+            for start in range(0, len(vectors), chunk_size):
+                codes[start:start + chunk_size] = vectors[start:start + chunk_size]
+            return cls(base, kind, codes, rerank=rerank)
+
+        # Fit the range on a sample, clipping outliers so most values keep full resolution
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(len(vectors), size=min(len(vectors), QUANTIZATION_SAMPLE), replace=False))
+        sample = np.asarray(vectors[sample_rows], dtype=np.float32)
+        low = np.quantile(sample, QUANTIZATION_CLIP, axis=0)
+        high = np.quantile(sample, 1.0 - QUANTIZATION_CLIP, axis=0)
+        scale = np.maximum(high - low, 1e-12).astype(np.float32) / 255.0
+        bias = (low + 128.0 * scale).astype(np.float32)  # code -128 maps to low
+
+        codes = np.empty(vectors.shape, dtype=np.int8)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+            codes[start:start + chunk_size] = np.clip(np.rint((chunk - bias) / scale), -128, 127)
+        return cls(base, kind, codes, scale=scale, bias=bias, rerank=rerank)
+
+    def save(self, path=None):
+        path = path or os.path.join(LOCAL_INDEX_DIR, QUANTIZED_SUBDIR)
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "codes.npy"), self.codes)
+        if self.kind == "int8":
+            np.save(os.path.join(path, "scale.npy"), self.scale)
+            np.save(os.path.join(path, "bias.npy"), self.bias)
+        with open(os.path.join(path, "quantized.json"), 'w') as f:
+            json.dump({
+                "kind": self.kind,
+                "count": len(self.base),
+                "dimension": self.dimension,
+                "ids_checksum": _ids_checksum(self.base.ids),
+            }, f)
+        return path
+
+    @classmethod
+    def load(cls, path=None, base=None, rerank=QUANTIZED_RERANK):
+        if base is None:
+            base = LocalIndex.load(LOCAL_INDEX_DIR)
+        path = path or os.path.join(LOCAL_INDEX_DIR, QUANTIZED_SUBDIR)
+        with open(os.path.join(path, "quantized.json"), 'r') as f:
+            info = json.load(f)
+        if info["count"] != len(base) or info["ids_checksum"] != _ids_checksum(base.ids):
+            raise ValueError(
+                f"Quantized index at {path} is stale for the current local index. "
+                "Rebuild it with: python3 semantic_search/search.py build-quantized"
+            )
+        scale = bias = None
+        if info["kind"] == "int8":
+            scale = np.load(os.path.join(path, "scale.npy"))
+            bias = np.load(os.path.join(path, "bias.npy"))
+        codes = np.load(os.path.join(path, "codes.npy"), mmap_mode='r')
+        return cls(base, info["kind"], codes, scale=scale, bias=bias, rerank=rerank)
+
+    def describe_index_stats(self):
+        return {"total_vector_count": len(self), "dimension": self.dimension,
+                "quantization": self.kind, "bytes_per_vector": self.bytes_per_vector}
+
+    def approximate_scores(self, query_vector, chunk_size=QUANTIZED_SCAN_CHUNK):
+        """Dot products against the decoded codes, one cache-sized chunk at a time."""
+        if self.kind == "int8":
+            weights = query_vector * self.scale
+            offset = float(query_vector @ self.bias)
+        else:
+            weights, offset = query_vector, 0.0
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        buffer = np.empty((min(chunk_size, len(self.codes)), self.dimension), dtype=np.float32)
+        for start in range(0, len(self.codes), chunk_size):
+            chunk = self.codes[start:start + chunk_size]
+            decoded = buffer[:len(chunk)]
+            np.copyto(decoded, chunk, casting='unsafe')  # Reused buffer: no allocation per chunk
+            np.dot(decoded, weights, out=scores[start:start + len(chunk)])
+        return scores + offset
+
+    def query(self, vector, top_k=10, include_metadata=True, filter=None, rerank=None):
+        query_vector = normalize_rows(vector)[0]
+        if query_vector.shape[0] != self.dimension:
+            raise ValueError(
+                f"Query dimension {query_vector.shape[0]} does not match index dimension {self.dimension}"
+            )
+
+        scores = self.approximate_scores(query_vector)
+        candidates_k = max(top_k, rerank or self.rerank)
+        if filter:
+            mask = filter_mask(self.base.columns, filter)
+            scores = np.where(mask, scores, -np.inf)
+            top_k = min(top_k, int(mask.sum()))
+            candidates_k = min(candidates_k, int(mask.sum()))
+
+        # Exact float32 re-rank; sorted rows keep memory-map reads sequential
+        candidates = np.sort(top_k_indices(scores, candidates_k))
+        exact = np.asarray(self.base.vectors[candidates], dtype=np.float32) @ query_vector
+
+        matches = []
+        for i in top_k_indices(exact, top_k):
+            row = candidates[i]
+            match = {"id": self.base.ids[row], "score": float(exact[i])}
+            if include_metadata:
+                match["metadata"] = self.base.metadata[row]
+            matches.append(match)
+        return {"matches": matches}
+
+# ============ LEXICAL (BM25) INDEX ============
+
+def tokenize(text):
+    """Lower-case alphanumeric tokens; 'talc-free' -> ['talc', 'free']."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+class LexicalIndex:
+    """
+    BM25 over product_name, variant_title, description, ingredients and
+    finish. Postings are stored CSR-style: term t's documents are
+    doc_ids[offsets[t]:offsets[t + 1]] with matching term frequencies, so a
+    query touches only the postings of its own terms.
+
+    Documents carry the same metadata as the vector index, so query()
+    applies the same Pinecone-style filters.
+    """
+
+    def __init__(self, ids, metadata, vocab, offsets, doc_ids, term_freqs, doc_lengths,
+                 k1=BM25_K1, b=BM25_B):
+        self.ids = ids
+        self.metadata = metadata
+        self.vocab = vocab  # term -> term id
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.term_freqs = term_freqs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        self.columns = _MetadataColumns(metadata)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids, field_texts, metadata):
+        """
+        ids: vector id per document; field_texts: {field: [text per document]};
+        metadata: metadata dict per document. Later duplicates of an id win.
+        """
+        latest = {vector_id: i for i, vector_id in enumerate(ids)}
+        rows = sorted(latest.values())
+
+        vocab = {}
+        term_ids, doc_ids, term_freqs = [], [], []
+        doc_lengths = np.zeros(len(rows), dtype=np.float32)
+        for doc, row in enumerate(rows):
+            counts = {}
+            for field, texts in field_texts.items():
+                text = texts[row]
+                if text is None or (isinstance(text, float) and np.isnan(text)):
+                    continue
+                for token in tokenize(text):
+                    counts[token] = counts.get(token, 0) + LEXICAL_FIELD_BOOSTS.get(field, 1)
+            doc_lengths[doc] = sum(counts.values())
+            for token, count in counts.items():
+                term_ids.append(vocab.setdefault(token, len(vocab)))
+                doc_ids.append(doc)
+                term_freqs.append(count)
+
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(term_ids, minlength=len(vocab)))]).astype(np.int64)
+        return cls(
+            [ids[row] for row in rows],
+            [metadata[row] for row in rows],
+            vocab,
+            offsets,
+            np.asarray(doc_ids, dtype=np.int32)[order],
+            np.asarray(term_freqs, dtype=np.float32)[order],
+            doc_lengths,
+        )
+
+    @classmethod
+    def build_from_frame(cls, df, ids, metadata):
+        """Build from a master-CSV DataFrame aligned with ids and metadata."""
+        field_texts = {
+            field: df[field].tolist() if field in df.columns else [None] * len(df)
+            for field in LEXICAL_FIELDS
+        }
+        return cls.build(ids, field_texts, metadata)
+
+    def save(self, path=None):
+        path = path or os.path.join(LOCAL_INDEX_DIR, LEXICAL_SUBDIR)
+        os.makedirs(path, exist_ok=True)
+        np.savez(
+            os.path.join(path, "postings.npz"),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            term_freqs=self.term_freqs,
+            doc_lengths=self.doc_lengths,
+        )
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(os.path.join(path, "documents.json"), 'w') as f:
+            json.dump({"terms": terms, "ids": self.ids, "metadata": self.metadata}, f)
+        return path
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or os.path.join(LOCAL_INDEX_DIR, LEXICAL_SUBDIR)
+        with open(os.path.join(path, "documents.json"), 'r') as f:
+            documents = json.load(f)
+        postings = np.load(os.path.join(path, "postings.npz"))
+        return cls(
+            documents["ids"],
+            documents["metadata"],
+            {term: i for i, term in enumerate(documents["terms"])},
+            postings["offsets"],
+            postings["doc_ids"],
+            postings["term_freqs"],
+            postings["doc_lengths"],
+        )
+
+    def scores(self, text):
+        """BM25 score of every document for a query (0 where no term matches)."""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        n_docs = len(self.ids)
+        for token in set(tokenize(text)):
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            docs = self.doc_ids[start:end]
+            tf = self.term_freqs[start:end]
+            idf = np.log(1.0 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+            scores[docs] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+        return scores
+
+    def query(self, text, top_k=10, include_metadata=True, filter=None):
+        scores = self.scores(text)
+        candidates = scores > 0
+        if filter:
+            candidates &= filter_mask(self.columns, filter)
+        scores = np.where(candidates, scores, -np.inf)
+
+        matches = []
+        for i in top_k_indices(scores, min(top_k, int(candidates.sum()))):
+            match = {"id": self.ids[i], "score": float(scores[i])}
+            if include_metadata:
+                match["metadata"] = self.metadata[i]
+            matches.append(match)
+        return {"matches": matches}
+
+
+def reciprocal_rank_fusion(result_lists, weights, k=RRF_K):
+    """
+    Fuse ranked match lists: score(d) = sum_i weights[i] / (k + rank_i(d)).
+    Returns matches (with fused "score") best first.
+    """
+    fused = {}
+    for matches, weight in zip(result_lists, weights):
+        if weight <= 0:
+            continue
+        for rank, match in enumerate(matches, start=1):
+            entry = fused.setdefault(match["id"], {"id": match["id"], "score": 0.0,
+                                                   "metadata": match.get("metadata")})
+            entry["score"] += weight / (k + rank)
+            if entry["metadata"] is None:
+                entry["metadata"] = match.get("metadata")
+    return sorted(fused.values(), key=lambda m: m["score"], reverse=True)
+
+
+class HybridIndex:
+    """
+    Vector + BM25 retrieval fused with reciprocal rank fusion.
+
+    lexical_weight (0..1) sets the BM25 share; the vector index gets the
+    rest. query() takes the usual vector arguments plus the raw query text.
+    With lexical_weight=1 no query vector is needed at all.
+    """
+
+    def __init__(self, vector_index, lexical_index, lexical_weight=LEXICAL_WEIGHT):
+        self.vector_index = vector_index
+        self.lexical_index = lexical_index
+        self.lexical_weight = lexical_weight
+
+    @property
+    def dimension(self):
+        return getattr(self.vector_index, "dimension", EMBEDDING_DIMENSION)
+
+    def query(self, vector=None, top_k=10, include_metadata=True, filter=None, text=None):
+        vector_matches, lexical_matches = [], []
+        if text is not None and self.lexical_weight > 0:
+            lexical_matches = self.lexical_index.query(text, top_k=top_k, filter=filter)["matches"]
+        if vector is not None and self.lexical_weight < 1:
+            vector_matches = self.vector_index.query(
+                vector=vector, top_k=top_k, include_metadata=True, filter=filter
+            ).get("matches", [])
+
+        fused = reciprocal_rank_fusion(
+            [vector_matches, lexical_matches],
+            [1.0 - self.lexical_weight, self.lexical_weight]
+        )[:top_k]
+        if not include_metadata:
+            fused = [{"id": m["id"], "score": m["score"]} for m in fused]
+        return {"matches": fused}
+
+# ============ FILTERED PRODUCT QUERIES ============
+
+def _ingredient_names(names):
+    from pipelines.embedding_text import normalize_ingredient_name
+
+    if isinstance(names, str):
+        names = names.split(",")
+    return [n for n in (normalize_ingredient_name(name) for name in names) if n]
+
+
+def build_filter(category_filter=None, price_range=None, min_rating=None, available_only=False,
+                 include_ingredients=None, exclude_ingredients=None):
+    """
+    Pinecone-style metadata filter for the app's search controls, so the
+    index filters before ranking instead of the app dropping results after.
+
+    include_ingredients must all be present, exclude_ingredients must all be
+    absent; both take ingredient names or families ("fragrance", "silicone",
+    "paraben") as a list or comma-separated string.
+    """
+    metadata_filter = {}
+    conditions = [{"ingredient_tags": {"$in": [name]}} for name in _ingredient_names(include_ingredients or [])]
+    excluded = _ingredient_names(exclude_ingredients or [])
+    if excluded:
+        conditions.append({"ingredient_tags": {"$nin": excluded}})
+    if conditions:
+        metadata_filter["$and"] = conditions
+    if category_filter:
+        metadata_filter["category"] = {"$in": list(category_filter)}
+    if price_range is not None:
+        low, high = price_range
+        metadata_filter["price"] = {"$gte": float(low), "$lte": float(high)}
+    if min_rating:
+        # Variants without a rating never satisfy a rating floor
+        metadata_filter["rating"] = {"$gte": float(min_rating)}
+    if available_only:
+        metadata_filter["available"] = {"$eq": True}
+    return metadata_filter
+
+
+def _product_key(match):
+    metadata = match.get("metadata") or {}
+    return metadata.get("handle") or metadata.get("product_name") or match["id"]
+
+
+def dedupe_products(matches, limit=None):
+    """Keep the best-scoring variant of each product, in score order."""
+    seen = set()
+    products = []
+    for match in matches:
+        key = _product_key(match)
+        if key in seen:
+            continue
+        seen.add(key)
+        products.append(match)
+        if limit is not None and len(products) >= limit:
+            break
+    return products
+
+
+class ProductOverfetch:
+    """
+    Variants of one product crowd each other out of a top-k page. This
+    tracks how many variant matches each distinct product costs and
+    over-fetches by that ratio, so one index query usually fills a page.
+    """
+
+    def __init__(self, ratio=INITIAL_VARIANTS_PER_PRODUCT):
+        self.ratio = ratio
+
+    def fetch_size(self, top_k):
+        return min(MAX_TOP_K, max(top_k, math.ceil(top_k * self.ratio * 1.25)))
+
+    def observe(self, fetched, distinct):
+        if fetched and distinct:
+            # Moving average so one unusual query doesn't swing the ratio
+            self.ratio = 0.7 * self.ratio + 0.3 * (fetched / distinct)
+
+
+_overfetch = ProductOverfetch()
+
+
+def query_products(index, vector, top_k=10, metadata_filter=None, overfetch=None, query_text=None):
+    """
+    Top top_k distinct products matching metadata_filter. Works with
+    Pinecone, LocalIndex, IVFIndex and HybridIndex (pass query_text for
+    the lexical side). Only re-queries (with a larger fetch) when the
+    estimate fell short and more matches exist.
+    """
+    overfetch = overfetch or _overfetch
+    fetch = overfetch.fetch_size(top_k)
+    extra = {"text": query_text} if query_text is not None else {}
+    if isinstance(vector, np.ndarray):
+        vector = vector.tolist()  # Pinecone takes a list of floats; the local indexes accept either
+    while True:
+        results = index.query(
+            vector=vector,
+            top_k=fetch,
+            include_metadata=True,
+            filter=metadata_filter or None,
+            **extra
+        )
+        matches = results.get("matches", [])
+        products = dedupe_products(matches)
+        overfetch.observe(len(matches), len(products))
+
+        # Fewer matches than requested means the filter is exhausted
+        if len(products) >= top_k or len(matches) < fetch or fetch >= MAX_TOP_K:
+            return products[:top_k]
+        fetch = min(MAX_TOP_K, fetch * 2)
+
+# ============ SEARCH API ============
+
+_local_index = None
+_default_provider = None
+
+
+def base_index(index):
+    """The LocalIndex under an IVF / quantized / hybrid wrapper (None for Pinecone)."""
+    for attr in ("vector_index", "base"):
+        inner = getattr(index, attr, None)
+        if inner is not None:
+            return base_index(inner)
+    return index if isinstance(index, LocalIndex) else None
+
+
+def query_provider(index=None):
+    """
+    Embedding provider for queries against index: the one recorded in a
+    local index, or EMBEDDING_PROVIDER for Pinecone. Built once per index.
+    """
+    global _default_provider
+    base = base_index(index) if index is not None else None
+    if base is None:
+        if _default_provider is None:
+            _default_provider = get_embedding_provider(EMBEDDING_PROVIDER, EMBEDDING_DIMENSION, EMBEDDING_MODEL)
+        return _default_provider
+    if base.provider is None:
+        base.provider = provider_for_index(base.info, base.path)
+    return base.provider
+
+
+def embed_query(query, index=None, provider=None):
+    """Embed a search query with the provider that built the index."""
+    base = base_index(index) if index is not None else None
+    if provider is None:
+        provider = query_provider(index)
+    elif base is not None:
+        check_provider(base.info, provider)
+    return provider.embed_query(query)
+
+
+def get_local_index(path=LOCAL_INDEX_DIR):
+    """Load the local index once per process."""
+    global _local_index
+    if _local_index is None:
+        _local_index = LocalIndex.load(path)
+    return _local_index
+
+
+def search_products(query, category_filter=None, top_k=10, index=None,
+                    price_range=None, min_rating=None, available_only=False,
+                    include_ingredients=None, exclude_ingredients=None, provider=None):
+    """
+    Semantic product search against the local index (or any index passed in).
+    Returns up to top_k {"id", "score", "metadata"} matches, one per product,
+    best first. provider defaults to the one that built the index; a
+    different one raises EmbeddingProviderMismatch.
+    """
+    if index is None:
+        index = get_local_index()
+    metadata_filter = build_filter(category_filter, price_range, min_rating, available_only,
+                                   include_ingredients, exclude_ingredients)
+
+    if isinstance(index, HybridIndex):
+        # A purely lexical search needs no embedding call
+        vector = embed_query(query, index, provider) if index.lexical_weight < 1 else None
+        return query_products(index, vector, top_k=top_k, metadata_filter=metadata_filter, query_text=query)
+    return query_products(index, embed_query(query, index, provider), top_k=top_k, metadata_filter=metadata_filter)
+
+
+def build_ivf_index(path=LOCAL_INDEX_DIR, n_lists=None, nprobe=IVF_NPROBE):
+    """Build and persist an IVF index from the vectors written by ingestion."""
+    base = LocalIndex.load(path)
+    print(f"🔧 Building IVF index over {len(base)} vectors...")
+    ivf = IVFIndex.build(base, n_lists=n_lists, nprobe=nprobe)
+    ivf_path = ivf.save(os.path.join(path, IVF_SUBDIR))
+    print(f"✅ IVF index with {ivf.n_lists} lists saved to {ivf_path}")
+    return ivf
+
+
+def build_quantized_index(path=LOCAL_INDEX_DIR, kind="int8"):
+    """Build and persist a quantized copy of the local index's vectors."""
+    base = LocalIndex.load(path)
+    print(f"🔧 Quantizing {len(base)} vectors to {kind}...")
+    quantized = QuantizedIndex.build(base, kind=kind)
+    quantized_path = quantized.save(os.path.join(path, QUANTIZED_SUBDIR))
+    print(f"✅ {kind} index ({quantized.bytes_per_vector} bytes/vector, "
+          f"float32 is {4 * base.dimension}) saved to {quantized_path}")
+    return quantized
+
+
+def build_lexical_index(master_csv="data/rare_beauty_master.csv", path=LOCAL_INDEX_DIR):
+    """Build and persist the BM25 index from the master CSV."""
+    import pandas as pd
+    from pipelines.embedding_text import build_metadata
+
+    df = pd.read_csv(master_csv)
+    ids = ("variant_" + df['variant_id'].astype(str)).tolist()
+    lexical = LexicalIndex.build_from_frame(df, ids, build_metadata(df))
+    lexical_path = lexical.save(os.path.join(path, LEXICAL_SUBDIR))
+    print(f"✅ Lexical index with {len(lexical)} documents and {len(lexical.vocab)} terms saved to {lexical_path}")
+    return lexical
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local semantic search index tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build-ivf", help="Build the IVF approximate index")
+    build_parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    build_parser.add_argument("--lists", type=int, default=None,
+                              help="Number of k-means lists (default: 4 * sqrt(N))")
+    build_parser.add_argument("--nprobe", type=int, default=IVF_NPROBE)
+
+    lexical_parser = subparsers.add_parser("build-lexical", help="Build the BM25 lexical index")
+    lexical_parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    lexical_parser.add_argument("--master-csv", default="data/rare_beauty_master.csv")
+
+    quantized_parser = subparsers.add_parser("build-quantized", help="Build an int8/float16 quantized index")
+    quantized_parser.add_argument("--index-dir", default=LOCAL_INDEX_DIR)
+    quantized_parser.add_argument("--kind", choices=sorted(QUANTIZATION_KINDS), default="int8")
+
+    args = parser.parse_args()
+    if args.command == "build-ivf":
+        build_ivf_index(args.index_dir, n_lists=args.lists, nprobe=args.nprobe)
+    elif args.command == "build-lexical":
+        build_lexical_index(args.master_csv, args.index_dir)
+    elif args.command == "build-quantized":
+        build_quantized_index(args.index_dir, kind=args.kind)